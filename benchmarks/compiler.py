@@ -0,0 +1,46 @@
+"""
+Start-up cost of a large script with and without the on-disk AST cache.
+
+    python -m benchmarks.compiler [--lines N] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+from benchmarks.parser import program_source
+from pylox.cache.disk import DiskCache
+from pylox.compiler import compile_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "script.lox")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(program_source(args.lines))
+        cache = DiskCache(os.path.join(directory, "cache"))
+        compile_file(script, cache).unwrap()
+
+        def touched() -> None:
+            os.utime(script)
+            compile_file(script, cache).unwrap()
+
+        cases = {
+            "no cache": lambda: compile_file(script).unwrap(),
+            "stamp hit": lambda: compile_file(script, cache).unwrap(),
+            "hash hit": touched,
+        }
+
+        print(f"{os.path.getsize(script) / 1e6:.2f} MB, {args.lines} lines")
+        for name, case in cases.items():
+            best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+            print(f"{name:>10}: {best:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
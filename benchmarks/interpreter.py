@@ -0,0 +1,99 @@
+"""
+Per-iteration cost of counting loops, written as a `for` and as the `while` it used to be desugared to,
+and the time taken by numeric programs at each optimization level.
+
+    python -m benchmarks.interpreter [--iterations N [N ...]] [--optimize LEVEL] [--fib N] [--mandelbrot N]
+                                    [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import timeit
+from typing import Callable
+
+from pylox.compiler import compile_source
+from pylox.interpreter.interpreter import SYMBOLS, interpret
+
+
+def for_source(iterations: int) -> str:
+    return (
+        "var total = 0;\n"
+        f"for (var i = 0; i < {iterations}; i = i + 1) {{ total = total + i; }}\n"
+    )
+
+
+def while_source(iterations: int) -> str:
+    return (
+        "var total = 0;\n"
+        f"{{ var i = 0; while (i < {iterations}) {{ {{ total = total + i; }} i = i + 1; }} }}\n"
+    )
+
+
+def fib_source(n: int) -> str:
+    """The `n`th Fibonacci number, computed iteratively `n` times over."""
+    return (
+        "{\n"
+        "    var result = 0;\n"
+        f"    for (var k = 0; k < {n}; k = k + 1) {{\n"
+        "        var a = 0; var b = 1;\n"
+        "        for (var i = 0; i < k; i = i + 1) { var t = a + b; a = b; b = t; }\n"
+        "        result = a;\n"
+        "    }\n"
+        "    print(result);\n"
+        "}\n"
+    )
+
+
+def mandelbrot_source(size: int) -> str:
+    """The number of points of a `size` by `size` grid that stay bounded after 50 iterations."""
+    return (
+        "{\n"
+        "    var inside = 0;\n"
+        f"    for (var y = 0; y < {size}; y = y + 1) {{\n"
+        f"        for (var x = 0; x < {size}; x = x + 1) {{\n"
+        f"            var cr = 3 * x / {size} - 2; var ci = 2 * y / {size} - 1;\n"
+        "            var zr = 0; var zi = 0; var n = 0;\n"
+        "            while (n < 50 and zr * zr + zi * zi <= 4) {\n"
+        "                var t = zr * zr - zi * zi + cr; zi = 2 * zr * zi + ci; zr = t; n = n + 1;\n"
+        "            }\n"
+        "            if (n == 50) inside = inside + 1;\n"
+        "        }\n"
+        "    }\n"
+        "    print(inside);\n"
+        "}\n"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--optimize", type=int, default=3)
+    parser.add_argument("--fib", type=int, default=300)
+    parser.add_argument("--mandelbrot", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    for iterations in args.iterations:
+        print(f"{iterations} iterations")
+        for name, source in (("for", for_source), ("while", while_source)):
+            program = compile_source(source(iterations), memory=None, optimize=args.optimize,
+                                     known=SYMBOLS.names()).unwrap()
+            case: Callable[[], object] = lambda: interpret(program)
+            best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+            print(f"{name:>10}: {best:8.3f}s  {best / iterations * 1e9:8.0f} ns/iteration")
+
+    numeric = {
+        f"fib {args.fib}": fib_source(args.fib),
+        f"mandelbrot {args.mandelbrot}": mandelbrot_source(args.mandelbrot),
+    }
+    for name, text in numeric.items():
+        print(name)
+        for level in range(4):
+            program = compile_source(text, memory=None, optimize=level, known=SYMBOLS.names()).unwrap()
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                best = min(timeit.repeat(lambda: interpret(program), number=1, repeat=args.repeat))
+            print(f"{level:>10}: {best:8.3f}s  {out.getvalue().splitlines()[-1]}")
+
+
+if __name__ == "__main__":
+    main()
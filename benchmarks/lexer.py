@@ -0,0 +1,63 @@
+"""
+Lexer throughput on heavily commented sources.
+
+    python -m benchmarks.lexer [--lines N] [--repeat N]
+"""
+import argparse
+import re
+import timeit
+from typing import Callable
+
+from pylox.lexer.bytes_lexer import tokenize_bytes
+from pylox.lexer.lexer import tokenize
+
+_COMMENTS = re.compile(r"//[^\n]*|/\*[\s\S]*?\*/")
+
+
+def commented_source(lines: int) -> str:
+    chunk = (
+        "/* Running sum of the sequence.\n"
+        " * Every statement below is documented like this one.\n"
+        " */\n"
+        "var total = 0;        // accumulator\n"
+        "var i = 0;            // loop counter\n"
+        "while (i < 100) {     // bounded loop\n"
+        "    // add the next term\n"
+        "    total = total + i * 2.5;\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "\n"
+    )
+    return chunk * max(1, lines // chunk.count("\n"))
+
+
+def strip_comments(text: str) -> str:
+    """The preprocessing pass that was needed before the lexer understood comments."""
+    return _COMMENTS.sub(lambda m: "\n" * m.group().count("\n") or " ", text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = commented_source(args.lines)
+    data = text.encode()
+
+    cases: dict[str, Callable[[], object]] = {
+        "strip + scan": lambda: tokenize(strip_comments(text)).unwrap(),
+        "strip + regex": lambda: tokenize(strip_comments(text), engine="regex").unwrap(),
+        "scan": lambda: tokenize(text).unwrap(),
+        "regex": lambda: tokenize(text, engine="regex").unwrap(),
+        "bytes": lambda: tokenize_bytes(data).unwrap(),
+    }
+
+    print(f"{len(text) / 1e6:.2f} MB, {text.count(chr(10))} lines")
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f"{name:>14}: {best:8.3f}s  {len(text) / best / 1e6:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Parser throughput on a large generated program.
+
+    python -m benchmarks.parser [--lines N] [--repeat N]
+"""
+import argparse
+import timeit
+from typing import Callable
+
+from pylox.lexer.lexer import tokenize
+from pylox.parser.parser import parse, parse_recovering
+
+
+def program_source(lines: int) -> str:
+    chunk = (
+        "var total = 0;\n"
+        "var i = 0;\n"
+        "while (i < 100 and total >= 0) {\n"
+        "    total = total + i * (2.5 - -i) / 3;\n"
+        "    if (!(total == 0) or i != 1) print(f(total, g(i)(1)), \"sum\"); else total = 0;\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "for (var j = 0; j < 10; j = j + 1) { total = total - j; }\n"
+    )
+    return chunk * max(1, lines // chunk.count("\n"))
+
+
+def broken_source(lines: int) -> str:
+    """A program with a syntax error every other line."""
+    chunk = (
+        "var total = ;\n"
+        "var i = 0;\n"
+        "while (i < 100 and total >= 0) {\n"
+        "    total = total + i * (2.5 - -i) / ;\n"
+        "    if (!(total == 0) or i != 1) print(f(total, g(i)(1)) \"sum\"); else total = 0;\n"
+        "    i = i + 1\n"
+        "}\n"
+        "for (var j = 0; j < 10; j = j + 1) { total = total - j; }\n"
+    )
+    return chunk * max(1, lines // chunk.count("\n"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = program_source(args.lines)
+    tokens = tokenize(text, engine="regex").unwrap()
+
+    cases: dict[str, Callable[[], object]] = {
+        "descent": lambda: parse(tokens, engine="descent").unwrap(),
+        "pratt": lambda: parse(tokens, engine="pratt").unwrap(),
+        "fast": lambda: parse(tokens, engine="fast").unwrap(),
+        "iterative": lambda: parse(tokens, engine="iterative").unwrap(),
+    }
+
+    print(f"{len(tokens)} tokens, {text.count(chr(10))} lines")
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f"{name:>10}: {best:8.3f}s  {len(tokens) / best / 1e6:8.2f} Mtok/s")
+
+    broken = tokenize(broken_source(args.lines), engine="regex").unwrap()
+    errors = len(parse_recovering(broken)[1])
+    best = min(timeit.repeat(lambda: parse_recovering(broken), number=1, repeat=args.repeat))
+    print(f"recovering: {best:8.3f}s  {len(broken) / best / 1e6:8.2f} Mtok/s  {errors / best:10.0f} errors/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Flat form of a syntax tree: one row per node in parallel arrays instead of one object per node.
+
+Nodes are stored in pre-order, so the subtree of node `i` is the range `i:ends[i]` and every
+child has a larger index than its parent. Each row holds the node kind and four integer
+operands whose meaning depends on the kind:
+
+    Literal      constant
+    Identifier   name         symbol       address
+    Grouping     expression
+    Unary        operator     right
+    Binary       left         operator     right        numeric
+    Logical      left         operator     right
+    FuncCall     callee       args         count
+    ExprStmt     expr
+    Assignment   name         value        symbol       address
+    VarDecl      name         init         symbol       slot
+    Block        slots        statements   count
+    IfStmt       condition    then_branch  else_branch
+    WhileStmt    condition    body
+    Program                   statements   count
+    ForStmt      slots        clauses
+
+Child operands are node indices, or -1 for a missing optional child. Names and literal values
+are indices into the constant pool, operators are indices into `OPERATORS`, and lists of
+children are runs of node indices in `children`. The clauses of a `for` are a run of four:
+its initializer, condition, increment and body. Addresses pack the hops and slot of a resolved
+variable as `hops << 16 | slot`, or are -1 for globals.
+"""
+from array import array
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from pylox.ast.expression import IExpr, Literal, Identifier, Grouping, Unary, UnaryOp, Binary, BinaryOp, Logical, \
+    LogicalOp, FuncCall
+from pylox.ast.statement import IStmt, ExprStmt, Assignment, VarDecl, Block, IfStmt, WhileStmt, ForStmt, \
+    Program
+
+Node = IExpr | IStmt
+
+NODE_TYPES: Tuple[type, ...] = (
+    Literal, Identifier, Grouping, Unary, Binary, Logical, FuncCall,
+    ExprStmt, Assignment, VarDecl, Block, IfStmt, WhileStmt, Program, ForStmt,
+)
+KIND_IDS: dict[type, int] = {cls: i for i, cls in enumerate(NODE_TYPES)}
+
+OPERATORS: Tuple[UnaryOp | BinaryOp | LogicalOp, ...] = (*UnaryOp, *BinaryOp, *LogicalOp)
+OPERATOR_IDS: dict[UnaryOp | BinaryOp | LogicalOp, int] = {op: i for i, op in enumerate(OPERATORS)}
+
+NONE = -1
+_BLOCK = KIND_IDS[Block]
+
+MAX_SLOT = (1 << 16) - 1
+MAX_HOPS = (1 << 15) - 1
+
+
+def pack(hops: int, slot: int) -> int:
+    """The address operand of a variable `hops` frames out, in slot `slot`."""
+    return NONE if hops < 0 else hops << 16 | slot
+
+
+def unpack(address: int) -> Tuple[int, int]:
+    return (-1, -1) if address < 0 else (address >> 16, address & MAX_SLOT)
+
+
+class Arena:
+    __slots__ = ("kinds", "a", "b", "c", "d", "ends", "children", "constants")
+
+    # Arrays, or memoryviews of the same item types over a serialized arena.
+    kinds: Sequence[int]
+    a: Sequence[int]
+    b: Sequence[int]
+    c: Sequence[int]
+    d: Sequence[int]
+    ends: Sequence[int]
+    children: Sequence[int]
+    constants: List[object]
+
+    def __init__(self,
+                 kinds: Sequence[int], a: Sequence[int], b: Sequence[int], c: Sequence[int], d: Sequence[int],
+                 ends: Sequence[int], children: Sequence[int], constants: List[object]) -> None:
+        self.kinds = kinds
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.ends = ends
+        self.children = children
+        self.constants = constants
+
+    @classmethod
+    def from_node(cls, root: Node) -> "Arena":
+        """Flatten the tree under `root`, which becomes node 0."""
+        kinds, ends = array('B'), array('I')
+        a, b, c, d, children = array('i'), array('i'), array('i'), array('i'), array('i')
+        constants: List[object] = []
+        constant_ids: dict[Tuple[type, object], int] = {}
+
+        def constant(value: object) -> int:
+            # Keyed by type too, as 1, 1.0 and True are equal.
+            key = (type(value), value)
+            if key not in constant_ids:
+                constant_ids[key] = len(constants)
+                constants.append(value)
+            return constant_ids[key]
+
+        def operands(x: int, y: int, z: int, w: int = 0) -> None:
+            a.append(x)
+            b.append(y)
+            c.append(z)
+            d.append(w)
+
+        # Entries are (node, column, row): the node's index is written to `column[row]` once known.
+        # A `None` node closes the subtree of node `row`.
+        stack: List[Tuple[Any, Optional["array[int]"], int]] = [(root, None, 0)]
+        push = stack.append
+        while stack:
+            node, column, row = stack.pop()
+            if node is None:
+                ends[row] = len(kinds)
+                continue
+
+            index = len(kinds)
+            if column is not None:
+                column[row] = index
+            cls_ = type(node)
+            kinds.append(KIND_IDS[cls_])
+            ends.append(0)
+            push((None, None, index))
+
+            # Children are pushed last to first, so that they are laid out in source order.
+            if cls_ is Literal:
+                operands(constant(node.value), 0, 0)
+            elif cls_ is Identifier:
+                operands(constant(node.name), node.symbol, pack(node.hops, node.slot))
+            elif cls_ is Binary or cls_ is Logical:
+                operands(NONE, OPERATOR_IDS[node.operator], NONE, cls_ is Binary and node.numeric)
+                push((node.right, c, index))
+                push((node.left, a, index))
+            elif cls_ is Unary:
+                operands(OPERATOR_IDS[node.operator], NONE, 0)
+                push((node.right, b, index))
+            elif cls_ is Grouping:
+                operands(NONE, 0, 0)
+                push((node.expression, a, index))
+            elif cls_ is ExprStmt:
+                operands(NONE, 0, 0)
+                push((node.expr, a, index))
+            elif cls_ is Assignment or cls_ is VarDecl:
+                if cls_ is Assignment:
+                    value, address = node.value, pack(node.hops, node.slot)
+                else:
+                    value, address = node.init, node.slot
+                operands(constant(node.name), NONE, node.symbol, address)
+                if value is not None:
+                    push((value, b, index))
+            elif cls_ is IfStmt:
+                operands(NONE, NONE, NONE)
+                if node.else_branch is not None:
+                    push((node.else_branch, c, index))
+                push((node.then_branch, b, index))
+                push((node.condition, a, index))
+            elif cls_ is WhileStmt:
+                operands(NONE, NONE, 0)
+                push((node.body, b, index))
+                push((node.condition, a, index))
+            elif cls_ is ForStmt:
+                start = len(children)
+                children.extend([NONE] * 4)
+                operands(node.slots, start, 4)
+                clauses = (node.init, node.condition, node.increment, node.body)
+                for i in range(3, -1, -1):
+                    if clauses[i] is not None:
+                        push((clauses[i], children, start + i))
+            else:  # FuncCall, Block, Program
+                items = node.args if cls_ is FuncCall else node.statements
+                start = len(children)
+                children.extend([NONE] * len(items))
+                operands(node.slots if cls_ is Block else NONE, start, len(items))
+                for i in range(len(items) - 1, -1, -1):
+                    push((items[i], children, start + i))
+                if cls_ is FuncCall:
+                    push((node.callee, a, index))
+
+        return cls(kinds, a, b, c, d, ends, children, constants)
+
+    def node(self, index: int = 0, lazy: bool = False) -> Node:
+        """Rebuild the tree under node `index`.
+
+        If `lazy`, the statements of the blocks below it are rebuilt the first time they are used.
+        """
+        kinds, a, b, c, d = self.kinds, self.a, self.b, self.c, self.d
+        ends, children = self.ends, self.children
+        constants: List[Any] = self.constants
+        operators: Tuple[Any, ...] = OPERATORS
+        end = ends[index]
+
+        order: Sequence[int] = range(index, end)
+        if lazy:
+            # Skip the subtrees of nested blocks, which stay in the arena.
+            order, i = [], index
+            while i < end:
+                order.append(i)
+                i = ends[i] if kinds[i] == _BLOCK and i != index else i + 1
+        nodes: dict[int, Any] = {NONE: None}
+
+        # Children come after their parent, so building from the end finds them ready.
+        for i in reversed(order):
+            cls_: Any = NODE_TYPES[kinds[i]]
+            if cls_ is Literal:
+                node: Any = Literal(constants[a[i]])
+            elif cls_ is Identifier:
+                node = Identifier(constants[a[i]], b[i], *unpack(c[i]))
+            elif cls_ is Binary:
+                node = Binary(nodes[a[i]], operators[b[i]], nodes[c[i]], bool(d[i]))
+            elif cls_ is Logical:
+                node = Logical(nodes[a[i]], operators[b[i]], nodes[c[i]])
+            elif cls_ is Unary:
+                node = Unary(operators[a[i]], nodes[b[i]])
+            elif cls_ is Grouping or cls_ is ExprStmt:
+                node = cls_(nodes[a[i]])
+            elif cls_ is Assignment:
+                node = Assignment(constants[a[i]], nodes[b[i]], c[i], *unpack(d[i]))
+            elif cls_ is VarDecl:
+                node = VarDecl(constants[a[i]], nodes[b[i]], c[i], d[i])
+            elif cls_ is IfStmt:
+                node = IfStmt(nodes[a[i]], nodes[b[i]], nodes[c[i]])
+            elif cls_ is WhileStmt:
+                node = WhileStmt(nodes[a[i]], nodes[b[i]])
+            elif cls_ is ForStmt:
+                init, condition, increment, body = [nodes[j] for j in children[b[i]:b[i] + 4]]
+                node = ForStmt(init, condition, increment, body, a[i])
+            else:  # FuncCall, Block, Program
+                start = b[i]
+                indices = children[start:start + c[i]]
+                if lazy and cls_ is Block and i != index:
+                    node = Block(LazyNodes(self, indices), a[i])  # type: ignore[arg-type]
+                else:
+                    items = [nodes[j] for j in indices]
+                    if cls_ is FuncCall:
+                        node = FuncCall(nodes[a[i]], items)
+                    else:
+                        node = Block(items, a[i]) if cls_ is Block else Program(items)
+            nodes[i] = node
+
+        root: Node = nodes[index]
+        return root
+
+    def program(self) -> Program:
+        root = self.node()
+        if not isinstance(root, Program):
+            raise TypeError(f"Arena holds a {type(root).__name__}, not a Program")
+        return root
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the node arrays, without the constants."""
+        columns: Tuple[Any, ...] = (self.kinds, self.a, self.b, self.c, self.d, self.ends, self.children)
+        return sum(memoryview(column).nbytes for column in columns)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
+class LazyNodes(Sequence[Node]):
+    """Statements of a block, rebuilt from an `Arena` the first time they are needed."""
+
+    __slots__ = ("__arena", "__indices", "__items")
+
+    def __init__(self, arena: Arena, indices: Sequence[int]) -> None:
+        self.__arena: Optional[Arena] = arena
+        self.__indices = indices
+        self.__items: Optional[List[Node]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.__items is not None
+
+    def __load(self) -> List[Node]:
+        if self.__items is None:
+            assert self.__arena is not None
+            self.__items = [self.__arena.node(i, lazy=True) for i in self.__indices]
+            self.__arena = None
+        return self.__items
+
+    def __len__(self) -> int:
+        return len(self.__indices)
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.__load()[index]
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.__load())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, LazyNodes)):
+            return self.__load() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.__load())
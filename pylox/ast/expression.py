@@ -17,7 +17,7 @@ LITERAL        → NUMBER | STRING | "True" | "False" | "None" ;
 
 """
 import enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TypeAlias
 
 from pylox.lexer.tokens import Token, TokenType
@@ -25,10 +25,10 @@ from pylox.parser.error import ParseError, ErrorKinds
 
 
 class IExpr:
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class FuncCall(IExpr):
     callee: IExpr
     args: list[IExpr]
@@ -43,16 +43,20 @@ class UnaryOp(enum.Enum):
 
     @staticmethod
     def from_token(token: Token) -> "UnaryOp":
-        match token.type:
+        return UnaryOp.from_type(token.type)
+
+    @staticmethod
+    def from_type(tt: TokenType) -> "UnaryOp":
+        match tt:
             case TokenType.BANG:
                 return UnaryOp.NOT
             case TokenType.MINUS:
                 return UnaryOp.NEG
             case _:
-                raise ParseError(ErrorKinds.UNEXPECTED_TOKEN, tt=token.type)
+                raise ParseError(ErrorKinds.UNEXPECTED_TOKEN, tt=tt)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Unary(IExpr):
     operator: UnaryOp
     right: IExpr
@@ -76,7 +80,11 @@ class BinaryOp(enum.Enum):
 
     @staticmethod
     def from_token(token: Token) -> "BinaryOp":
-        match token.type:
+        return BinaryOp.from_type(token.type)
+
+    @staticmethod
+    def from_type(tt: TokenType) -> "BinaryOp":
+        match tt:
             case TokenType.SLASH:
                 return BinaryOp.DIV
             case TokenType.STAR:
@@ -98,14 +106,16 @@ class BinaryOp(enum.Enum):
             case TokenType.EQUAL_EQUAL:
                 return BinaryOp.EQ
             case _:
-                raise ParseError(ErrorKinds.UNEXPECTED_TOKEN, None, token.type)
+                raise ParseError(ErrorKinds.UNEXPECTED_TOKEN, None, tt)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Binary(IExpr):
     left: IExpr
     operator: BinaryOp
     right: IExpr
+    # Whether both operands are known to be numbers, set by `pylox.passes.numeric`.
+    numeric: bool = field(default=False, compare=False)
 
 
 class LogicalOp(enum.Enum):
@@ -116,26 +126,31 @@ class LogicalOp(enum.Enum):
         return self.value
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Logical(IExpr):
     left: IExpr
     operator: LogicalOp
     right: IExpr
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Literal(IExpr):
     value: object
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Grouping(IExpr):
     expression: IExpr
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Identifier(IExpr):
     name: str
+    symbol: int = field(default=-1, compare=False)
+    # Address of a local variable, set by `pylox.passes.resolver`: the number of frames out from the
+    # current one, and the index in that frame. Globals, and unresolved trees, have -1 hops.
+    hops: int = field(default=-1, compare=False)
+    slot: int = field(default=-1, compare=False)
 
 
 Primary: TypeAlias = Literal | Identifier | Grouping
@@ -0,0 +1,108 @@
+"""
+Hash-consing: sharing one instance between structurally equal subtrees.
+
+Nodes are immutable, so two equal subtrees can be the same object. `InternTable.intern` rebuilds
+a tree bottom-up, looking each node up by its type, its scalar fields and the identities of its
+already interned children. Within one table, interned subtrees are equal exactly when they are
+identical, so `a is b` replaces a deep comparison, and `id(node)` is a sound key for passes that
+memoize per subtree.
+
+The table holds its nodes weakly: a node stays interned as long as some tree still uses it.
+"""
+import weakref
+from typing import Any, List, Tuple, TypeVar
+
+from pylox.ast.arena import LazyNodes
+from pylox.ast.expression import IExpr
+from pylox.ast.statement import IStmt, Program
+from pylox.ast.visitor import field_names
+
+Node = IExpr | IStmt
+N = TypeVar("N", bound=Node)
+
+def _scalar_key(value: Any) -> Any:
+    # Keyed by type too, as 1, 1.0 and True are equal; floats by their bits, as 0.0 == -0.0.
+    if type(value) is float:
+        return float, value.hex()
+    return type(value), value
+
+
+class InternTable:
+    __slots__ = ("nodes", "__weakref__")
+
+    nodes: "weakref.WeakValueDictionary[Tuple[Any, ...], Any]"
+
+    def __init__(self) -> None:
+        self.nodes = weakref.WeakValueDictionary()
+
+    def intern(self, root: N) -> N:
+        """The tree under `root`, with every subtree replaced by its interned instance.
+
+        Nodes that are interned as they are, and whose children already are, are kept rather
+        than copied.
+        """
+        nodes = self.nodes
+        canonical: dict[int, Any] = {}
+
+        # Entries are (node, expanded): a node is interned once its children have been.
+        stack: List[Tuple[Any, bool]] = [(root, False)]
+        push = stack.append
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                if id(node) in canonical:
+                    continue
+                push((node, True))
+                for name in field_names(type(node)):
+                    value = getattr(node, name)
+                    if isinstance(value, (IExpr, IStmt)):
+                        push((value, False))
+                    elif isinstance(value, (list, LazyNodes)):
+                        for item in value:
+                            push((item, False))
+                continue
+
+            cls_ = type(node)
+            key: List[Any] = [cls_]
+            values: List[Any] = []
+            changed = False
+            for name in field_names(cls_):
+                value = getattr(node, name)
+                if isinstance(value, (IExpr, IStmt)):
+                    child = canonical[id(value)]
+                    changed = changed or child is not value
+                    key.append(id(child))
+                    values.append(child)
+                elif isinstance(value, (list, LazyNodes)):
+                    items = [canonical[id(item)] for item in value]
+                    changed = changed or type(value) is not list or any(a is not b for a, b in zip(items, value))
+                    key.append(tuple(map(id, items)))
+                    values.append(items)
+                else:
+                    key.append(_scalar_key(value))
+                    values.append(value)
+
+            # The key holds ids rather than children: the interned node keeps its children
+            # alive, so the ids stay valid for as long as the entry exists.
+            frozen_key = tuple(key)
+            interned = nodes.get(frozen_key)
+            if interned is None:
+                interned = cls_(*values) if changed else node
+                nodes[frozen_key] = interned
+            canonical[id(node)] = interned
+
+        result: N = canonical[id(root)]
+        return result
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+INTERN_TABLE = InternTable()
+"""Table shared by the whole process, used by `hashcons` by default."""
+
+
+def hashcons(program: Program, table: InternTable = INTERN_TABLE) -> Program:
+    """`program` with its structurally equal subtrees shared, through `table`."""
+    return table.intern(program)
+
@@ -1,126 +1,136 @@
-from rusty_utils import Catch, Result, Err
+import io
+from typing import List, Sequence, TextIO
+
+from rusty_utils import Catch, Result
 
 from pylox.ast.expression import *
 from pylox.ast.statement import *
+from pylox.ast.visitor import Visitor
 
 
-def resolve(ast: IExpr | IStmt) -> Result[str, ValueError]:
-    res: Result[str, ValueError]
-
-    if isinstance(ast, ExprStmt):
-        res = resolve_expr_stmt(ast.expr)
-
-    elif isinstance(ast, Unary):
-        res = resolve_unary(ast)
-    elif isinstance(ast, Binary):
-        res = resolve_binary(ast)
-    elif isinstance(ast, Grouping):
-        res = resolve_grouping(ast)
-    elif isinstance(ast, Literal):
-        res = resolve_literal(ast)
-    elif isinstance(ast, Identifier):
-        res = resolve_identifier(ast)
-    elif isinstance(ast, Logical):
-        res = resolve_logical(ast)
-    elif isinstance(ast, FuncCall):
-        res = resolve_func_call(ast)
-
-    elif isinstance(ast, VarDecl):
-        res = resolve_var_decl(ast)
-    elif isinstance(ast, Assignment):
-        res = resolve_assignment(ast)
-    elif isinstance(ast, Block):
-        res = resolve_block(ast)
-    elif isinstance(ast, IfStmt):
-        res = resolve_if_stmt(ast)
-    elif isinstance(ast, WhileStmt):
-        res = resolve_while_stmt(ast)
-    else:
-        return Err(ValueError(f"Invalid AST node: {ast}"))
-
-    return res
+class Pieces(Visitor[Sequence[object]]):
+    """The text of a node as a run of strings and the child nodes to write between them."""
 
+    __slots__ = ()
 
-@Catch(ValueError)  # type: ignore
-def resolve_func_call(value: FuncCall) -> str:
-    args = ', '.join([resolve(arg).unwrap_or_raise() for arg in value.args])
-    return f"(call {value.callee} ({args}))"
+    def missing(self, ast: IExpr | IStmt) -> Sequence[object]:
+        raise ValueError(f"Invalid AST node: {ast}")
 
+    def visit_program(self, value: Program) -> Sequence[object]:
+        pieces: List[object] = []
+        for stmt in value.statements:
+            pieces += (stmt, "\n")
+        return pieces
 
-@Catch(ValueError)  # type: ignore
-def resolve_while_stmt(value: WhileStmt) -> str:
-    condition = resolve(value.condition).unwrap_or_raise()
-    body = resolve(value.body).unwrap_or_raise()
-    return f"(while {condition} {body})"
+    def visit_func_call(self, value: FuncCall) -> Sequence[object]:
+        pieces: List[object] = ["(call ", str(value.callee), " ("]
+        for i, arg in enumerate(value.args):
+            pieces += (", ", arg) if i else (arg,)
+        pieces.append("))")
+        return pieces
 
+    def visit_while_stmt(self, value: WhileStmt) -> Sequence[object]:
+        return "(while ", value.condition, " ", value.body, ")"
 
-@Catch(ValueError)  # type: ignore
-def resolve_logical(value: Logical) -> str:
-    left = resolve(value.left).unwrap_or_raise()
-    right = resolve(value.right).unwrap_or_raise()
-    return f"({value.operator.value} {left} {right})"
+    def visit_for_stmt(self, value: ForStmt) -> Sequence[object]:
+        pieces: List[object] = ["(for"]
+        for clause in (value.init, value.condition, value.increment):
+            pieces += (" ", clause if clause else "nil")
+        pieces += (" ", value.body, ")")
+        return pieces
 
+    def visit_logical(self, value: Logical) -> Sequence[object]:
+        return "(", value.operator.value, " ", value.left, " ", value.right, ")"
 
-@Catch(ValueError)  # type: ignore
-def resolve_if_stmt(value: IfStmt) -> str:
-    condition = resolve(value.condition).unwrap_or_raise()
-    then_branch = resolve(value.then_branch).unwrap_or_raise()
-    else_branch = resolve(value.else_branch).unwrap_or_raise() if value.else_branch else None
-    return f"(if {condition} {then_branch} {else_branch})" if else_branch else f"(if {condition} {then_branch})"
+    def visit_if_stmt(self, value: IfStmt) -> Sequence[object]:
+        if value.else_branch:
+            return "(if ", value.condition, " ", value.then_branch, " ", value.else_branch, ")"
+        return "(if ", value.condition, " ", value.then_branch, ")"
 
+    def visit_block(self, value: Block) -> Sequence[object]:
+        pieces: List[object] = ["(block "]
+        for i, stmt in enumerate(value.statements):
+            pieces += (" ", stmt) if i else (stmt,)
+        pieces.append(")")
+        return pieces
 
-@Catch(ValueError)  # type: ignore
-def resolve_block(value: Block) -> str:
-    statements = ' '.join([resolve(stmt).unwrap_or_raise() for stmt in value.statements])
-    return f"(block {statements})"
+    def visit_assignment(self, value: Assignment) -> Sequence[object]:
+        return "(= ", value.name, " ", value.value, ")"
 
+    def visit_var_decl(self, value: VarDecl) -> Sequence[object]:
+        return "(var ", value.name, " ", value.init if value.init else "nil", ")"
 
-@Catch(ValueError)  # type: ignore
-def resolve_assignment(value: Assignment) -> str:
-    expr = resolve(value.value).unwrap_or_raise()
-    return f"(= {value.name} {expr})"
+    def visit_expr_stmt(self, value: ExprStmt) -> Sequence[object]:
+        return (value.expr,)
 
+    def visit_unary(self, value: Unary) -> Sequence[object]:
+        return "(", value.operator.value, " ", value.right, ")"
 
-@Catch(ValueError)  # type: ignore
-def resolve_var_decl(value: VarDecl) -> str:
-    init = resolve(value.init).unwrap_or_raise() if value.init else "nil"
-    return f"(var {value.name} {init})"
+    def visit_binary(self, value: Binary) -> Sequence[object]:
+        return "(", value.operator.value, " ", value.left, " ", value.right, ")"
 
+    def visit_grouping(self, value: Grouping) -> Sequence[object]:
+        return "(group ", value.expression, ")"
 
-@Catch(ValueError)  # type: ignore
-def resolve_expr_stmt(value: IExpr) -> str:
-    return f"{resolve(value).unwrap_or_raise()}"
+    def visit_literal(self, value: Literal) -> Sequence[object]:
+        return (str(value.value),)
 
+    def visit_identifier(self, value: Identifier) -> Sequence[object]:
+        return (value.name,)
 
-@Catch(ValueError)  # type: ignore
-def resolve_unary(value: Unary) -> str:
-    right = resolve(value.right).unwrap_or_raise()
-    return f"({value.operator.value} {right})"
 
+PIECES = Pieces()
 
-@Catch(ValueError)  # type: ignore
-def resolve_binary(value: Binary) -> str:
-    left = resolve(value.left).unwrap_or_raise()
-    right = resolve(value.right).unwrap_or_raise()
-    return f"({value.operator.value} {left} {right})"
+# Pieces written to the sink at once.
+_FLUSH_SIZE = 1 << 14
 
 
-@Catch(ValueError)  # type: ignore
-def resolve_grouping(value: Grouping) -> str:
-    expr = resolve(value.expression).unwrap_or_raise()
-    return f"(group {expr})"
+def write_ast(ast: IExpr | IStmt, sink: io.TextIOBase | TextIO) -> None:
+    """Write the same text as `format_ast` to `sink`, ending each statement of a program with a newline.
 
+    The tree is walked with an explicit stack and the output is written in chunks, so the time taken
+    is linear in the size of the text and deep trees do not overflow the call stack.
+    """
+    pieces = PIECES
+    dispatch = Pieces.dispatch
+    stack: List[object] = [ast]
+    pop, extend = stack.pop, stack.extend
+    buffer: List[str] = []
+    write = buffer.append
 
-@Catch(ValueError)  # type: ignore
-def resolve_literal(value: Literal) -> str:
-    return str(value.value)
+    while stack:
+        item = pop()
+        if type(item) is str:
+            write(item)
+            if len(buffer) >= _FLUSH_SIZE:
+                sink.write("".join(buffer))
+                buffer.clear()
+            continue
+        visit = dispatch.get(type(item))
+        extend(reversed(visit(pieces, item) if visit else pieces.missing(item)))  # type: ignore[arg-type]
+
+    sink.write("".join(buffer))
 
 
 @Catch(ValueError)  # type: ignore
-def resolve_identifier(value: Identifier) -> str:
-    return value.name
+def format_ast(ast: IExpr | IStmt) -> str:
+    out = io.StringIO()
+    write_ast(ast, out)
+    return out.getvalue().removesuffix("\n")
 
 
-@Catch(ValueError)  # type: ignore
-def format_ast(ast: Program) -> str:
-    return "\n".join([resolve(stmt).unwrap_or_raise() for stmt in ast.statements])
+class Printer:
+    """Formats nodes as s-expressions, through `format_ast`."""
+
+    __slots__ = ()
+
+    def visit(self, ast: IExpr | IStmt) -> Result[str, ValueError]:
+        result: Result[str, ValueError] = format_ast(ast)
+        return result
+
+
+PRINTER = Printer()
+
+
+def resolve(ast: IExpr | IStmt) -> Result[str, ValueError]:
+    return PRINTER.visit(ast)
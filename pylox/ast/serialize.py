@@ -0,0 +1,149 @@
+"""
+Binary encoding of programs, built on their `Arena` form.
+
+    header     magic, format version, byte order, node, child and constant counts
+    constants  a tag byte and a payload for each entry of the constant pool
+    columns    kinds, a, b, c, d, ends and children, each starting at a multiple of 4 bytes
+
+`load` maps the file into memory and reads the columns in place. Only the top-level
+statements are rebuilt up front; the statements of each block are rebuilt the first
+time they are used, so the cost of loading follows the code that actually runs.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import BinaryIO, List, Sequence, Tuple
+
+from pylox.ast.arena import Arena
+from pylox.ast.statement import Program
+
+MAGIC = b"LOXA"
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct("<4sHBxIII")
+_LITTLE, _BIG = 0, 1
+_BYTE_ORDER = _LITTLE if sys.byteorder == "little" else _BIG
+
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+
+# (type code, bytes per item) of the columns, in file order.
+_COLUMNS: Tuple[Tuple[str, int], ...] = (('B', 1), ('i', 4), ('i', 4), ('i', 4), ('i', 4), ('I', 4), ('i', 4))
+
+
+def dumps(program: Program) -> bytes:
+    arena = Arena.from_node(program)
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDER,
+                                 len(arena), len(arena.children), len(arena.constants)))
+
+    for value in arena.constants:
+        _dump_constant(out, value)
+
+    for column in (arena.kinds, arena.a, arena.b, arena.c, arena.d, arena.ends, arena.children):
+        out += bytes(-len(out) % 4)
+        out += memoryview(column)  # type: ignore[arg-type]
+    return bytes(out)
+
+
+def dump(program: Program, file: BinaryIO | str | os.PathLike[str]) -> None:
+    """Write `program` to a binary file object or to the file at a path."""
+    data = dumps(program)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "wb") as f:
+            f.write(data)
+    else:
+        file.write(data)
+
+
+def loads(data: bytes | bytearray | memoryview | mmap.mmap) -> Program:
+    """Decode a program, reading its columns in place from `data`."""
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError("Not a serialized program: too short")
+
+    magic, version, byte_order, nodes, children, count = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a serialized program: bad magic")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version {version}, expected {FORMAT_VERSION}")
+
+    offset = _HEADER.size
+    constants: List[object] = []
+    for _ in range(count):
+        value, offset = _load_constant(view, offset)
+        constants.append(value)
+
+    columns: List[Sequence[int]] = []
+    for (typecode, size), length in zip(_COLUMNS, (nodes, nodes, nodes, nodes, nodes, nodes, children)):
+        offset += -offset % 4
+        end = offset + size * length
+        if end > len(view):
+            raise ValueError("Truncated serialized program")
+        column = view[offset:end].cast(typecode)  # type: ignore[call-overload]
+        if byte_order != _BYTE_ORDER and size > 1:
+            swapped = array(typecode, column)
+            swapped.byteswap()
+            column = memoryview(swapped)
+        columns.append(column)
+        offset = end
+
+    kinds, a, b, c, d, ends, links = columns
+    program = Arena(kinds, a, b, c, d, ends, links, constants).node(lazy=True)
+    if not isinstance(program, Program):
+        raise ValueError(f"Serialized {type(program).__name__} is not a Program")
+    return program
+
+
+def load(file: BinaryIO | str | os.PathLike[str]) -> Program:
+    """Read a program from a binary file object or from the file at a path.
+
+    Files are memory-mapped when possible, and the mapping lives as long as the parts of the
+    program that have not been rebuilt yet.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return load(f)
+
+    try:
+        data: bytes | mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):  # No file descriptor, or an empty file.
+        data = file.read()
+    return loads(data)
+
+
+def _dump_constant(out: bytearray, value: object) -> None:
+    if value is None:
+        out += b"N"
+    elif value is True or value is False:
+        out += b"T" if value else b"F"
+    elif type(value) is int and -(1 << 63) <= value < (1 << 63):
+        out += b"I" + _INT.pack(value)
+    elif type(value) is float:
+        out += b"D" + _FLOAT.pack(value)
+    elif type(value) in (int, str):
+        encoded = str(value).encode()
+        out += (b"L" if type(value) is int else b"S") + _LENGTH.pack(len(encoded)) + encoded
+    else:
+        raise ValueError(f"Cannot serialize constant of type {type(value).__name__}: {value!r}")
+
+
+def _load_constant(view: memoryview, offset: int) -> Tuple[object, int]:
+    tag = view[offset:offset + 1].tobytes()
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T" or tag == b"F":
+        return tag == b"T", offset
+    if tag == b"I":
+        return _INT.unpack_from(view, offset)[0], offset + _INT.size
+    if tag == b"D":
+        return _FLOAT.unpack_from(view, offset)[0], offset + _FLOAT.size
+    if tag == b"L" or tag == b"S":
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        text = str(view[offset:offset + length], "utf-8")
+        return (int(text) if tag == b"L" else sys.intern(text)), offset + length
+    raise ValueError(f"Unknown constant tag {tag!r} at offset {offset - 1}")
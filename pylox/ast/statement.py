@@ -24,57 +24,74 @@ varDecl        → "var" IDENTIFIER ( "=" expression )? ";" ;
 assignment     → IDENTIFIER "=" expression ";" ;
 exprStmt       → expression ";" ;
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Union, TypeAlias, Optional
 
 from pylox.ast.expression import IExpr
 
 
 class IStmt:
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class ExprStmt(IStmt):
     expr: IExpr
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Assignment(IStmt):
     name: str
     value: IExpr
+    symbol: int = field(default=-1, compare=False)
+    hops: int = field(default=-1, compare=False)  # As in `Identifier`
+    slot: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Block(IStmt):
     statements: list[IStmt]
+    # Number of variables declared directly in the block, set by `pylox.passes.resolver`; -1 if unresolved.
+    slots: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class IfStmt(IStmt):
     condition: IExpr
     then_branch: IStmt
     else_branch: Optional[IStmt]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class WhileStmt(IStmt):
     condition: IExpr
     body: IStmt
 
 
+@dataclass(slots=True, frozen=True, weakref_slot=True)
+class ForStmt(IStmt):
+    init: Optional[IStmt]
+    condition: Optional[IExpr]  # `None` loops until something else stops it
+    increment: Optional[IStmt]
+    body: IStmt
+    # Number of variables the loop declares in its own scope, as in `Block`.
+    slots: int = field(default=-1, compare=False)
+
+
 Statement: TypeAlias = ExprStmt  | Assignment | Block | IfStmt
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class VarDecl(IStmt):
     name: str
     init: Optional[IExpr]
+    symbol: int = field(default=-1, compare=False)
+    slot: int = field(default=-1, compare=False)  # Index in the frame of its block; -1 for globals
 
 
 Declaration: TypeAlias = Union[VarDecl, Statement]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Program(IStmt):
     statements: list[Statement]
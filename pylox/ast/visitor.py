@@ -0,0 +1,171 @@
+"""
+Base classes of the passes that walk a syntax tree.
+
+A subclass handles `FuncCall` nodes in `visit_func_call`, `IfStmt` nodes in `visit_if_stmt`, and so on.
+The table from node class to method is built once, when the subclass is defined, so visiting a node
+costs one dict lookup and one call.
+
+`Visitor` leaves the walk to its methods. `Transformer` does the walk itself, bottom-up and without
+recursion, and its methods return the node that replaces the one they are given.
+"""
+import re
+from dataclasses import fields, replace
+from typing import Any, Callable, ClassVar, Generic, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from pylox.ast.arena import NODE_TYPES, LazyNodes
+from pylox.ast.expression import IExpr
+from pylox.ast.statement import IStmt
+
+R = TypeVar("R")
+N = TypeVar("N", bound=IExpr | IStmt)
+
+_FIELDS: dict[type, Tuple[str, ...]] = {}
+
+
+def method_name(cls: type) -> str:
+    """Name of the method that visits nodes of class `cls`, e.g. `visit_func_call` for `FuncCall`."""
+    return "visit_" + re.sub(r"(?<!^)(?=[A-Z])", "_", cls.__name__).lower()
+
+
+def field_names(cls: type) -> Tuple[str, ...]:
+    """Names of the fields of the node class `cls`, in declaration order."""
+    names = _FIELDS.get(cls)
+    if names is None:
+        names = _FIELDS[cls] = tuple(f.name for f in fields(cls))
+    return names
+
+
+def children(node: IExpr | IStmt) -> Iterator[IExpr | IStmt]:
+    """The child nodes of `node`, in field order."""
+    for name in field_names(type(node)):
+        value = getattr(node, name)
+        if isinstance(value, (IExpr, IStmt)):
+            yield value
+        elif isinstance(value, (list, LazyNodes)):
+            yield from value
+
+
+def walk(root: IExpr | IStmt) -> Iterator[IExpr | IStmt]:
+    """Every node of the tree under `root`, in pre-order, without recursion."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(children(node))))
+
+
+class Visitor(Generic[R]):
+    __slots__ = ()
+
+    dispatch: ClassVar[dict[type, Callable[[Any, Any], Any]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {}
+        for node_type in NODE_TYPES:
+            method = getattr(cls, method_name(node_type), None)
+            if method is not None:
+                cls.dispatch[node_type] = method
+
+    def visit(self, node: IExpr | IStmt) -> R:
+        try:
+            method = self.dispatch[type(node)]
+        except KeyError:
+            return self.missing(node)
+        result: R = method(self, node)
+        return result
+
+    def missing(self, node: IExpr | IStmt) -> R:
+        """Called for the nodes this visitor has no method for."""
+        raise TypeError(f"{type(self).__name__} cannot visit {type(node).__name__}")
+
+
+class Transformer(Visitor[Optional[IExpr | IStmt]]):
+    """Rewrites a tree bottom-up.
+
+    Each method gets a node whose children have already been transformed and returns the node to put
+    in its place: itself, a new node, or `None` to drop a statement from its list. Nodes that have no
+    method are kept, with their transformed children. Children are transformed in source order, and
+    `enter` is called on each node before its children are.
+    """
+
+    __slots__ = ()
+
+    # Whether a subtree that occurs more than once, as in hash-consed trees, is transformed only once.
+    # Passes whose result depends on where a node is must clear this: then every occurrence is
+    # transformed on its own, and the result shares no nodes, so that it can be told apart by `id`.
+    shared: ClassVar[bool] = True
+
+    def missing(self, node: IExpr | IStmt) -> Optional[IExpr | IStmt]:
+        return node
+
+    def enter(self, node: IExpr | IStmt) -> None:
+        pass
+
+    def transform(self, root: N) -> N:
+        dispatch = self.dispatch
+        shared = self.shared
+        enter = self.enter if type(self).enter is not Transformer.enter else None
+        # Results by the id of the node they replace, if shared; otherwise the ids of the nodes seen.
+        done: dict[int, Any] = {}
+        seen: Set[int] = set()
+        # Results of the nodes transformed so far whose parents have not been yet, in source order.
+        results: List[Any] = []
+
+        # Entries are (node, count): a node is transformed once its `count` children have been, and
+        # is expanded first, with a count of -1.
+        stack: List[Tuple[Any, int]] = [(root, -1)]
+        push = stack.append
+        while stack:
+            node, count = stack.pop()
+            if count < 0:
+                if shared and id(node) in done:
+                    results.append(done[id(node)])
+                    continue
+                if enter is not None:
+                    enter(node)
+                nodes = list(children(node))
+                push((node, len(nodes)))
+                # Last to first, so that they come off the stack in source order.
+                for child in reversed(nodes):
+                    push((child, -1))
+                continue
+
+            start = len(results) - count
+            new_children = results[start:]
+            del results[start:]
+
+            cls_ = type(node)
+            changes: dict[str, Any] = {}
+            index = 0
+            for name in field_names(cls_):
+                value = getattr(node, name)
+                if isinstance(value, (IExpr, IStmt)):
+                    new = new_children[index]
+                    index += 1
+                    if new is not value:
+                        changes[name] = new
+                elif isinstance(value, (list, LazyNodes)):
+                    items = new_children[index:index + len(value)]
+                    index += len(value)
+                    if any(a is not b for a, b in zip(items, value)):
+                        changes[name] = [item for item in items if item is not None]
+
+            if changes:
+                new_node = replace(node, **changes)
+            elif shared or id(node) not in seen:
+                new_node = node
+            else:
+                # A later occurrence of a node, copied so that it is not shared.
+                new_node = replace(node)
+            if not shared:
+                seen.add(id(node))
+
+            method = dispatch.get(cls_)
+            result = method(self, new_node) if method is not None else new_node
+            if shared:
+                done[id(node)] = result
+            results.append(result)
+
+        transformed: N = results[0]
+        return transformed
@@ -0,0 +1,77 @@
+"""
+On-disk cache of parsed programs, in the spirit of `.pyc` files.
+
+Entries are programs in the format of `pylox.ast.serialize`, keyed by a digest of the
+source text, the optimization level and the pylox version, so an edited script or an upgraded interpreter never
+gets a stale tree. Their blocks are decoded on first use. For scripts on disk, a stamp
+records the modification time and size the script had when its entry was written, so an
+unchanged script is found without reading or hashing it.
+"""
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Optional
+
+from pylox import __version__
+from pylox.ast import serialize
+from pylox.ast.statement import Program
+
+# Modification time in nanoseconds, size and entry key of a script.
+_STAMP = struct.Struct("<qq32s")
+
+
+class DiskCache:
+    __slots__ = ("directory",)
+
+    directory: str
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.directory = os.fspath(directory)
+
+    @staticmethod
+    def key(source: bytes, optimize: int = 0) -> bytes:
+        """Key of the entry for `source`, a UTF-8 encoded program, compiled at optimization level `optimize`."""
+        return hashlib.sha256(f"{__version__}\0{optimize}\0".encode() + source).digest()
+
+    def load(self, key: bytes) -> Optional[Program]:
+        """The cached program for `key`, or `None` if there is no usable entry."""
+        try:
+            program = serialize.load(self.__entry(key))
+        except Exception:  # A missing, truncated or foreign entry is a miss.
+            return None
+        return program if isinstance(program, Program) else None
+
+    def store(self, key: bytes, program: Program) -> None:
+        self.__write(self.__entry(key), serialize.dumps(program))
+
+    def stamped_key(self, path: str | os.PathLike[str], stat: os.stat_result, optimize: int = 0) -> Optional[bytes]:
+        """Entry key stamped for the script at `path`, if it still has the modification time and size of `stat`."""
+        try:
+            with open(self.__stamp(path, optimize), "rb") as f:
+                mtime, size, key = _STAMP.unpack(f.read())
+        except (OSError, struct.error):
+            return None
+        return key if (mtime, size) == (stat.st_mtime_ns, stat.st_size) else None
+
+    def stamp(self, path: str | os.PathLike[str], stat: os.stat_result, key: bytes, optimize: int = 0) -> None:
+        self.__write(self.__stamp(path, optimize), _STAMP.pack(stat.st_mtime_ns, stat.st_size, key))
+
+    def __entry(self, key: bytes) -> str:
+        return os.path.join(self.directory, key.hex() + ".ast")
+
+    def __stamp(self, path: str | os.PathLike[str], optimize: int) -> str:
+        name = hashlib.sha256(os.fsencode(os.path.abspath(path)) + b"\0%d" % optimize).hexdigest()
+        return os.path.join(self.directory, name + ".stamp")
+
+    def __write(self, path: str, data: bytes) -> None:
+        """Write through a temporary file, so readers never see a partial file."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,86 @@
+"""
+Process-wide cache of compiled programs, keyed by their source text and optimization level.
+
+Embedders that evaluate the same snippets over and over get the already-parsed `Program`
+back instead of running the front end again. The cache holds at most `maxsize` programs
+and evicts the least recently used one.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple, Optional, Tuple
+
+from pylox.ast.statement import Program
+
+DEFAULT_MAXSIZE = 1024
+
+# Programs compiled without optimization are keyed by their text alone.
+Key = str | Tuple[str, int]
+
+
+def _key(text: str, optimize: int) -> Key:
+    return (text, optimize) if optimize else text
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class MemoryCache:
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "__programs", "__lock")
+
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self.__programs: OrderedDict[Key, Program] = OrderedDict()
+        self.__lock = Lock()
+
+    def get(self, text: str, optimize: int = 0) -> Optional[Program]:
+        key = _key(text, optimize)
+        with self.__lock:
+            program = self.__programs.get(key)
+            if program is None:
+                self.misses += 1
+                return None
+            self.__programs.move_to_end(key)
+            self.hits += 1
+            return program
+
+    def put(self, text: str, program: Program, optimize: int = 0) -> None:
+        key = _key(text, optimize)
+        with self.__lock:
+            self.__programs[key] = program
+            self.__programs.move_to_end(key)
+            while len(self.__programs) > self.maxsize:
+                self.__programs.popitem(last=False)
+                self.evictions += 1
+
+    def info(self) -> CacheInfo:
+        with self.__lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self.__programs), self.maxsize)
+
+    def clear(self) -> None:
+        """Drop every program and reset the counters."""
+        with self.__lock:
+            self.__programs.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__programs)
+
+    def __contains__(self, key: object) -> bool:
+        """Whether the program for a text, or for a `(text, optimize)` pair at a nonzero level, is cached."""
+        return key in self.__programs
+
+
+COMPILE_CACHE = MemoryCache()
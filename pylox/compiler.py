@@ -0,0 +1,117 @@
+"""
+Front end of the interpreter: source text to `Program`, optionally through a `DiskCache`.
+
+Programs are optimized by the passes of `pylox.passes` enabled at the requested level:
+
+    0   none
+    1   constant folding
+    2   and dead-branch elimination
+    3   and numeric specialization
+
+and resolved, so that their local variables are addressed by slot. Numeric specialization relies on
+those addresses, so it runs after resolution.
+"""
+import os
+from typing import Iterable, Optional, TypeAlias, TypeVar
+
+from rusty_utils import Catch, Result
+
+from pylox.ast.statement import Program
+from pylox.cache.disk import DiskCache
+from pylox.cache.memory import MemoryCache, COMPILE_CACHE
+from pylox.lexer.error import LexicalError
+from pylox.lexer.lexer import tokenize
+from pylox.lexer.lines import LineIndex
+from pylox.lexer.symbols import SymbolTable
+from pylox.parser.error import ParseError
+from pylox.parser.parser import parse
+from pylox.passes.constant_fold import fold_constants
+from pylox.passes.dead_code import eliminate_dead_code
+from pylox.passes.error import ResolveError
+from pylox.passes.numeric import specialize
+from pylox.passes.resolver import resolve, check_globals
+
+_T = TypeVar('_T', covariant=True)
+CompileResult: TypeAlias = Result[_T, LexicalError | ParseError | ResolveError]
+
+
+def optimize(program: Program, level: int) -> Program:
+    """Run the passes enabled at optimization `level` that come before resolution over `program`."""
+    if level >= 1:
+        program = fold_constants(program)
+    if level >= 2:
+        program, _ = eliminate_dead_code(program)
+    return program
+
+
+def _compile(text: str, level: int) -> Program:
+    tokens = tokenize(text, engine="regex", symbols=SymbolTable()).unwrap_or_raise()
+    program: Program = parse(tokens, LineIndex(text)).unwrap_or_raise()
+    program = resolve(optimize(program, level))
+    return specialize(program) if level >= 3 else program
+
+
+@Catch(LexicalError, ParseError, ResolveError)  # type: ignore
+def compile_source(text: str,
+                   cache: Optional[DiskCache] = None,
+                   memory: Optional[MemoryCache] = COMPILE_CACHE,
+                   optimize: int = 0,
+                   known: Optional[Iterable[str]] = None) -> Program:
+    """Tokenize, parse, optimize and resolve `text`, or take its tree from `memory` or `cache`.
+
+    If the globals `known` to exist are given, undeclared names are reported as a `ResolveError`. Cached
+    trees do not depend on `known`, so they are checked against it on every call, whether or not they were
+    in a cache.
+
+    By default programs are shared through the process-wide `COMPILE_CACHE`, so they must not be mutated.
+    """
+    program = None if memory is None else memory.get(text, optimize)
+    if program is None:
+        if cache is None:
+            program = _compile(text, optimize)
+        else:
+            key = cache.key(text.encode(), optimize)
+            program = cache.load(key)
+            if program is None:
+                program = _compile(text, optimize)
+                cache.store(key, program)
+        if memory is not None:
+            memory.put(text, program, optimize)
+
+    return program if known is None else check_globals(program, known)
+
+
+@Catch(LexicalError, ParseError, ResolveError)  # type: ignore
+def compile_file(path: str | os.PathLike[str],
+                 cache: Optional[DiskCache] = None,
+                 optimize: int = 0,
+                 known: Optional[Iterable[str]] = None) -> Program:
+    """Tokenize, parse, optimize and resolve the UTF-8 script at `path`, or take its tree from `cache`.
+
+    A script whose modification time and size are unchanged since it was cached is not read at all. As in
+    `compile_source`, the globals `known` to exist are checked on every call.
+    """
+    program = _load_file(path, cache, optimize)
+    return program if known is None else check_globals(program, known)
+
+
+def _load_file(path: str | os.PathLike[str], cache: Optional[DiskCache], optimize: int) -> Program:
+    if cache is None:
+        with open(path, "rb") as f:
+            return _compile(f.read().decode("utf-8"), optimize)
+
+    stat = os.stat(path)
+    key = cache.stamped_key(path, stat, optimize)
+    program = None if key is None else cache.load(key)
+    if program is not None:
+        return program
+
+    with open(path, "rb") as f:
+        data = f.read()
+    key = cache.key(data, optimize)
+    program = cache.load(key)
+    if program is None:
+        program = _compile(data.decode("utf-8"), optimize)
+        cache.store(key, program)
+    cache.stamp(path, stat, key, optimize)
+    return program
@@ -1,5 +1,4 @@
-import random
-import string
+from itertools import count
 from typing import Optional
 
 from rusty_utils import Catch
@@ -7,11 +6,14 @@ from rusty_utils import Catch
 from pylox.interpreter.bulitin import Builtin
 from pylox.interpreter.error import LoxRuntimeError, ErrorKinds, LoxRuntimeResult
 
+# Numbers for the names of anonymous environments, taken only when one is shown.
+_ANONYMOUS = count(1)
+
 
 class Environment:
     outer: Optional["Environment"] = None
 
-    stack_name: str = ""
+    name: str = ""
     symbols: dict[str, object] = {}
 
     def __init__(self,
@@ -23,7 +25,13 @@ class Environment:
 
         self.outer = outer
         self.symbols = init_symbols
-        self.stack_name = name if name else "anonymous"
+        self.name = name
+
+    @property
+    def stack_name(self) -> str:
+        if not self.name:
+            self.name = f"anonymous_{next(_ANONYMOUS)}"
+        return self.name
 
     def define(self, name: str, value: object) -> None:
         self.symbols[name] = value
@@ -63,6 +71,70 @@ class Environment:
         return s
 
 
+class Frame:
+    """Local variables of one running block, addressed by the slots `pylox.passes.resolver` assigns."""
+
+    __slots__ = ("values", "outer")
+
+    values: list[object]
+    outer: Optional["Frame"]
+
+    def __init__(self, size: int, outer: Optional["Frame"] = None):
+        self.values = [None] * size
+        self.outer = outer
+
+    def ancestor(self, hops: int) -> "Frame":
+        frame = self
+        for _ in range(hops):
+            assert frame.outer is not None
+            frame = frame.outer
+        return frame
+
+    def __repr__(self) -> str:
+        return f"<Frame {self.values} outer={self.outer!r}>"
+
+
+class FramePool:
+    """Free lists of frames by size, so that a block run over and over reuses the same frame.
+
+    A frame is released when its block exits. Nothing can hold on to a frame past that, as Lox here has
+    no closures, so it is cleared and kept for the next block of the same size.
+    """
+
+    __slots__ = ("free", "blanks")
+
+    # At most this many frames of each size are kept.
+    MAX_FREE = 64
+
+    free: dict[int, list[Frame]]
+    blanks: dict[int, tuple[None, ...]]
+
+    def __init__(self) -> None:
+        self.free = {}
+        self.blanks = {}
+
+    def acquire(self, size: int, outer: Optional[Frame]) -> Frame:
+        """A frame of `size` empty slots inside `outer`."""
+        free = self.free.get(size)
+        if free:
+            frame = free.pop()
+            frame.outer = outer
+            return frame
+        return Frame(size, outer)
+
+    def release(self, frame: Frame) -> None:
+        """Take back `frame`, which must not be used afterwards."""
+        size = len(frame.values)
+        free = self.free.get(size)
+        if free is None:
+            free = self.free[size] = []
+            self.blanks[size] = (None,) * size
+        if len(free) < self.MAX_FREE:
+            frame.values[:] = self.blanks[size]
+            frame.outer = None
+            free.append(frame)
+
+
 class EnvGuard:
     env = Environment(None, Builtin, "global")
 
@@ -75,11 +147,17 @@ class EnvGuard:
     def define(self, name: str, value: object) -> None:
         return self.env.define(name, value)
 
+    def names(self) -> set[str]:
+        """Names defined in the current environment and the ones around it."""
+        names: set[str] = set()
+        env: Optional[Environment] = self.env
+        while env is not None:
+            names.update(env.symbols)
+            env = env.outer
+        return names
+
     def new_stack(self) -> None:
-        name = "anonymous_" + ''.join(random.choices(string.ascii_letters + string.digits, k=10))
-        new_env = Environment(self.env, {}, name)
-        self.env = new_env
-        pass
+        self.env = Environment(self.env, {})
 
     def quit_stack(self) -> None:
         if self.env.outer is None:
@@ -1,239 +1,234 @@
-from rusty_utils import Err, Ok, Catch, Option
+import sys
+from typing import Any, Optional
+
+from rusty_utils import Err, Ok, Catch
 
 from pylox.ast.expression import (
-    IExpr, Unary, UnaryOp, Literal, Grouping, Binary, BinaryOp, Identifier, LogicalOp, FuncCall,
+    IExpr, Unary, Literal, Grouping, Binary, Identifier, Logical, LogicalOp, FuncCall,
 )
-from pylox.ast.printer import format_ast
-from pylox.ast.statement import IStmt, ExprStmt, VarDecl, Assignment, Block, IfStmt, WhileStmt, Program
+from pylox.ast.printer import write_ast
+from pylox.ast.statement import IStmt, ExprStmt, VarDecl, Assignment, Block, IfStmt, WhileStmt, ForStmt, \
+    Program
+from pylox.ast.visitor import Visitor
 from pylox.interpreter.bulitin import LoxCallable
-from pylox.interpreter.environment import EnvGuard
+from pylox.interpreter.environment import EnvGuard, Frame, FramePool
 from pylox.interpreter.error import ErrorKinds, LoxRuntimeResult, LoxRuntimeError
+from pylox.interpreter.operators import NUMERIC, is_truthy, unary, binary
+from pylox.compiler import compile_source
 from pylox.lexer.lexer import tokenize
-from pylox.parser.parser import parse
 
 SYMBOLS = EnvGuard()
 
 
-############### Helper Functions ##############
-
-def floatify(value: object) -> LoxRuntimeResult[float]:
-    """Convert a value to float if possible, otherwise return an error."""
-    if not isinstance(value, (int, float, str)):
-        return Err(LoxRuntimeError(
-            ErrorKinds.VALUE_ERROR,
-            None,
-            f"Operand must be a number. Got: {value}",
-        ))
-
-    return Ok(float(value))
-
-
-def is_truthy(value: object) -> bool:
-    """Determine the truthiness of a value."""
-    if value is None:
-        return False
-    if isinstance(value, bool):
-        return value
-    return bool(value)
-
-
-def is_equal(left: object, right: object) -> bool:
-    """Check if two values are equal."""
-    if left is None and right is None:
-        return True
-    if left is None:
-        return False
-    return left == right
-
+############### Resolver ##############
+
+class Interpreter(Visitor[LoxRuntimeResult[Any]]):
+    """Evaluates expressions to their values and executes statements.
+
+    Globals, and every variable of a program that has not been through `pylox.passes.resolver`, live in
+    `SYMBOLS` by name. Resolved locals live in `frame` and the frames around it, which are taken from
+    and given back to `frames`.
+    """
+
+    __slots__ = ("frame", "frames")
+
+    frame: Optional[Frame]
+    frames: FramePool
+
+    def __init__(self) -> None:
+        self.frame = None
+        self.frames = FramePool()
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def missing(self, node: IStmt | IExpr) -> None:
+        """Raise an error for unrecognized nodes."""
+        raise LoxRuntimeError(ErrorKinds.UNRECOGNIZED_TOKEN, node, "")
+
+    # Expressions
+
+    def visit_literal(self, value: Literal) -> LoxRuntimeResult[object]:
+        """Resolve a literal expression."""
+        return Ok(value.value)
+
+    def visit_grouping(self, value: Grouping) -> LoxRuntimeResult[object]:
+        """Resolve a grouping expression."""
+        return self.visit(value.expression)
+
+    def visit_identifier(self, value: Identifier) -> LoxRuntimeResult[object]:
+        """Resolve an identifier expression."""
+        if value.hops < 0:
+            return SYMBOLS.get(value.name)
+        return Ok(self.frame.ancestor(value.hops).values[value.slot])  # type: ignore[union-attr]
+
+    def visit_unary(self, value: Unary) -> LoxRuntimeResult[object]:
+        """Resolve a unary expression."""
+        right = self.visit(value.right).unwrap_or_raise()
+        return unary(value.operator, right)
+
+    def visit_binary(self, value: Binary) -> LoxRuntimeResult[object]:
+        """Resolve a binary expression."""
+        if value.numeric:
+            return Ok(self.number(value))
+        left = self.visit(value.left).unwrap_or_raise()
+        right = self.visit(value.right).unwrap_or_raise()
+        return binary(value.operator, left, right)
+
+    def number(self, value: Any) -> Any:
+        """Evaluate an operand of a numeric binary expression, without wrapping it in a result."""
+        cls_ = type(value)
+        if cls_ is Binary and value.numeric:
+            return NUMERIC[value.operator](self.number(value.left), self.number(value.right))
+        if cls_ is Literal:
+            return value.value
+        if cls_ is Identifier and value.hops >= 0:
+            return self.frame.ancestor(value.hops).values[value.slot]  # type: ignore[union-attr]
+        return self.visit(value).unwrap_or_raise()
+
+    def visit_logical(self, value: Logical) -> LoxRuntimeResult[object]:
+        """Resolve a logical expression."""
+        left = self.visit(value.left).unwrap_or_raise()
+        logic_left = is_truthy(left)
+
+        match value.operator:
+            case LogicalOp.AND:
+                if not logic_left:
+                    return Ok(left)
+            case LogicalOp.OR:
+                if logic_left:
+                    return Ok(left)
+
+        return self.visit(value.right)
+
+    def visit_func_call(self, value: FuncCall) -> LoxRuntimeResult[object]:
+        """Resolve a function call expression."""
+        callee = self.visit(value.callee).unwrap_or_raise()
+        args = [self.visit(arg).unwrap_or_raise() for arg in value.args]
+
+        if not isinstance(callee, LoxCallable):
+            return Err(LoxRuntimeError(
+                ErrorKinds.TYPE_ERROR,
+                value,
+                f"Can only call functions and classes. Got: {callee}",
+            ))
+
+        if len(args) != callee.arity():
+            return Err(LoxRuntimeError(
+                ErrorKinds.RUNTIME_ERROR,
+                value,
+                f"Expected {callee.arity()} arguments but got {len(args)}",
+            ))
+
+        return callee.call(args)
+
+    # Statements
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_while_stmt(self, stat: WhileStmt) -> None:
+        """Resolve a while statement."""
+        while is_truthy(self.visit(stat.condition).unwrap_or_raise()):
+            self.visit(stat.body).unwrap_or_raise()
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_for_stmt(self, stat: ForStmt) -> None:
+        """Resolve a for statement, in one scope for the whole loop."""
+        if stat.slots < 0:
+            SYMBOLS.new_stack()
+            self.loop(stat)
+            SYMBOLS.quit_stack()
+            return
+
+        outer = self.frame
+        if not stat.slots:
+            self.loop(stat)
+            return
+
+        frame = self.frame = self.frames.acquire(stat.slots, outer)
+        try:
+            self.loop(stat)
+        finally:
+            self.frame = outer
+            self.frames.release(frame)
+
+    def loop(self, stat: ForStmt) -> None:
+        """Run the clauses and body of a `for` in the current scope."""
+        visit = self.visit
+        if stat.init is not None:
+            visit(stat.init).unwrap_or_raise()
+
+        condition, increment, body = stat.condition, stat.increment, stat.body
+        while condition is None or is_truthy(visit(condition).unwrap_or_raise()):
+            visit(body).unwrap_or_raise()
+            if increment is not None:
+                visit(increment).unwrap_or_raise()
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_if_stmt(self, stat: IfStmt) -> None:
+        """Resolve an if statement."""
+        condition = is_truthy(self.visit(stat.condition).unwrap_or_raise())
+        if condition:
+            self.visit(stat.then_branch).unwrap_or_raise()
+        elif stat.else_branch:
+            self.visit(stat.else_branch).unwrap_or_raise()
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_expr_stmt(self, stat: ExprStmt) -> None:
+        """Resolve an expression statement."""
+        self.visit(stat.expr).unwrap_or_raise()
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_var_decl(self, stat: VarDecl) -> None:
+        """Resolve a variable declaration."""
+        value = self.visit(stat.init).unwrap_or_raise() if stat.init else None
+        if stat.slot < 0:
+            SYMBOLS.define(stat.name, value)
+        else:
+            self.frame.values[stat.slot] = value  # type: ignore[union-attr]
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_assignment(self, stat: Assignment) -> None:
+        """Resolve an assignment statement."""
+        value = self.visit(stat.value).unwrap_or_raise()
+        if stat.hops < 0:
+            SYMBOLS.assign(stat.name, value)
+        else:
+            self.frame.ancestor(stat.hops).values[stat.slot] = value  # type: ignore[union-attr]
+
+    @Catch(LoxRuntimeError)  # type: ignore
+    def visit_block(self, stat: Block) -> None:
+        """Resolve a block statement."""
+        if stat.slots < 0:
+            SYMBOLS.new_stack()
+            for stmt in stat.statements:
+                self.visit(stmt).unwrap_or_raise()
+            SYMBOLS.quit_stack()
+            return
+
+        outer = self.frame
+        if not stat.slots:
+            for stmt in stat.statements:
+                self.visit(stmt).unwrap_or_raise()
+            return
+
+        frame = self.frame = self.frames.acquire(stat.slots, outer)
+        try:
+            for stmt in stat.statements:
+                self.visit(stmt).unwrap_or_raise()
+        finally:
+            self.frame = outer
+            self.frames.release(frame)
 
-@Catch(LoxRuntimeError)  # type: ignore
-def not_matched(obj: IStmt | IExpr) -> None:
-    """Raise an error for unrecognized tokens."""
-    raise LoxRuntimeError(ErrorKinds.UNRECOGNIZED_TOKEN, obj, "")
 
+INTERPRETER = Interpreter()
 
-############### Expression Resolver ##############
 
 def resolve_expression(expr: IExpr) -> LoxRuntimeResult[object]:
     """Resolve an expression based on its type."""
-    table = {
-        "Literal": resolve_literal,
-        "Grouping": resolve_grouping,
-        "Identifier": resolve_identifier,
-        "Unary": resolve_unary,
-        "Binary": resolve_binary,
-        "Logical": resolve_logical,
-        "FuncCall": resolve_func_call,
-    }
-
-    clazz = type(expr).__name__
-    resolver = Option(table.get(clazz)).unwrap_or(not_matched)
-    return resolver(expr)
-
-
-def resolve_literal(value: Literal) -> LoxRuntimeResult[object]:
-    """Resolve a literal expression."""
-    return Ok(value.value)
-
-
-def resolve_grouping(value: Grouping) -> LoxRuntimeResult[object]:
-    """Resolve a grouping expression."""
-    return resolve_expression(value.expression)
-
-
-def resolve_identifier(value: Identifier) -> LoxRuntimeResult[object]:
-    """Resolve an identifier expression."""
-    return SYMBOLS.get(value.name)
-
-
-def resolve_unary(value: Unary) -> LoxRuntimeResult[object]:
-    """Resolve a unary expression."""
-    right = resolve_expression(value.right)
-
-    match value.operator:
-        case UnaryOp.NEG:
-            return floatify(right).map(lambda f: -f)
-        case UnaryOp.NOT:
-            return Ok(not is_truthy(right))
-
-    return Err(LoxRuntimeError(ErrorKinds.UNREACHABLE, value, "@ resolve_unary"))
-
-
-def resolve_binary(value: Binary) -> LoxRuntimeResult[object]:
-    """Resolve a binary expression."""
-    left = resolve_expression(value.left).unwrap_or_raise()
-    right = resolve_expression(value.right).unwrap_or_raise()
-
-    match value.operator:
-        case BinaryOp.EQ:
-            return Ok(is_equal(left, right))
-        case BinaryOp.NE:
-            return Ok(not is_equal(left, right))
-
-    left = floatify(left).unwrap_or_raise()
-    right = floatify(right).unwrap_or_raise()
-
-    match value.operator:
-        case BinaryOp.ADD:
-            return Ok(left + right)
-        case BinaryOp.SUB:
-            return Ok(left - right)
-        case BinaryOp.MUL:
-            return Ok(left * right)
-        case BinaryOp.DIV:
-            return Ok(left / right)
-        case BinaryOp.LE:
-            return Ok(left <= right)
-        case BinaryOp.LS:
-            return Ok(left < right)
-        case BinaryOp.GE:
-            return Ok(left >= right)
-        case BinaryOp.GT:
-            return Ok(left > right)
-
-    return Err(LoxRuntimeError(ErrorKinds.UNREACHABLE, value, "@ resolve_binary"))
-
+    return INTERPRETER.visit(expr)
 
-def resolve_logical(value: Binary) -> LoxRuntimeResult[object]:
-    """Resolve a logical expression."""
-    left = resolve_expression(value.left).unwrap_or_raise()
-    logic_left = is_truthy(left)
-
-    match value.operator:
-        case LogicalOp.AND:
-            if not logic_left:
-                return Ok(left)
-        case LogicalOp.OR:
-            if logic_left:
-                return Ok(left)
-
-    return resolve_expression(value.right)
-
-
-def resolve_func_call(value: FuncCall) -> LoxRuntimeResult[object]:
-    """Resolve a function call expression."""
-    callee = resolve_expression(value.callee).unwrap_or_raise()
-    args = [resolve_expression(arg).unwrap_or_raise() for arg in value.args]
-
-    if not isinstance(callee, LoxCallable):
-        return Err(LoxRuntimeError(
-            ErrorKinds.TYPE_ERROR,
-            value,
-            f"Can only call functions and classes. Got: {callee}",
-        ))
-
-    if len(args) != callee.arity():
-        return Err(LoxRuntimeError(
-            ErrorKinds.RUNTIME_ERROR,
-            value,
-            f"Expected {callee.arity()} arguments but got {len(args)}",
-        ))
-
-    return callee.call(args)
-
-
-############### Statement Resolver ##############
 
 def resolve_statement(stat: IStmt) -> LoxRuntimeResult[None]:
     """Resolve a statement based on its type."""
-    table = {
-        "ExprStmt": resolve_expr_stmt,
-        "VarDecl": resolve_var_decl,
-        "Assignment": resolve_assignment,
-        "Block": resolve_block,
-        "IfStmt": resolve_if_stmt,
-        "WhileStmt": resolve_while_stmt,
-    }
-
-    clazz = type(stat).__name__
-    resolver = Option(table.get(clazz)).unwrap_or(not_matched)
-    return resolver(stat)
-
-
-@Catch(LoxRuntimeError)  # type: ignore
-def resolve_while_stmt(stat: WhileStmt) -> None:
-    """Resolve a while statement."""
-    while is_truthy(resolve_expression(stat.condition).unwrap_or_raise()):
-        resolve_statement(stat.body).unwrap_or_raise()
-
-
-@Catch(LoxRuntimeError)  # type: ignore
-def resolve_if_stmt(stat: IfStmt) -> None:
-    """Resolve an if statement."""
-    condition = is_truthy(resolve_expression(stat.condition).unwrap_or_raise())
-    if condition:
-        resolve_statement(stat.then_branch).unwrap_or_raise()
-    elif stat.else_branch:
-        resolve_statement(stat.else_branch).unwrap_or_raise()
-
-
-@Catch(LoxRuntimeError)  # type: ignore
-def resolve_expr_stmt(stat: ExprStmt) -> None:
-    """Resolve an expression statement."""
-    resolve_expression(stat.expr).unwrap_or_raise()
-
-
-@Catch(LoxRuntimeError)  # type: ignore
-def resolve_var_decl(stat: VarDecl) -> None:
-    """Resolve a variable declaration."""
-    value = resolve_expression(stat.init).unwrap_or_raise() if stat.init else None
-    SYMBOLS.define(stat.name, value)
-
-
-@Catch(LoxRuntimeError)  # type: ignore
-def resolve_assignment(stat: Assignment) -> None:
-    """Resolve an assignment statement."""
-    value = resolve_expression(stat.value).unwrap_or_raise()
-    SYMBOLS.assign(stat.name, value)
-
-
-@Catch(LoxRuntimeError)  # type: ignore
-def resolve_block(stat: Block) -> None:
-    """Resolve a block statement."""
-    SYMBOLS.new_stack()
-    for stmt in stat.statements:
-        resolve_statement(stmt).unwrap_or_raise()
-    SYMBOLS.quit_stack()
+    return INTERPRETER.visit(stat)
 
 
 ############### Interpreter ##############
@@ -241,7 +236,15 @@ def resolve_block(stat: Block) -> None:
 
 def interpret(program: Program) -> None:
     for stat in program.statements:
-        resolve_statement(stat).unwrap_or_raise()
+        INTERPRETER.visit(stat).unwrap_or_raise()
+
+
+def run(text: str, optimize: int = 3) -> None:
+    """Compile and interpret a program, reusing the tree of a source seen before.
+
+    Names that are neither defined in `SYMBOLS` nor declared by the program are reported before it runs.
+    """
+    interpret(compile_source(text, optimize=optimize, known=SYMBOLS.names()).unwrap_or_raise())
 
 
 # REPL
@@ -271,9 +274,9 @@ if __name__ == "__main__":
             for i, token in enumerate(tokens):
                 print(f"{i + 1}) {token}")
             print()
-            ast = parse(tokens).unwrap_or_raise()
+            ast = compile_source(text, known=SYMBOLS.names()).unwrap_or_raise()
             print("AST:")
-            print(format_ast(ast).unwrap_or_raise())
+            write_ast(ast, sys.stdout)
             print("=================================")
 
             interpret(ast)
@@ -0,0 +1,108 @@
+"""
+Semantics of the Lox operators on values, shared by the interpreter and the passes that
+evaluate constant expressions at compile time.
+"""
+from operator import le, lt, ge, gt
+from typing import Any, Callable
+
+from rusty_utils import Err, Ok
+
+from pylox.ast.expression import UnaryOp, BinaryOp
+from pylox.interpreter.error import ErrorKinds, LoxRuntimeResult, LoxRuntimeError
+
+
+def _add(x: Any, y: Any) -> float:
+    return float(x + y)
+
+
+def _sub(x: Any, y: Any) -> float:
+    return float(x - y)
+
+
+def _mul(x: Any, y: Any) -> float:
+    return float(x * y)
+
+
+def _div(x: Any, y: Any) -> float:
+    return x / y
+
+
+# `binary` on operands known to be numbers: floats, or ints that convert to floats exactly. The results
+# of these operators on such ints, rounded once, are those of the operators on the converted operands.
+NUMERIC: dict[BinaryOp, Callable[[Any, Any], Any]] = {
+    BinaryOp.ADD: _add, BinaryOp.SUB: _sub, BinaryOp.MUL: _mul, BinaryOp.DIV: _div,
+    BinaryOp.LE: le, BinaryOp.LS: lt, BinaryOp.GE: ge, BinaryOp.GT: gt,
+}
+
+
+def floatify(value: object) -> LoxRuntimeResult[float]:
+    """Convert a value to float if possible, otherwise return an error."""
+    if not isinstance(value, (int, float, str)):
+        return Err(LoxRuntimeError(
+            ErrorKinds.VALUE_ERROR,
+            None,
+            f"Operand must be a number. Got: {value}",
+        ))
+
+    return Ok(float(value))
+
+
+def is_truthy(value: object) -> bool:
+    """Determine the truthiness of a value."""
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    return bool(value)
+
+
+def is_equal(left: object, right: object) -> bool:
+    """Check if two values are equal."""
+    if left is None and right is None:
+        return True
+    if left is None:
+        return False
+    return left == right
+
+
+def unary(operator: UnaryOp, right: object) -> LoxRuntimeResult[object]:
+    """Apply a unary operator to a value."""
+    match operator:
+        case UnaryOp.NEG:
+            return floatify(right).map(lambda f: -f)
+        case UnaryOp.NOT:
+            return Ok(not is_truthy(right))
+
+    return Err(LoxRuntimeError(ErrorKinds.UNREACHABLE, None, "@ unary"))
+
+
+def binary(operator: BinaryOp, left: object, right: object) -> LoxRuntimeResult[object]:
+    """Apply a binary operator to two values."""
+    match operator:
+        case BinaryOp.EQ:
+            return Ok(is_equal(left, right))
+        case BinaryOp.NE:
+            return Ok(not is_equal(left, right))
+
+    x = floatify(left).unwrap_or_raise()
+    y = floatify(right).unwrap_or_raise()
+
+    match operator:
+        case BinaryOp.ADD:
+            return Ok(x + y)
+        case BinaryOp.SUB:
+            return Ok(x - y)
+        case BinaryOp.MUL:
+            return Ok(x * y)
+        case BinaryOp.DIV:
+            return Ok(x / y)
+        case BinaryOp.LE:
+            return Ok(x <= y)
+        case BinaryOp.LS:
+            return Ok(x < y)
+        case BinaryOp.GE:
+            return Ok(x >= y)
+        case BinaryOp.GT:
+            return Ok(x > y)
+
+    return Err(LoxRuntimeError(ErrorKinds.UNREACHABLE, None, "@ binary"))
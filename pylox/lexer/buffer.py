@@ -0,0 +1,201 @@
+import mmap
+from array import array
+from typing import Iterable, Iterator, List, Tuple, overload, TypeAlias
+
+from pylox.lexer.tokens import KEYWORDS, TokenType, Token
+
+TOKEN_TYPES: List[TokenType] = list(TokenType)
+TYPE_IDS: dict[TokenType, int] = {tt: i for i, tt in enumerate(TOKEN_TYPES)}
+
+# Keywords and punctuation always carry their own lexeme, so only the remaining
+# values need a slot in the literal side table.
+_DEFAULT_VALUES: dict[TokenType, object] = {
+    **{tt: tt.value for tt in TokenType if not tt.value.isalpha()},
+    **{tt: lexeme for lexeme, tt in KEYWORDS.items()},
+}
+
+NO_LITERAL = -1
+UNDECODED = -2
+
+
+class TokenBuffer:
+    """Struct-of-arrays token storage.
+
+    Token types, spans, line numbers and symbols live in `array.array` columns and values
+    that can't be derived from the token type live in the `literals` side table. The
+    `*_at` methods read one field of a token; indexing the buffer materializes a whole
+    `Token` on demand.
+    """
+
+    __slots__ = ("types", "starts", "ends", "lines", "symbols", "literal_refs", "literals")
+
+    types: "array[int]"
+    starts: "array[int]"
+    ends: "array[int]"
+    lines: "array[int]"
+    symbols: "array[int]"
+    literal_refs: "array[int]"
+    literals: List[object]
+
+    def __init__(self) -> None:
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.symbols = array('i')
+        self.literal_refs = array('i')
+        self.literals = []
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Token]) -> "TokenBuffer":
+        buffer = cls()
+        buffer.extend(tokens)
+        return buffer
+
+    def append(self, token: Token) -> None:
+        self.types.append(TYPE_IDS[token.type])
+        self.starts.append(token.span[0])
+        self.ends.append(token.span[1])
+        self.lines.append(token.lineno)
+        self.symbols.append(token.symbol)
+
+        default = _DEFAULT_VALUES.get(token.type, _DEFAULT_VALUES)
+        if token.value == default and type(token.value) is type(default):
+            self.literal_refs.append(NO_LITERAL)
+        else:
+            self.literal_refs.append(len(self.literals))
+            self.literals.append(token.value)
+
+    def extend(self, tokens: Iterable[Token]) -> None:
+        for token in tokens:
+            self.append(token)
+
+    def splice(self, start: int, stop: int, tokens: Iterable[Token], offset: int, lines: int) -> "TokenBuffer":
+        """Return a copy with `self[start:stop]` replaced by `tokens` and the spans and line numbers
+        of `self[stop:]` shifted by `offset` and `lines`."""
+        buffer = TokenBuffer()
+        buffer.types = self.types[:start]
+        buffer.starts = self.starts[:start]
+        buffer.ends = self.ends[:start]
+        buffer.lines = self.lines[:start]
+        buffer.symbols = self.symbols[:start]
+        buffer.literal_refs = self.literal_refs[:start]
+        buffer.literals = self.literals[:self.__first_literal(start)]
+
+        buffer.extend(tokens)
+
+        tail_literal = self.__first_literal(stop)
+        shift = len(buffer.literals) - tail_literal
+        buffer.types.extend(self.types[stop:])
+        buffer.starts.extend(array('I', [i + offset for i in self.starts[stop:]]))
+        buffer.ends.extend(array('I', [i + offset for i in self.ends[stop:]]))
+        buffer.lines.extend(array('I', [i + lines for i in self.lines[stop:]]))
+        buffer.symbols.extend(self.symbols[stop:])
+        buffer.literal_refs.extend(array('i', [
+            ref + shift if ref >= 0 else ref for ref in self.literal_refs[stop:]
+        ]))
+        buffer.literals.extend(self.literals[tail_literal:])
+        return buffer
+
+    def __first_literal(self, index: int) -> int:
+        """Index into `literals` of the first side table entry used at or after token `index`."""
+        refs = self.literal_refs
+        for i in range(index, len(refs)):
+            if refs[i] >= 0:
+                return refs[i]
+        return len(self.literals)
+
+    def type_at(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def value_at(self, index: int) -> object:
+        ref = self.literal_refs[index]
+        if ref == NO_LITERAL:
+            return _DEFAULT_VALUES[TOKEN_TYPES[self.types[index]]]
+        return self.literals[ref]
+
+    def span_at(self, index: int) -> Tuple[int, int]:
+        return self.starts[index], self.ends[index]
+
+    def symbol_at(self, index: int) -> int:
+        return self.symbols[index]
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    @overload
+    def __getitem__(self, index: int) -> Token:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Token]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> Token | List[Token]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        return Token(
+            type=self.type_at(index),
+            value=self.value_at(index),
+            lineno=self.lines[index],
+            span=(self.starts[index], self.ends[index]),
+            symbol=self.symbols[index],
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TokenBuffer):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<TokenBuffer of {len(self)} tokens>"
+
+
+ByteSource: TypeAlias = bytes | bytearray | memoryview | mmap.mmap
+
+
+class ByteTokenBuffer(TokenBuffer):
+    """`TokenBuffer` over UTF-8 encoded source bytes, with spans in byte offsets.
+
+    Identifier, number and string values are only decoded from the source when first
+    accessed, and then cached in the side table.
+    """
+
+    __slots__ = ("data",)
+
+    data: ByteSource
+
+    def __init__(self, data: ByteSource) -> None:
+        super().__init__()
+        self.data = data
+
+    def splice(self, start: int, stop: int, tokens: Iterable[Token], offset: int, lines: int) -> "TokenBuffer":
+        """Not supported: the spans are byte offsets, while spliced tokens and offsets are in characters."""
+        raise TypeError("ByteTokenBuffer spans are byte offsets and can't be spliced with text tokens")
+
+    def value_at(self, index: int) -> object:
+        if self.literal_refs[index] == UNDECODED:
+            self.literal_refs[index] = len(self.literals)
+            self.literals.append(self.__decode(index))
+        return super().value_at(index)
+
+    def __decode(self, index: int) -> object:
+        tt = TOKEN_TYPES[self.types[index]]
+        start, end = self.starts[index], self.ends[index]
+
+        if tt == TokenType.STRING:
+            return str(bytes(self.data[start + 1:end]), "utf-8")
+
+        raw = bytes(self.data[start:end])
+        if tt == TokenType.NUMBER:
+            return float(raw) if b'.' in raw else int(raw)
+        return str(raw, "utf-8")
@@ -0,0 +1,127 @@
+import re
+from typing import Tuple
+
+from rusty_utils import Err, Ok
+
+from pylox.lexer.buffer import TYPE_IDS, ByteSource, ByteTokenBuffer, UNDECODED, NO_LITERAL
+from pylox.lexer.error import LexerResult, ErrorKinds, LexicalError
+from pylox.lexer.tokens import KEYWORDS, TokenType
+
+_SPACE = rb" \t\r\f\v\x1c-\x1f"
+_WORD = rb"\w\x80-\xff"
+
+BYTES_TOKEN_PATTERN = re.compile(rb"""
+    (?P<NEWLINE>\n)
+  | (?P<WHITESPACE>[""" + _SPACE + rb"""]+)
+  | (?P<COMMENT>//[^\n]*)
+  | (?P<BLOCK_COMMENT>/\*[\s\S]*?\*/)
+  | (?P<UNTERMINATED_COMMENT>/\*)
+  | (?P<WORD>[A-Za-z_\x80-\xff][""" + _WORD + rb"""]*)
+  | (?P<NUMBER>[0-9]+(?P<FRACTION>\.[0-9]*)?)
+  | (?P<PUNCTUATION>[!=<>]=?|[(){},.;+\-*/])
+  | (?P<STRING>"[^"\n]*")
+  | (?P<MULTILINE_STRING>"[^"]*")
+  | (?P<UNTERMINATED>")
+  | (?P<IDENTIFIER>[^""" + _SPACE + rb"""\n][""" + _WORD + rb"""]*)
+""", re.VERBOSE)
+
+_KEYWORD_IDS: dict[bytes, int] = {lexeme.encode(): TYPE_IDS[tt] for lexeme, tt in KEYWORDS.items()}
+# Punctuation is identified by its first byte and its length, without slicing it out.
+_PUNCTUATION_IDS: dict[int, int] = {
+    ord(tt.value): TYPE_IDS[tt] for tt in TokenType if not tt.value.isalpha() and len(tt.value) == 1
+}
+_PUNCTUATION_EQUAL_IDS: dict[int, int] = {
+    ord(tt.value[0]): TYPE_IDS[tt] for tt in TokenType if not tt.value.isalpha() and len(tt.value) == 2
+}
+_STRING_ID = TYPE_IDS[TokenType.STRING]
+_NUMBER_ID = TYPE_IDS[TokenType.NUMBER]
+_IDENTIFIER_ID = TYPE_IDS[TokenType.IDENTIFIER]
+_DOT = ord('.')
+_UNTERMINATED: dict[str, ErrorKinds] = {
+    "UNTERMINATED": ErrorKinds.UNTERMINATED_STRING_LITERAL,
+    "UNTERMINATED_COMMENT": ErrorKinds.UNTERMINATED_COMMENT,
+}
+
+
+def tokenize_bytes(data: ByteSource) -> LexerResult[ByteTokenBuffer]:
+    """Tokenize UTF-8 encoded source without decoding it, e.g. straight from an mmap.
+
+    Only ASCII whitespace separates tokens and spans are byte offsets. Identifier, number
+    and string values are decoded on first access through the returned buffer.
+    """
+    buffer = ByteTokenBuffer(data)
+    types, starts, ends, lines, symbols, refs = (
+        buffer.types, buffer.starts, buffer.ends, buffer.lines, buffer.symbols, buffer.literal_refs
+    )
+    match_at = BYTES_TOKEN_PATTERN.match
+    keyword_ids = _KEYWORD_IDS
+    position, end = 0, len(data)
+    line, line_start = 1, 0
+
+    while position < end:
+        m = match_at(data, position)
+        if m is None:  # pragma: no cover - the IDENTIFIER branch accepts any non-space
+            return Err(_error(ErrorKinds.UNEXPECTED_CHARACTER, position, line, line_start))
+
+        kind = m.lastgroup
+        start, position = m.span()
+
+        if kind == "NEWLINE":
+            line += 1
+            line_start = position
+            continue
+        if kind == "WHITESPACE" or kind == "COMMENT":
+            continue
+        if kind == "BLOCK_COMMENT":
+            line, line_start = _count_lines(m.group(), start, line, line_start)
+            continue
+
+        if kind == "WORD":
+            keyword_id = keyword_ids.get(bytes(data[start:position]))
+            if keyword_id is None:
+                type_id, stop, ref = _IDENTIFIER_ID, position, UNDECODED
+            else:
+                type_id, stop, ref = keyword_id, position, NO_LITERAL
+
+        elif kind == "PUNCTUATION":
+            ids = _PUNCTUATION_EQUAL_IDS if position - start == 2 else _PUNCTUATION_IDS
+            type_id, stop, ref = ids[data[start]], position, NO_LITERAL
+
+        elif kind == "STRING" or kind == "MULTILINE_STRING":
+            if kind == "MULTILINE_STRING":
+                line, line_start = _count_lines(m.group(), start, line, line_start)
+            # The span stops before the closing quote.
+            type_id, stop, ref = _STRING_ID, position - 1, UNDECODED
+
+        elif kind == "UNTERMINATED" or kind == "UNTERMINATED_COMMENT":
+            line, line_start = _count_lines(bytes(data[start:]), start, line, line_start)
+            return Err(_error(_UNTERMINATED[kind], end, line, line_start))
+
+        elif kind == "NUMBER":
+            if m.start("FRACTION") != -1 and position < end and data[position] == _DOT:
+                return Err(_error(ErrorKinds.MALFORMED_NUMBER, position, line, line_start))
+            type_id, stop, ref = _NUMBER_ID, position, UNDECODED
+
+        else:  # IDENTIFIER
+            type_id, stop, ref = _IDENTIFIER_ID, position, UNDECODED
+
+        types.append(type_id)
+        starts.append(start)
+        ends.append(stop)
+        lines.append(line)
+        symbols.append(-1)
+        refs.append(ref)
+
+    return Ok(buffer)
+
+
+def _count_lines(lexeme: bytes, start: int, line: int, line_start: int) -> Tuple[int, int]:
+    """Line number and line start after `lexeme`, which starts at offset `start`."""
+    newline = lexeme.rfind(b'\n')
+    if newline == -1:
+        return line, line_start
+    return line + lexeme.count(b'\n'), start + newline + 1
+
+
+def _error(kind: ErrorKinds, position: int, line: int, line_start: int) -> LexicalError:
+    return LexicalError(kind, position=(line, position - line_start + 1))
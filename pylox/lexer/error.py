@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import TypeVar, Optional
+from typing import TypeVar, Optional, Tuple
 
 from rusty_utils import Result
 
@@ -9,10 +9,12 @@ class ErrorKinds(Enum):
     UNEXPECTED_CHARACTER = "Unexpected character"
     UNTERMINATED_STRING_LITERAL = "Unterminated string literal"
     UNTERMINATED_CHAR_LITERAL = "Unterminated char literal"
+    UNTERMINATED_COMMENT = "Unterminated block comment"
     EMPTY_CHAR_DECLARATION = "Empty character declaration"
     INVALID_ESCAPE_SEQUENCE = "Invalid escape sequence"
     MALFORMED_NUMBER = "Invalid number literal"
     HOW_DID_YOU_GET_HERE = "How you supposed to get here???"
+    BYTE_SPANS = "Tokens spanning byte offsets can't be relexed from text"
     NOP = "No operation"
     EOF = "Reached end of file"
 
@@ -24,14 +26,27 @@ class LexicalError(Exception):
     char: str
     kind: ErrorKinds
 
-    def __init__(self, kind: ErrorKinds, source: Optional[Source] = None, char: str = ''):
+    def __init__(self,
+                 kind: ErrorKinds,
+                 source: Optional[Source] = None,
+                 char: str = '',
+                 position: Optional[Tuple[int, int]] = None):
         super().__init__()
         self.kind = kind
         self.source = source
         self.char = char
+        self.__position = position
+
+    @property
+    def position(self) -> Optional[Tuple[int, int]]:
+        """Line and column of the error, looked up in the source only when asked for."""
+        if self.__position is None and self.source is not None:
+            self.__position = self.source.position()
+        return self.__position
 
     def __str__(self) -> str:
-        return f"{self.kind.value} @ {self.source.current if self.source else 'unknown source'}"
+        position = self.position
+        return f"{self.kind.value} @ {f'{position[0]}:{position[1]}' if position else 'unknown source'}"
 
 
 _T = TypeVar('_T', covariant=True)
@@ -0,0 +1,99 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, TypeVar
+
+from rusty_utils import Err, Ok
+
+from pylox.lexer.buffer import TokenBuffer, ByteTokenBuffer
+from pylox.lexer.error import ErrorKinds, LexerResult, LexicalError
+from pylox.lexer.regex_lexer import iter_tokens
+from pylox.lexer.symbols import SymbolTable
+from pylox.lexer.tokens import Token
+
+
+@dataclass(frozen=True)
+class Edit:
+    """Replacement of `deleted` characters at `offset` with `inserted`."""
+    offset: int
+    deleted: int
+    inserted: str
+
+    @property
+    def delta(self) -> int:
+        return len(self.inserted) - self.deleted
+
+    def apply(self, text: str) -> str:
+        return text[:self.offset] + self.inserted + text[self.offset + self.deleted:]
+
+
+class _SpanColumn(Sequence[int]):
+    """Read-only view of one end of the token spans, for bisecting a token list."""
+
+    def __init__(self, tokens: List[Token], end: int) -> None:
+        self.__tokens = tokens
+        self.__end = end
+
+    def __len__(self) -> int:
+        return len(self.__tokens)
+
+    def __getitem__(self, index: int) -> int:  # type: ignore[override]
+        return self.__tokens[index].span[self.__end]
+
+
+_Tokens = TypeVar('_Tokens', List[Token], TokenBuffer)
+
+
+def relex(tokens: _Tokens, text: str, edit: Edit, symbols: Optional[SymbolTable] = None) -> LexerResult[_Tokens]:
+    """Update the tokens of a source after `edit`, where `text` is the source after the edit.
+
+    Scanning restarts at the last token that ends before the edit and stops as soon as a
+    new token starts where an old one did past the edited range. From there on the old
+    tokens are reused, shifted by the size of the edit.
+
+    The spans of a `ByteTokenBuffer` are byte offsets, which an edit of the text does not map to,
+    so those are rejected with an error.
+    """
+    if isinstance(tokens, ByteTokenBuffer):
+        return Err(LexicalError(ErrorKinds.BYTE_SPANS))
+
+    if isinstance(tokens, TokenBuffer):
+        starts: Sequence[int] = tokens.starts
+        ends: Sequence[int] = tokens.ends
+    else:
+        starts = _SpanColumn(tokens, 0)
+        ends = _SpanColumn(tokens, 1)
+
+    # Tokens ending right at the offset are re-scanned: the edit may extend them.
+    head = bisect_left(ends, edit.offset) - 1
+    if head >= 0:
+        position = starts[head]
+        line = tokens[head].lineno - text.count('\n', position, ends[head])
+    else:
+        head, position, line = 0, 0, 1
+
+    edit_end = edit.offset + len(edit.inserted)
+    delta = edit.delta
+    tail, lines = len(tokens), 0
+    fresh: List[Token] = []
+
+    try:
+        for token in iter_tokens(text, position, line, symbols):
+            start = token.span[0]
+            if start >= edit_end:
+                old = bisect_left(starts, start - delta, head)
+                if old < len(tokens) and starts[old] == start - delta:
+                    tail, lines = old, token.lineno - tokens[old].lineno
+                    break
+            fresh.append(token)
+    except LexicalError as err:
+        return Err(err)
+
+    if isinstance(tokens, TokenBuffer):
+        return Ok(tokens.splice(head, tail, fresh, delta, lines))
+
+    shifted = [
+        Token(t.type, t.value, t.lineno + lines, (t.span[0] + delta, t.span[1] + delta), t.symbol)
+        for t in tokens[tail:]
+    ]
+    return Ok(tokens[:head] + fresh + shifted)
+
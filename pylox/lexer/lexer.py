@@ -1,9 +1,15 @@
-from typing import List, Dict
+import codecs
+import mmap
+import os
+from functools import partial
+from typing import List, Dict, Literal, Iterator, TextIO, TypeAlias, Callable, Optional
 
 from rusty_utils import Option, Err, Ok
 
 from pylox.lexer.error import LexerResult, ErrorKinds, LexicalError
+from pylox.lexer.regex_lexer import tokenize_regex, iter_chunked_tokens, TRIVIA_PATTERN
 from pylox.lexer.source import Source
+from pylox.lexer.symbols import SymbolTable
 from pylox.lexer.tokens import KEYWORDS, TokenType, Token
 
 
@@ -78,6 +84,20 @@ def __parse_punctuation(
         return Ok(__new_token(source, default_type, base))
 
 
+def __skip_comment(source: Source) -> LexerResult[Token]:
+    if source.advance().unwrap() == '/':
+        while source.peek().is_some_and(lambda c: c != '\n'):
+            source.consume()
+        return Err(LexicalError(ErrorKinds.NOP, source=source))
+
+    while source.has_next():
+        if source.advance().unwrap() == '*' and source.peek().is_some_and(lambda c: c == '/'):
+            source.consume()
+            return Err(LexicalError(ErrorKinds.NOP, source=source))
+
+    return Err(LexicalError(ErrorKinds.UNTERMINATED_COMMENT, source=source))
+
+
 def scan_token(source: Source) -> LexerResult[Token]:
     ch = source.advance()
 
@@ -86,6 +106,9 @@ def scan_token(source: Source) -> LexerResult[Token]:
     if ch.isspace():
         return Err(LexicalError(ErrorKinds.NOP, source=source))
 
+    if ch == '/' and source.peek().is_some_and(lambda c: c in '/*'):
+        return __skip_comment(source)
+
     if ch.isdigit():
         return __try_parse_number(source)
 
@@ -140,16 +163,36 @@ def scan_token(source: Source) -> LexerResult[Token]:
     return Ok(__new_token(source, token_type, lexeme))
 
 
-def tokenize(input_: str) -> LexerResult[List[Token]]:
+LexerEngine = Literal["scan", "regex"]
+
+
+def tokenize(input_: str,
+             engine: LexerEngine = "scan",
+             symbols: Optional[SymbolTable] = None) -> LexerResult[List[Token]]:
+    """Tokenize a program. Given a `SymbolTable`, identifiers and strings are interned in it."""
+    if engine == "regex":
+        return tokenize_regex(input_, symbols)
+    if engine != "scan":
+        raise ValueError(f"Unknown lexer engine: {engine}")
+
     source: Source = Source(input_)
     tokens: List[Token] = []
 
     while source.has_next():
+        # Whole runs of whitespace and comments are skipped here, so that `scan_token`
+        # only has to deal with them for an unterminated block comment.
+        source.skip(TRIVIA_PATTERN)
+        if not source.has_next():
+            break
+
         source.reset()
         new_token = scan_token(source)
 
         match new_token:
             case Ok(tok):
+                if symbols is not None and tok.type in (TokenType.IDENTIFIER, TokenType.STRING):
+                    tok.symbol = symbols.intern(str(tok.value))
+                    tok.value = symbols[tok.symbol]
                 tokens.append(tok)
             case Err(LexicalError(kind=ErrorKinds.NOP)):
                 continue
@@ -157,3 +200,43 @@ def tokenize(input_: str) -> LexerResult[List[Token]]:
                 return Err(err)
 
     return Ok(tokens)
+
+
+TokenStream: TypeAlias = TextIO | str | os.PathLike[str] | mmap.mmap
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def tokenize_iter(stream: TokenStream,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  symbols: Optional[SymbolTable] = None) -> Iterator[Token]:
+    """Lazily tokenize a text file object, a path to a UTF-8 file or an mmap of one.
+
+    The input is read `chunk_size` characters (bytes for an mmap) at a time, so memory stays
+    bounded by the chunk size and the longest token. Lexical errors are raised as `LexicalError`.
+    """
+    if isinstance(stream, mmap.mmap):
+        yield from iter_chunked_tokens(__mmap_reader(stream, chunk_size), symbols)
+    elif isinstance(stream, (str, os.PathLike)):
+        # Line endings are kept as they are, so that spans are offsets into the file as for an mmap.
+        with open(stream, "r", encoding="utf-8", newline="") as f:
+            yield from iter_chunked_tokens(partial(f.read, chunk_size), symbols)
+    else:
+        yield from iter_chunked_tokens(partial(stream.read, chunk_size), symbols)
+
+
+def __mmap_reader(buffer: mmap.mmap, chunk_size: int) -> Callable[[], str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    position = 0
+
+    def read() -> str:
+        nonlocal position
+        while True:
+            data = buffer[position:position + chunk_size]
+            position += len(data)
+            text: str = decoder.decode(data, final=not data)
+            # A chunk may end inside a multibyte character and decode to nothing yet.
+            if text or not data:
+                return text
+
+    return read
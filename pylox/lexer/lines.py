@@ -0,0 +1,31 @@
+from array import array
+from bisect import bisect_right
+from typing import Tuple
+
+
+class LineIndex:
+    """Offsets of the line starts of a source, for turning offsets into line and column numbers."""
+
+    __slots__ = ("starts",)
+
+    starts: "array[int]"
+
+    def __init__(self, text: str) -> None:
+        self.starts = array('I', [0])
+        find = text.find
+        newline = find('\n')
+        while newline != -1:
+            self.starts.append(newline + 1)
+            newline = find('\n', newline + 1)
+
+    def line_of(self, offset: int) -> int:
+        """1-based line of the character at `offset`."""
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """1-based line and column of the character at `offset`."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def __len__(self) -> int:
+        return len(self.starts)
@@ -0,0 +1,156 @@
+import re
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from rusty_utils import Err, Ok
+
+from pylox.lexer.error import LexerResult, ErrorKinds, LexicalError
+from pylox.lexer.source import Source
+from pylox.lexer.symbols import SymbolTable
+from pylox.lexer.tokens import KEYWORDS, TokenType, Token
+
+# A whole run of whitespace and comments.
+TRIVIA = r"(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)+"
+TRIVIA_PATTERN = re.compile(TRIVIA)
+
+# One alternation for the whole token grammar. The order of the branches
+# mirrors the order of the checks in `scan_token`, so the fallback branch
+# only ever sees what the character scanner would treat as an identifier.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<TRIVIA>""" + TRIVIA + r""")
+  | (?P<UNTERMINATED_COMMENT>/\*)
+  | (?P<NUMBER>\d+(?P<FRACTION>\.\d*)?)
+  | (?P<STRING>"[^"]*")
+  | (?P<UNTERMINATED>")
+  | (?P<PUNCTUATION>[!=<>]=?|[(){},.;+\-*/])
+  | (?P<IDENTIFIER>\S\w*)
+""", re.VERBOSE)
+
+_UNTERMINATED: dict[Optional[str], ErrorKinds] = {
+    "UNTERMINATED": ErrorKinds.UNTERMINATED_STRING_LITERAL,
+    "UNTERMINATED_COMMENT": ErrorKinds.UNTERMINATED_COMMENT,
+}
+
+PUNCTUATIONS: dict[str, TokenType] = {
+    tt.value: tt
+    for tt in TokenType
+    if not tt.value.isalpha()
+}
+
+
+def _error(kind: ErrorKinds, text: str, position: int, offset: int, line: int, line_start: int) -> LexicalError:
+    """Build an error at `text[position]`, where `text` starts at `offset` in a line starting at `line_start`."""
+    newline = text.rfind('\n', 0, position)
+    column = position - newline if newline != -1 else offset + position - line_start + 1
+
+    source = Source(text)
+    source.start = source.current = offset + position
+    return LexicalError(kind, source=source, position=(line, column))
+
+
+def iter_tokens(text: str,
+                position: int = 0,
+                line: int = 1,
+                symbols: Optional[SymbolTable] = None) -> Iterator[Token]:
+    """Yield the tokens of `text` starting at `position`, raising `LexicalError` on bad input."""
+    return _scan(text, position, line, None, symbols)
+
+
+def iter_chunked_tokens(read: Callable[[], str], symbols: Optional[SymbolTable] = None) -> Iterator[Token]:
+    """Yield tokens from the chunks returned by `read`, which returns an empty string once exhausted.
+
+    Only the unconsumed tail of the input is kept in memory, so tokens may straddle chunk boundaries.
+    """
+    return _scan(read(), 0, 1, read, symbols)
+
+
+def _scan(text: str,
+          position: int,
+          line: int,
+          read: Optional[Callable[[], str]],
+          symbols: Optional[SymbolTable]) -> Iterator[Token]:
+    match_at = TOKEN_PATTERN.match
+    intern = symbols.intern if symbols is not None else None
+    names = symbols.names if symbols is not None else []
+    end = len(text)
+    offset = 0  # absolute position of text[0]
+    line_start = 0  # absolute position of the current line, once it has left the buffer
+    eof = read is None
+
+    while True:
+        if position >= end:
+            if eof:
+                return
+            text, position, offset, line_start, eof = _refill(read, text, position, offset, line_start)
+            end = len(text)
+            continue
+
+        m = match_at(text, position)
+        if m is None:  # pragma: no cover - the IDENTIFIER branch accepts any non-space
+            raise _error(ErrorKinds.UNEXPECTED_CHARACTER, text, position, offset, line, line_start)
+
+        kind = m.lastgroup
+        if not eof and (kind in _UNTERMINATED or m.end() == end and not (kind == "TRIVIA" and m.group().isspace())):
+            # The token or comment might continue in the next chunk. A split whitespace run is harmless.
+            text, position, offset, line_start, eof = _refill(read, text, position, offset, line_start)
+            end = len(text)
+            continue
+
+        start, position = m.span()
+
+        if kind == "TRIVIA":
+            line += text.count('\n', start, position)
+
+        elif kind == "IDENTIFIER":
+            lexeme = m.group()
+            tt = KEYWORDS.get(lexeme, TokenType.IDENTIFIER)
+            if intern is not None and tt is TokenType.IDENTIFIER:
+                symbol = intern(lexeme)
+                yield Token(tt, names[symbol], line, (offset + start, offset + position), symbol)
+            else:
+                yield Token(tt, lexeme, line, (offset + start, offset + position))
+
+        elif kind == "PUNCTUATION":
+            lexeme = m.group()
+            yield Token(PUNCTUATIONS[lexeme], lexeme, line, (offset + start, offset + position))
+
+        elif kind == "NUMBER":
+            if m.group("FRACTION") is None:
+                yield Token(TokenType.NUMBER, int(m.group()), line, (offset + start, offset + position))
+            elif position < end and text[position] == '.':
+                raise _error(ErrorKinds.MALFORMED_NUMBER, text, position, offset, line, line_start)
+            else:
+                yield Token(TokenType.NUMBER, float(m.group()), line, (offset + start, offset + position))
+
+        elif kind == "STRING":
+            # The span stops before the closing quote, like the character scanner.
+            lexeme = text[start + 1:position - 1]
+            line += text.count('\n', start, position)
+            if intern is not None:
+                symbol = intern(lexeme)
+                yield Token(TokenType.STRING, names[symbol], line, (offset + start, offset + position - 1), symbol)
+            else:
+                yield Token(TokenType.STRING, lexeme, line, (offset + start, offset + position - 1))
+
+        else:  # UNTERMINATED or UNTERMINATED_COMMENT
+            raise _error(_UNTERMINATED[kind], text, end, offset, line + text.count('\n', start), line_start)
+
+
+def _refill(read: Optional[Callable[[], str]],
+            text: str,
+            position: int,
+            offset: int,
+            line_start: int) -> Tuple[str, int, int, int, bool]:
+    """Drop the consumed prefix of `text` and append the next chunk."""
+    assert read is not None
+    newline = text.rfind('\n', 0, position)
+    if newline != -1:
+        line_start = offset + newline + 1
+    chunk = read()
+    return text[position:] + chunk, 0, offset + position, line_start, not chunk
+
+
+def tokenize_regex(input_: str, symbols: Optional[SymbolTable] = None) -> LexerResult[List[Token]]:
+    try:
+        return Ok(list(iter_tokens(input_, symbols=symbols)))
+    except LexicalError as err:
+        return Err(err)
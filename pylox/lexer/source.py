@@ -1,24 +1,40 @@
+import re
+from typing import Optional, Tuple
+
 from rusty_utils import Option
 
+from pylox.lexer.lines import LineIndex
+
 
 class Source:
     __source: str
+    __lines: Optional[LineIndex] = None
     start: int = 0
     current: int = 0
-    line: int = 1
 
     def __init__(self, source: str) -> None:
         self.__source = source
 
+    @property
+    def lines(self) -> LineIndex:
+        if self.__lines is None:
+            self.__lines = LineIndex(self.__source)
+        return self.__lines
+
+    @property
+    def line(self) -> int:
+        return self.lines.line_of(self.current)
+
+    def position(self) -> Tuple[int, int]:
+        """Line and column of the current character."""
+        return self.lines.position(self.current)
+
     def advance(self) -> Option[str]:
         if not self.has_next():
             return Option()
 
         ch: str = self.__source[self.current]
-
         self.current += 1
-        if ch == '\n':
-            self.line += 1
 
         return Option(ch)
 
@@ -31,6 +47,12 @@ class Source:
     def consume(self) -> None:
         self.advance()
 
+    def skip(self, pattern: re.Pattern[str]) -> None:
+        """Jump over a match of `pattern` at the current character, if any."""
+        m = pattern.match(self.__source, self.current)
+        if m is not None:
+            self.current = m.end()
+
     def has_next(self) -> bool:
         return self.current < len(self.__source)
 
@@ -0,0 +1,35 @@
+import sys
+from typing import List
+
+
+class SymbolTable:
+    """Interned identifier names and string literals of one compilation.
+
+    Each distinct text gets a small integer id. Texts go through `sys.intern`, so equal
+    names share one `str` and dict lookups keyed by them hit the identity fast path.
+    """
+
+    __slots__ = ("names", "ids")
+
+    names: List[str]
+    ids: dict[str, int]
+
+    def __init__(self) -> None:
+        self.names = []
+        self.ids = {}
+
+    def intern(self, text: str) -> int:
+        symbol = self.ids.get(text)
+        if symbol is None:
+            symbol = self.ids[text] = len(self.names)
+            self.names.append(sys.intern(text))
+        return symbol
+
+    def __getitem__(self, symbol: int) -> str:
+        return self.names[symbol]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, text: object) -> bool:
+        return text in self.ids
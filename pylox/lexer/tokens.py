@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Tuple
 
@@ -75,6 +75,7 @@ class Token:
     value: object
     lineno: int
     span: Tuple[int, int]  # start, end
+    symbol: int = field(default=-1, compare=False)  # id in the `SymbolTable` of the compilation, if any
 
     def __str__(self) -> str:
         return f"[{self.type.name}({self.value}) @ {self.span[0]}-{self.span[1]} ln.{self.lineno}]"
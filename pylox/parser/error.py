@@ -27,6 +27,9 @@ class ParseError(Exception):
         if self.source:
             string += f"Current token is {self.source.peek()}\n{self.kind.value}"
             string += f" at {self.source.current + 1}th token"
+            position = self.source.position()
+            if position:
+                string += f" ({position[0]}:{position[1]})"
         if self.tt:
             string += f": {', '.join(str(t) for t in self.tt)}"
 
@@ -10,10 +10,10 @@ from pylox.parser.source import Source
 @Catch(ParseError)  # type: ignore
 def primary(source: Source) -> Primary:
     if source.match(TokenType.IDENTIFIER):
-        return Identifier(str(source.prev().unwrap_or_raise().value))
+        return Identifier(str(source.prev_value()), source.prev_symbol())
 
     if source.match(TokenType.NUMBER, TokenType.STRING):
-        return Literal(source.prev().unwrap_or_raise().value)
+        return Literal(source.prev_value())
 
     if source.match(TokenType.TRUE):
         return Literal(True)
@@ -79,7 +79,7 @@ def func_call(source: Source) -> IExpr:
 @Catch(ParseError)  # type: ignore
 def unary(source: Source) -> IExpr:
     if source.match(TokenType.BANG, TokenType.MINUS):
-        operator: UnaryOp = UnaryOp.from_token(source.prev().unwrap_or_raise())
+        operator: UnaryOp = UnaryOp.from_type(source.prev_type())
         right: IExpr = unary(source).unwrap_or_raise()
         return Unary(operator, right)
 
@@ -91,7 +91,7 @@ def factor(source: Source) -> IExpr:
     expr: IExpr = unary(source).unwrap_or_raise()
 
     while source.match(TokenType.SLASH, TokenType.STAR):
-        operator: BinaryOp = BinaryOp.from_token(source.prev().unwrap_or_raise())
+        operator: BinaryOp = BinaryOp.from_type(source.prev_type())
         right: IExpr = unary(source).unwrap_or_raise()
         expr = Binary(expr, operator, right)
 
@@ -103,7 +103,7 @@ def term(source: Source) -> IExpr:
     expr: IExpr = factor(source).unwrap_or_raise()
 
     while source.match(TokenType.MINUS, TokenType.PLUS):
-        operator: BinaryOp = BinaryOp.from_token(source.prev().unwrap_or_raise())
+        operator: BinaryOp = BinaryOp.from_type(source.prev_type())
         right: IExpr = factor(source).unwrap_or_raise()
         expr = Binary(expr, operator, right)
 
@@ -115,7 +115,7 @@ def comparison(source: Source) -> IExpr:
     expr: IExpr = term(source).unwrap_or_raise()
 
     while source.match(TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL):
-        operator: BinaryOp = BinaryOp.from_token(source.prev().unwrap_or_raise())
+        operator: BinaryOp = BinaryOp.from_type(source.prev_type())
         right: IExpr = term(source).unwrap_or_raise()
         expr = Binary(expr, operator, right)
 
@@ -127,7 +127,7 @@ def equality(source: Source) -> IExpr:
     expr: IExpr = comparison(source).unwrap_or_raise()
 
     while source.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-        operator: BinaryOp = BinaryOp.from_token(source.prev().unwrap_or_raise())
+        operator: BinaryOp = BinaryOp.from_type(source.prev_type())
         right: IExpr = comparison(source).unwrap_or_raise()
         expr = Binary(expr, operator, right)
 
@@ -163,10 +163,15 @@ def expression(source: Source) -> IExpr:
 
 
 def synchronize(source: Source) -> None:
-    source.advance()
+    """Skip the rest of a statement that failed to parse.
+
+    Stops past its `;`, or at a keyword starting the next statement or at the `}` closing the block.
+    """
+    if not source.check(TokenType.RIGHT_BRACE):
+        source.skip()
 
     while source.has_next():
-        if source.prev().unwrap_or_raise().type == TokenType.SEMICOLON:
+        if source.prev_type() == TokenType.SEMICOLON:
             return
 
         if source.check(
@@ -176,9 +181,9 @@ def synchronize(source: Source) -> None:
                 TokenType.FOR,
                 TokenType.IF,
                 TokenType.WHILE,
-                TokenType.PRINT,
-                TokenType.RETURN
+                TokenType.RETURN,
+                TokenType.RIGHT_BRACE,
         ):
             return
 
-        source.advance()
+        source.skip()
@@ -0,0 +1,311 @@
+"""
+Parser core without `Result` plumbing.
+
+It follows the grammar and builds the same trees as `pylox.parser.statement` and
+`pylox.parser.expression`, raising the same `ParseError`s. Internally it uses
+plain exceptions, an integer cursor and a precomputed list of token types. Only
+`parse()` turns the outcome into a `ParseResult`.
+"""
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from pylox.ast.expression import IExpr, Literal, Grouping, Unary, UnaryOp, Binary, BinaryOp, Logical, LogicalOp, \
+    Identifier, FuncCall
+from pylox.ast.statement import Program, IStmt, ExprStmt, VarDecl, Assignment, Block, IfStmt, WhileStmt, ForStmt
+from pylox.lexer.buffer import TokenBuffer, TOKEN_TYPES
+from pylox.lexer.lines import LineIndex
+from pylox.lexer.tokens import TokenType, Token
+from pylox.parser.error import ParseError, ErrorKinds
+from pylox.parser.source import Source
+
+# Binding power and operator of every binary and logical operator.
+_BINARY: dict[Optional[TokenType], tuple[int, BinaryOp | LogicalOp]] = {
+    TokenType.OR: (1, LogicalOp.OR),
+    TokenType.AND: (2, LogicalOp.AND),
+    TokenType.BANG_EQUAL: (3, BinaryOp.NE),
+    TokenType.EQUAL_EQUAL: (3, BinaryOp.EQ),
+    TokenType.GREATER: (4, BinaryOp.GT),
+    TokenType.GREATER_EQUAL: (4, BinaryOp.GE),
+    TokenType.LESS: (4, BinaryOp.LS),
+    TokenType.LESS_EQUAL: (4, BinaryOp.LE),
+    TokenType.MINUS: (5, BinaryOp.SUB),
+    TokenType.PLUS: (5, BinaryOp.ADD),
+    TokenType.SLASH: (6, BinaryOp.DIV),
+    TokenType.STAR: (6, BinaryOp.MUL),
+}
+
+_CONSTANTS: dict[Optional[TokenType], object] = {
+    TokenType.TRUE: True,
+    TokenType.FALSE: False,
+    TokenType.NONE: None,
+}
+
+_PRIMARY_EXPECTED = (
+    TokenType.NUMBER,
+    TokenType.STRING,
+    TokenType.TRUE,
+    TokenType.FALSE,
+    TokenType.NONE,
+    TokenType.LEFT_PAREN,
+)
+
+
+class FastParser:
+    tokens: Sequence[Token] | TokenBuffer
+    types: List[Optional[TokenType]]
+    value_at: Callable[[int], object]
+    symbol_at: Callable[[int], int]
+    current: int
+
+    def __init__(self, tokens: Sequence[Token] | TokenBuffer, lines: Optional[LineIndex] = None):
+        self.tokens = tokens
+        self.lines = lines
+        self.current = 0
+        # The trailing `None` stands for the end of input, so peeking never runs off the list.
+        if isinstance(tokens, TokenBuffer):
+            self.types = [TOKEN_TYPES[i] for i in tokens.types]
+            # Values and symbols are read from the columns, without building `Token`s.
+            self.value_at = tokens.value_at
+            self.symbol_at = tokens.symbol_at
+        else:
+            self.types = [t.type for t in tokens]
+            self.value_at = lambda i: tokens[i].value
+            self.symbol_at = lambda i: tokens[i].symbol
+        self.types.append(None)
+
+    def error(self, kind: ErrorKinds, *tt: TokenType) -> ParseError:
+        source = Source(self.tokens, self.lines)
+        source.current = self.current
+        return ParseError(kind, source, *tt)
+
+    def expect(self, token_type: TokenType) -> None:
+        if self.types[self.current] is not token_type:
+            raise self.error(ErrorKinds.EXPECTED_TOKEN, token_type)
+        self.current += 1
+
+    def has_next(self) -> bool:
+        return self.current < len(self.types) - 1
+
+    ############### Statements ##############
+
+    def program(self) -> Program:
+        statements = []
+        while self.has_next():
+            statements.append(self.declaration())
+        return Program(statements)  # type: ignore[arg-type]
+
+    def declaration(self) -> IStmt:
+        if self.types[self.current] is TokenType.VAR:
+            self.current += 1
+            return self.variable_declaration()
+        return self.statement()
+
+    def variable_declaration(self) -> IStmt:
+        self.expect(TokenType.IDENTIFIER)
+        name, symbol = str(self.value_at(self.current - 1)), self.symbol_at(self.current - 1)
+        init: Optional[IExpr] = None
+
+        if self.types[self.current] is TokenType.EQUAL:
+            self.current += 1
+            init = self.expression()
+
+        self.expect(TokenType.SEMICOLON)
+        return VarDecl(name, init, symbol)
+
+    def statement(self) -> IStmt:
+        tt = self.types[self.current]
+        if tt is TokenType.LEFT_BRACE:
+            self.current += 1
+            return self.block()
+        if tt is TokenType.IF:
+            self.current += 1
+            return self.if_statement()
+        if tt is TokenType.WHILE:
+            self.current += 1
+            return self.while_statement()
+        if tt is TokenType.FOR:
+            self.current += 1
+            return self.for_statement()
+        return self.assignment()
+
+    def assignment(self) -> IStmt:
+        expr = self.expression()
+        tt = self.types[self.current]
+
+        if tt is TokenType.SEMICOLON:
+            self.current += 1
+            return ExprStmt(expr)
+
+        if tt is TokenType.EQUAL:
+            self.current += 1
+            value = self.expression()
+            if isinstance(expr, Identifier):
+                self.expect(TokenType.SEMICOLON)
+                return Assignment(expr.name, value, expr.symbol)
+            raise self.error(ErrorKinds.UNEXPECTED_TOKEN, TokenType.IDENTIFIER)
+
+        raise self.error(ErrorKinds.EXPECTED_TOKEN, TokenType.SEMICOLON)
+
+    def block(self) -> IStmt:
+        types = self.types
+        statements = []
+        while types[self.current] is not TokenType.RIGHT_BRACE and self.has_next():
+            statements.append(self.declaration())
+
+        self.expect(TokenType.RIGHT_BRACE)
+        return Block(statements)
+
+    def condition(self) -> IExpr:
+        """The parenthesized condition of an `if` or `while`."""
+        self.expect(TokenType.LEFT_PAREN)
+        condition = self.expression()
+        self.expect(TokenType.RIGHT_PAREN)
+        return condition
+
+    def if_statement(self) -> IStmt:
+        condition = self.condition()
+        then_branch = self.statement()
+        else_branch: Optional[IStmt] = None
+
+        if self.types[self.current] is TokenType.ELSE:
+            self.current += 1
+            else_branch = self.statement()
+
+        return IfStmt(condition, then_branch, else_branch)
+
+    def while_statement(self) -> IStmt:
+        condition = self.condition()
+        return WhileStmt(condition, self.statement())
+
+    def for_statement(self) -> IStmt:
+        init, condition, increment = self.for_clauses()
+        return self.for_loop(init, condition, increment, self.statement())
+
+    def for_clauses(self) -> Tuple[Optional[IStmt], Optional[IExpr], Optional[IStmt]]:
+        """The parenthesized initializer, condition and increment of a `for`."""
+        types = self.types
+        self.expect(TokenType.LEFT_PAREN)
+
+        init: Optional[IStmt] = None
+        if types[self.current] is TokenType.SEMICOLON:
+            self.current += 1
+        elif types[self.current] is TokenType.VAR:
+            self.current += 1
+            init = self.variable_declaration()
+        else:
+            # Consumes the `;` after it.
+            init = self.assignment()
+
+        condition: Optional[IExpr] = None
+        if types[self.current] is not TokenType.SEMICOLON:
+            condition = self.expression()
+
+        self.expect(TokenType.SEMICOLON)
+
+        increment: Optional[IStmt] = None
+        if types[self.current] is not TokenType.RIGHT_PAREN:
+            increment = self.assignment_without_semicolon()
+
+        self.expect(TokenType.RIGHT_PAREN)
+        return init, condition, increment
+
+    @staticmethod
+    def for_loop(init: Optional[IStmt],
+                 condition: Optional[IExpr],
+                 increment: Optional[IStmt],
+                 body: IStmt) -> IStmt:
+        """The `for` statement with these clauses, like `pylox.parser.statement.for_statement`."""
+        return ForStmt(init, condition, increment, body)
+
+    def assignment_without_semicolon(self) -> IStmt:
+        expr = self.expression()
+
+        if self.types[self.current] is TokenType.EQUAL:
+            self.current += 1
+            value = self.expression()
+            if isinstance(expr, Identifier):
+                return Assignment(expr.name, value, expr.symbol)
+
+        return ExprStmt(expr)
+
+    ############### Expressions ##############
+
+    def expression(self) -> IExpr:
+        return self.binary(1)
+
+    def binary(self, precedence: int) -> IExpr:
+        """An operand followed by the operators that bind at least as tightly as `precedence`."""
+        types = self.types
+        left = self.unary()
+
+        while True:
+            rule = _BINARY.get(types[self.current])
+            if rule is None or rule[0] < precedence:
+                return left
+            self.current += 1
+
+            right = self.binary(rule[0] + 1)
+            operator = rule[1]
+            if isinstance(operator, LogicalOp):
+                left = Logical(left, operator, right)
+            else:
+                left = Binary(left, operator, right)
+
+    def unary(self) -> IExpr:
+        tt = self.types[self.current]
+        if tt is TokenType.BANG:
+            self.current += 1
+            return Unary(UnaryOp.NOT, self.unary())
+        if tt is TokenType.MINUS:
+            self.current += 1
+            return Unary(UnaryOp.NEG, self.unary())
+        return self.call()
+
+    def call(self) -> IExpr:
+        types = self.types
+        expr = self.primary()
+
+        while types[self.current] is TokenType.LEFT_PAREN:
+            self.current += 1
+            args: list[IExpr] = []
+
+            if types[self.current] is not TokenType.RIGHT_PAREN:
+                args.append(self.expression())
+
+                while types[self.current] is TokenType.COMMA:
+                    self.current += 1
+                    if len(args) >= 255:
+                        raise self.error(ErrorKinds.TOO_MANY_ARGUMENTS)
+                    args.append(self.expression())
+
+            if types[self.current] is not TokenType.RIGHT_PAREN:
+                raise self.error(ErrorKinds.EXPECTED_TOKEN, TokenType.RIGHT_PAREN)
+            self.current += 1
+
+            expr = FuncCall(expr, args)
+
+        return expr
+
+    def primary(self) -> IExpr:
+        tt = self.types[self.current]
+
+        if tt is TokenType.IDENTIFIER:
+            self.current += 1
+            return Identifier(str(self.value_at(self.current - 1)), self.symbol_at(self.current - 1))
+
+        if tt is TokenType.NUMBER or tt is TokenType.STRING:
+            self.current += 1
+            return Literal(self.value_at(self.current - 1))
+
+        if tt in _CONSTANTS:
+            self.current += 1
+            return Literal(_CONSTANTS[tt])
+
+        if tt is TokenType.LEFT_PAREN:
+            self.current += 1
+            expr = self.expression()
+            if self.types[self.current] is not TokenType.RIGHT_PAREN:
+                raise self.error(ErrorKinds.EXPECTED_TOKEN, TokenType.RIGHT_PAREN)
+            self.current += 1
+            return Grouping(expr)
+
+        raise self.error(ErrorKinds.EXPECTED_TOKEN, *_PRIMARY_EXPECTED)
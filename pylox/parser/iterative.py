@@ -0,0 +1,179 @@
+"""
+Parser that does not recurse, so nesting depth is bounded by memory instead of the call stack.
+
+Statements that contain statements (blocks, `if`, `while`, `for`) push a frame and are completed
+once their body has been parsed. Expressions are parsed with an operand stack and an operator stack,
+where groupings and call argument lists act as markers. The trees and errors are the same as those of
+`pylox.parser.fast.FastParser`, which it reuses for the non-nesting parts of the grammar.
+"""
+from typing import Any, List
+
+from pylox.ast.expression import IExpr, Grouping, Unary, UnaryOp, Binary, Logical, LogicalOp, FuncCall
+from pylox.ast.statement import Program, IStmt, Block, IfStmt, WhileStmt
+from pylox.lexer.tokens import TokenType
+from pylox.parser.error import ErrorKinds
+from pylox.parser.fast import FastParser, _BINARY
+
+# Statement frames
+_PROGRAM = 0
+_BLOCK = 1
+_IF = 2
+_ELSE = 3
+_WHILE = 4
+_FOR = 5
+
+# Operator stack entries are (precedence, kind, payload). Markers have precedence 0,
+# so reducing for any operator stops at them.
+_GROUP = 0
+_CALL = 1
+_UNARY = 2
+_OPERATOR = 3
+_UNARY_PRECEDENCE = 7
+
+_UNARY_OPS = {
+    TokenType.BANG: UnaryOp.NOT,
+    TokenType.MINUS: UnaryOp.NEG,
+}
+
+
+class IterativeParser(FastParser):
+
+    def program(self) -> Program:
+        types = self.types
+        frames: List[List[Any]] = [[_PROGRAM, []]]
+
+        while True:
+            frame = frames[-1]
+            kind = frame[0]
+            tt = types[self.current]
+
+            if kind == _PROGRAM and not self.has_next():
+                return Program(frame[1])
+
+            stmt: IStmt
+            if kind == _BLOCK and (tt is TokenType.RIGHT_BRACE or not self.has_next()):
+                self.expect(TokenType.RIGHT_BRACE)
+                frames.pop()
+                stmt = Block(frame[1])
+            elif tt is TokenType.VAR and kind <= _BLOCK:
+                self.current += 1
+                stmt = self.variable_declaration()
+            elif tt is TokenType.LEFT_BRACE:
+                self.current += 1
+                frames.append([_BLOCK, []])
+                continue
+            elif tt is TokenType.IF:
+                self.current += 1
+                frames.append([_IF, self.condition()])
+                continue
+            elif tt is TokenType.WHILE:
+                self.current += 1
+                frames.append([_WHILE, self.condition()])
+                continue
+            elif tt is TokenType.FOR:
+                self.current += 1
+                frames.append([_FOR, *self.for_clauses()])
+                continue
+            else:
+                stmt = self.assignment()
+
+            # Hand the statement to the frames waiting for it, completing them as we go.
+            while True:
+                frame = frames[-1]
+                kind = frame[0]
+                if kind <= _BLOCK:
+                    frame[1].append(stmt)
+                    break
+                if kind == _IF:
+                    if types[self.current] is TokenType.ELSE:
+                        self.current += 1
+                        frames[-1] = [_ELSE, frame[1], stmt]
+                        break
+                    stmt = IfStmt(frame[1], stmt, None)
+                elif kind == _ELSE:
+                    stmt = IfStmt(frame[1], frame[2], stmt)
+                elif kind == _WHILE:
+                    stmt = WhileStmt(frame[1], stmt)
+                else:
+                    stmt = self.for_loop(frame[1], frame[2], frame[3], stmt)
+                frames.pop()
+
+    def expression(self) -> IExpr:
+        types = self.types
+        operands: List[IExpr] = []
+        operators: List[tuple[int, int, Any]] = []
+
+        while True:
+            # An operand, with its prefix operators and opening parentheses.
+            tt = types[self.current]
+            while tt is TokenType.BANG or tt is TokenType.MINUS:
+                operators.append((_UNARY_PRECEDENCE, _UNARY, _UNARY_OPS[tt]))
+                self.current += 1
+                tt = types[self.current]
+
+            if tt is TokenType.LEFT_PAREN:
+                self.current += 1
+                operators.append((0, _GROUP, None))
+                continue
+
+            operands.append(self.primary())
+
+            # What follows the operand: calls, closing parentheses, an operator or the end.
+            while True:
+                tt = types[self.current]
+
+                if tt is TokenType.LEFT_PAREN:
+                    self.current += 1
+                    callee = operands.pop()
+                    if types[self.current] is TokenType.RIGHT_PAREN:
+                        self.current += 1
+                        operands.append(FuncCall(callee, []))
+                        continue
+                    operators.append((0, _CALL, (callee, [])))
+                    break
+
+                rule = _BINARY.get(tt)
+                if rule is not None:
+                    self.reduce(operands, operators, rule[0])
+                    self.current += 1
+                    operators.append((rule[0], _OPERATOR, rule[1]))
+                    break
+
+                self.reduce(operands, operators, 1)
+                if not operators:
+                    return operands.pop()
+
+                _, kind, payload = operators[-1]
+                if kind == _CALL:
+                    callee, args = payload
+                    args.append(operands.pop())
+                    if tt is TokenType.COMMA:
+                        self.current += 1
+                        if len(args) >= 255:
+                            raise self.error(ErrorKinds.TOO_MANY_ARGUMENTS)
+                        break
+                    if tt is TokenType.RIGHT_PAREN:
+                        self.current += 1
+                        operators.pop()
+                        operands.append(FuncCall(callee, args))
+                        continue
+                elif tt is TokenType.RIGHT_PAREN:
+                    self.current += 1
+                    operators.pop()
+                    operands.append(Grouping(operands.pop()))
+                    continue
+
+                raise self.error(ErrorKinds.EXPECTED_TOKEN, TokenType.RIGHT_PAREN)
+
+    @staticmethod
+    def reduce(operands: List[IExpr], operators: List[tuple[int, int, Any]], precedence: int) -> None:
+        """Apply the pending operators that bind at least as tightly as `precedence`."""
+        while operators and operators[-1][0] >= precedence:
+            _, kind, op = operators.pop()
+            right = operands.pop()
+            if kind == _UNARY:
+                operands.append(Unary(op, right))
+            elif isinstance(op, LogicalOp):
+                operands.append(Logical(operands.pop(), op, right))
+            else:
+                operands.append(Binary(operands.pop(), op, right))
@@ -1,16 +1,53 @@
-from typing import List
+from typing import List, Optional, Sequence, Literal, Tuple
 
 from rusty_utils import Catch
 
 from pylox.ast.statement import Program
+from pylox.lexer.buffer import TokenBuffer
+from pylox.lexer.lines import LineIndex
 from pylox.lexer.tokens import Token
+from pylox.parser import pratt
+from pylox.parser.fast import FastParser
+from pylox.parser.iterative import IterativeParser
+from pylox.parser.recovery import RecoveringParser
 from pylox.parser.error import ParseError
 from pylox.parser.source import Source
 from pylox.parser.statement import program
 
 
+ParserEngine = Literal["fast", "iterative", "descent", "pratt"]
+
+
 @Catch(ParseError)  # type: ignore
-def parse(input_: List[Token]) -> Program:
-    source: Source = Source(input_)
+def parse(input_: Sequence[Token] | TokenBuffer,
+          lines: Optional[LineIndex] = None,
+          engine: ParserEngine = "fast") -> Program:
+    """Parse the tokens of a program. Given the `LineIndex` of the source, errors report line and column.
+
+    `engine` picks the parser: the exception-based core in `pylox.parser.fast`, its
+    non-recursive variant in `pylox.parser.iterative` for deeply nested programs, or the
+    `Result`-based grammar functions with a recursive descent or table-driven Pratt
+    expression parser. All of them build the same trees and report the same errors.
+    """
+    if engine == "fast":
+        return FastParser(input_, lines).program()
+    if engine == "iterative":
+        return IterativeParser(input_, lines).program()
+
+    source: Source = Source(input_, lines)
+    if engine == "pratt":
+        source.expression_parser = pratt.expression
+    elif engine != "descent":
+        raise ValueError(f"Unknown parser engine: {engine}")
     res: Program = program(source).unwrap_or_raise()
     return res
+
+
+def parse_recovering(input_: Sequence[Token] | TokenBuffer,
+                     lines: Optional[LineIndex] = None) -> Tuple[Program, List[ParseError]]:
+    """Parse a program, carrying on after syntax errors.
+
+    Returns the statements that parsed and every error found, in source order.
+    """
+    parser = RecoveringParser(input_, lines)
+    return parser.program(), parser.errors
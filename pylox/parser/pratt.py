@@ -0,0 +1,141 @@
+"""
+Table-driven Pratt parser for the expression grammar in `pylox.ast.expression`.
+
+Each token type maps to the rule that parses it at the start of an expression
+(prefix) or after an operand (infix), and infix rules carry a binding power.
+It builds the same trees as `pylox.parser.expression`, without a call per
+grammar level for every operand.
+"""
+from enum import IntEnum
+from typing import Callable, Tuple
+
+from rusty_utils import Catch
+
+from pylox.ast.expression import IExpr, Literal, Grouping, Unary, UnaryOp, Binary, BinaryOp, Logical, LogicalOp, \
+    Identifier, FuncCall
+from pylox.lexer.tokens import TokenType
+from pylox.parser.error import ParseError, ErrorKinds
+from pylox.parser.source import Source
+
+
+class Precedence(IntEnum):
+    NONE = 0
+    OR = 1
+    AND = 2
+    EQUALITY = 3
+    COMPARISON = 4
+    TERM = 5
+    FACTOR = 6
+    UNARY = 7
+    CALL = 8
+
+
+# Rules get the type of the token they start at, which has been consumed.
+PrefixRule = Callable[[Source, TokenType], IExpr]
+InfixRule = Callable[[Source, IExpr, TokenType, Precedence], IExpr]
+
+
+def _identifier(source: Source, tt: TokenType) -> IExpr:
+    return Identifier(str(source.prev_value()), source.prev_symbol())
+
+
+def _literal(source: Source, tt: TokenType) -> IExpr:
+    return Literal(source.prev_value())
+
+
+def _constant(value: object) -> PrefixRule:
+    return lambda source, tt: Literal(value)
+
+
+def _grouping(source: Source, tt: TokenType) -> IExpr:
+    expr = parse_precedence(source, Precedence.OR)
+
+    if not source.match(TokenType.RIGHT_PAREN):
+        raise ParseError(ErrorKinds.EXPECTED_TOKEN, source, TokenType.RIGHT_PAREN)
+
+    return Grouping(expr)
+
+
+def _unary(source: Source, tt: TokenType) -> IExpr:
+    return Unary(UnaryOp.from_type(tt), parse_precedence(source, Precedence.UNARY))
+
+
+def _binary(source: Source, left: IExpr, tt: TokenType, precedence: Precedence) -> IExpr:
+    return Binary(left, BinaryOp.from_type(tt), parse_precedence(source, Precedence(precedence + 1)))
+
+
+def _logical(source: Source, left: IExpr, tt: TokenType, precedence: Precedence) -> IExpr:
+    operator = LogicalOp.AND if tt == TokenType.AND else LogicalOp.OR
+    return Logical(left, operator, parse_precedence(source, Precedence(precedence + 1)))
+
+
+def _call(source: Source, callee: IExpr, tt: TokenType, precedence: Precedence) -> IExpr:
+    args: list[IExpr] = []
+
+    if not source.check(TokenType.RIGHT_PAREN):
+        args.append(parse_precedence(source, Precedence.OR))
+
+        while source.match(TokenType.COMMA):
+            if len(args) >= 255:
+                raise ParseError(ErrorKinds.TOO_MANY_ARGUMENTS, source)
+            args.append(parse_precedence(source, Precedence.OR))
+
+    if not source.match(TokenType.RIGHT_PAREN):
+        raise ParseError(ErrorKinds.EXPECTED_TOKEN, source, TokenType.RIGHT_PAREN)
+
+    return FuncCall(callee, args)
+
+
+PREFIX_RULES: dict[TokenType, PrefixRule] = {
+    TokenType.IDENTIFIER: _identifier,
+    TokenType.NUMBER: _literal,
+    TokenType.STRING: _literal,
+    TokenType.TRUE: _constant(True),
+    TokenType.FALSE: _constant(False),
+    TokenType.NONE: _constant(None),
+    TokenType.LEFT_PAREN: _grouping,
+    TokenType.BANG: _unary,
+    TokenType.MINUS: _unary,
+}
+
+INFIX_RULES: dict[TokenType, Tuple[Precedence, InfixRule]] = {
+    TokenType.OR: (Precedence.OR, _logical),
+    TokenType.AND: (Precedence.AND, _logical),
+    TokenType.BANG_EQUAL: (Precedence.EQUALITY, _binary),
+    TokenType.EQUAL_EQUAL: (Precedence.EQUALITY, _binary),
+    TokenType.GREATER: (Precedence.COMPARISON, _binary),
+    TokenType.GREATER_EQUAL: (Precedence.COMPARISON, _binary),
+    TokenType.LESS: (Precedence.COMPARISON, _binary),
+    TokenType.LESS_EQUAL: (Precedence.COMPARISON, _binary),
+    TokenType.MINUS: (Precedence.TERM, _binary),
+    TokenType.PLUS: (Precedence.TERM, _binary),
+    TokenType.SLASH: (Precedence.FACTOR, _binary),
+    TokenType.STAR: (Precedence.FACTOR, _binary),
+    TokenType.LEFT_PAREN: (Precedence.CALL, _call),
+}
+
+
+def parse_precedence(source: Source, precedence: Precedence) -> IExpr:
+    """Parse an expression whose operators bind at least as tightly as `precedence`."""
+    prefix = PREFIX_RULES.get(source.peek_type())  # type: ignore[arg-type]
+    if prefix is None:
+        raise ParseError(ErrorKinds.EXPECTED_TOKEN, source,
+                         TokenType.NUMBER,
+                         TokenType.STRING,
+                         TokenType.TRUE,
+                         TokenType.FALSE,
+                         TokenType.NONE,
+                         TokenType.LEFT_PAREN)
+
+    left = prefix(source, source.take())
+
+    while True:
+        infix = INFIX_RULES.get(source.peek_type())  # type: ignore[arg-type]
+        if infix is None or infix[0] < precedence:
+            return left
+        left = infix[1](source, left, source.take(), infix[0])
+
+
+@Catch(ParseError)  # type: ignore
+def expression(source: Source) -> IExpr:
+    return parse_precedence(source, Precedence.OR)
@@ -0,0 +1,59 @@
+"""
+Parser that reports every syntax error of a program in one pass.
+
+A declaration that fails to parse is dropped and its error recorded, then
+`pylox.parser.expression.synchronize` skips to the next statement boundary
+and parsing carries on, inside blocks as well as at the top level.
+"""
+from typing import List, Optional, Sequence
+
+from pylox.ast.statement import Program, IStmt, Block
+from pylox.lexer.buffer import TokenBuffer
+from pylox.lexer.lines import LineIndex
+from pylox.lexer.tokens import TokenType, Token
+from pylox.parser.error import ParseError
+from pylox.parser.expression import synchronize
+from pylox.parser.fast import FastParser
+from pylox.parser.source import Source
+
+
+class RecoveringParser(FastParser):
+    errors: List[ParseError]
+
+    def __init__(self, tokens: Sequence[Token] | TokenBuffer, lines: Optional[LineIndex] = None):
+        super().__init__(tokens, lines)
+        self.errors = []
+
+    def program(self) -> Program:
+        statements = []
+        while self.has_next():
+            stmt = self.recover()
+            if stmt is not None:
+                statements.append(stmt)
+        return Program(statements)  # type: ignore[arg-type]
+
+    def block(self) -> IStmt:
+        types = self.types
+        statements = []
+        while types[self.current] is not TokenType.RIGHT_BRACE and self.has_next():
+            stmt = self.recover()
+            if stmt is not None:
+                statements.append(stmt)
+
+        self.expect(TokenType.RIGHT_BRACE)
+        return Block(statements)
+
+    def recover(self) -> Optional[IStmt]:
+        """A declaration, or `None` after recording its error and skipping to the next statement."""
+        start = self.current
+        try:
+            return self.declaration()
+        except ParseError as error:
+            self.errors.append(error)
+
+        source = Source(self.tokens, self.lines)
+        source.current = self.current
+        synchronize(source)
+        # A `}` that closes no block is skipped here, as `synchronize` stops in front of it.
+        self.current = max(source.current, start + 1)
+        return None
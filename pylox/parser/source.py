@@ -1,7 +1,10 @@
-from typing import List
+from typing import Callable, Optional, Sequence, Tuple
 
-from rusty_utils import Option, Catch
+from rusty_utils import Option, Catch, Ok, Err
 
+from pylox.ast.expression import IExpr
+from pylox.lexer.buffer import TokenBuffer
+from pylox.lexer.lines import LineIndex
 from pylox.lexer.tokens import Token, TokenType
 from pylox.parser.error import ParseResult, ParseError, ErrorKinds
 
@@ -9,8 +12,26 @@ from pylox.parser.error import ParseResult, ParseError, ErrorKinds
 class Source:
     current = 0
 
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Sequence[Token] | TokenBuffer, lines: Optional[LineIndex] = None):
         self.__tokens = tokens
+        self.lines = lines
+        # Parses the expressions inside statements; `None` selects the recursive descent parser.
+        self.expression_parser: Optional[Callable[["Source"], ParseResult[IExpr]]] = None
+        # Token fields are read from the columns of a `TokenBuffer` without building `Token`s.
+        self.__type_at: Callable[[int], TokenType]
+        self.__value_at: Callable[[int], object]
+        self.__span_at: Callable[[int], Tuple[int, int]]
+        self.__symbol_at: Callable[[int], int]
+        if isinstance(tokens, TokenBuffer):
+            self.__type_at = tokens.type_at
+            self.__value_at = tokens.value_at
+            self.__span_at = tokens.span_at
+            self.__symbol_at = tokens.symbol_at
+        else:
+            self.__type_at = lambda i: tokens[i].type
+            self.__value_at = lambda i: tokens[i].value
+            self.__span_at = lambda i: tokens[i].span
+            self.__symbol_at = lambda i: tokens[i].symbol
 
     def advance(self) -> Option[Token]:
         if self.has_next():
@@ -22,27 +43,63 @@ class Source:
     def peek(self) -> Option[Token]:
         return Option(self.__tokens[self.current] if self.has_next() else None)
 
+    def peek_type(self) -> Optional[TokenType]:
+        """Type of the next token, without building it."""
+        return self.__type_at(self.current) if self.has_next() else None
+
+    def skip(self) -> None:
+        """Consumes the next token, if any, without building it."""
+        if self.has_next():
+            self.current += 1
+
+    def take(self) -> TokenType:
+        """Consumes the next token, which must exist, and returns its type."""
+        tt = self.__type_at(self.current)
+        self.current += 1
+        return tt
+
     def prev(self) -> ParseResult[Token]:
         return (
             Catch(IndexError)(lambda: self.__tokens[self.current - 1])()
             .map_err(lambda _: ParseError(ErrorKinds.EXPECTED_TOKEN))
         )
 
+    def prev_type(self) -> TokenType:
+        """Type of the last consumed token, which must exist."""
+        return self.__type_at(self.current - 1)
+
+    def prev_value(self) -> object:
+        """Value of the last consumed token, which must exist."""
+        return self.__value_at(self.current - 1)
+
+    def prev_symbol(self) -> int:
+        """Symbol of the last consumed token, which must exist."""
+        return self.__symbol_at(self.current - 1)
+
     def check(self, *token_type: TokenType) -> bool:
         """Checks if the next token is any of the given types."""
-        # Explict type cast here to satisfy mypy
-        return bool(self.peek().is_some_and(lambda t: t.type in token_type))
+        return self.has_next() and self.__type_at(self.current) in token_type
 
     def consume(self) -> ParseResult[None]:
-        return self.advance().ok_or(ParseError(ErrorKinds.UNEXPECTED_TOKEN, source=self))
+        if self.has_next():
+            self.current += 1
+            return Ok(None)
+        return Err(ParseError(ErrorKinds.UNEXPECTED_TOKEN, source=self))
+
+    def position(self) -> Optional[Tuple[int, int]]:
+        """Line and column of the current token, or of the end of the last one at the end of input."""
+        if self.lines is None or not self.__tokens:
+            return None
+        if self.has_next():
+            return self.lines.position(self.__span_at(self.current)[0])
+        return self.lines.position(self.__span_at(len(self.__tokens) - 1)[1])
 
     def has_next(self) -> bool:
         return self.current < len(self.__tokens)
 
     def match(self, *expected: TokenType) -> bool:
         """Consumes the next token if it matches any of the expected types."""
-        for ty in expected:
-            if self.check(ty):
-                self.advance()
-                return True
+        if self.check(*expected):
+            self.current += 1
+            return True
         return False
@@ -2,8 +2,8 @@ from typing import Optional
 
 from rusty_utils import Catch
 
-from pylox.ast.expression import IExpr, Identifier, Literal
-from pylox.ast.statement import Program, IStmt,  ExprStmt, VarDecl, Assignment, Block, IfStmt, WhileStmt
+from pylox.ast.expression import IExpr, Identifier
+from pylox.ast.statement import Program, IStmt,  ExprStmt, VarDecl, Assignment, Block, IfStmt, WhileStmt, ForStmt
 from pylox.lexer.tokens import TokenType
 from pylox.parser.error import ParseError, ErrorKinds
 from pylox.parser.expression import expression
@@ -11,7 +11,8 @@ from pylox.parser.source import Source
 
 
 def parse_expression(source: Source) -> IExpr:
-    return expression(source).unwrap_or_raise()
+    parser = source.expression_parser or expression
+    return parser(source).unwrap_or_raise()
 
 
 def expect_token(source: Source, token_type: TokenType) -> None:
@@ -33,7 +34,7 @@ def assignment(source: Source) -> IStmt:
         value = parse_expression(source)
         if isinstance(expr, Identifier):
             expect_token(source, TokenType.SEMICOLON)
-            return Assignment(expr.name, value)
+            return Assignment(expr.name, value, expr.symbol)
 
         raise ParseError(
             ErrorKinds.UNEXPECTED_TOKEN,
@@ -93,7 +94,7 @@ def assignment_without_semicolon(source: Source) -> IStmt:
     if source.match(TokenType.EQUAL):
         value = parse_expression(source)
         if isinstance(expr, Identifier):
-            return Assignment(expr.name, value)
+            return Assignment(expr.name, value, expr.symbol)
 
     return ExprStmt(expr)
 
@@ -107,7 +108,8 @@ def for_statement(source: Source) -> IStmt:
         if source.match(TokenType.VAR):
             init = variable_declaration(source).unwrap_or_raise()
         else:
-            init = parse_expression(source)
+            # Consumes the `;` after it.
+            init = assignment(source).unwrap_or_raise()
 
     condition = None
     if not source.check(TokenType.SEMICOLON):
@@ -116,24 +118,13 @@ def for_statement(source: Source) -> IStmt:
     expect_token(source, TokenType.SEMICOLON)
 
     increment = None
-    if not source.check(TokenType.SEMICOLON):
+    if not source.check(TokenType.RIGHT_PAREN):
         increment = assignment_without_semicolon(source).unwrap_or_raise()
 
     expect_token(source, TokenType.RIGHT_PAREN)
 
     body = statement(source).unwrap_or_raise()
-
-    if increment is not None:
-        body = Block([body, increment])
-
-    if condition is None:
-        condition = Literal(True)
-
-    body = WhileStmt(condition, body)
-    if init is not None:
-        body = Block([init, body])
-
-    return body
+    return ForStmt(init, condition, increment, body)
 
 
 @Catch(ParseError)  # type: ignore
@@ -149,14 +140,14 @@ def while_statement(source: Source) -> IStmt:
 @Catch(ParseError)  # type: ignore
 def variable_declaration(source: Source) -> IStmt:
     expect_token(source, TokenType.IDENTIFIER)
-    name = str(source.prev().unwrap_or_raise().value)
+    name, symbol = str(source.prev_value()), source.prev_symbol()
     expr: Optional[IExpr] = None
 
     if source.match(TokenType.EQUAL):
         expr = parse_expression(source)
 
     expect_token(source, TokenType.SEMICOLON)
-    return VarDecl(name, expr)
+    return VarDecl(name, expr, symbol)
 
 
 @Catch(ParseError)  # type: ignore
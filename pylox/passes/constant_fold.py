@@ -0,0 +1,142 @@
+"""
+Constant folding and algebraic simplification.
+
+Operators whose operands are literals are evaluated at compile time by `pylox.interpreter.operators`,
+so a folded program computes exactly what the original would have. Operations that fail at run time,
+such as `-"a"` or a division by zero, are left in place to fail there.
+
+Groupings are dropped, as the shape of the tree already records them. Identities are applied only where
+they cannot change a value:
+
+    x * 1, 1 * x, x / 1, x - 0    x, when x is a number
+    --x                           x, when x is a number
+    !!x                           x, when x is a boolean, or anywhere in the condition of an `if`, `while`
+                                  or `for`
+    !!!x                          !x
+
+Numbers here are the results of arithmetic, as the operands of arithmetic are converted to floats:
+`x * 1` turns `"2"` into `2.0`. Likewise `x + 0` is kept, as it turns `-0.0` into `0.0`.
+"""
+import math
+from dataclasses import replace
+from typing import Any, Callable, Optional
+
+from pylox.ast.expression import IExpr, Literal, Grouping, Unary, UnaryOp, Binary, BinaryOp, Logical, LogicalOp
+from pylox.ast.statement import IfStmt, WhileStmt, ForStmt, Program
+from pylox.ast.visitor import Transformer
+from pylox.interpreter.error import LoxRuntimeError
+from pylox.interpreter.operators import is_truthy, unary, binary
+
+ARITHMETIC = frozenset({BinaryOp.ADD, BinaryOp.SUB, BinaryOp.MUL, BinaryOp.DIV})
+COMPARISON = frozenset({BinaryOp.GT, BinaryOp.GE, BinaryOp.LS, BinaryOp.LE, BinaryOp.NE, BinaryOp.EQ})
+
+
+def is_number(expr: IExpr) -> bool:
+    """Whether `expr` always evaluates to a float."""
+    if isinstance(expr, Binary):
+        return expr.operator in ARITHMETIC
+    if isinstance(expr, Unary):
+        return expr.operator is UnaryOp.NEG
+    return isinstance(expr, Literal) and type(expr.value) is float
+
+
+def is_boolean(expr: IExpr) -> bool:
+    """Whether `expr` always evaluates to `True` or `False`."""
+    if isinstance(expr, Binary):
+        return expr.operator in COMPARISON
+    if isinstance(expr, Unary):
+        return expr.operator is UnaryOp.NOT
+    return isinstance(expr, Literal) and type(expr.value) is bool
+
+
+def is_literal(expr: IExpr, value: int) -> bool:
+    """Whether `expr` is the number `value`, as a positive zero if `value` is 0."""
+    return (isinstance(expr, Literal) and type(expr.value) in (int, float)
+            and expr.value == value and math.copysign(1, expr.value) > 0)
+
+
+def is_not(expr: IExpr) -> bool:
+    return isinstance(expr, Unary) and expr.operator is UnaryOp.NOT
+
+
+def evaluate(operator: Callable[..., Any], *operands: object) -> Optional[Literal]:
+    """The literal result of an operator, or `None` if it fails and must fail at run time."""
+    try:
+        result = operator(*operands)
+    except (LoxRuntimeError, ArithmeticError, ValueError):
+        return None
+    return Literal(result.unwrap()) if result.is_ok() else None
+
+
+def condition(expr: IExpr) -> IExpr:
+    """`expr` with the double negations that do not change its truthiness removed."""
+    while is_not(expr) and is_not(expr.right):  # type: ignore[attr-defined]
+        expr = expr.right.right  # type: ignore[attr-defined]
+    return expr
+
+
+class ConstantFolder(Transformer):
+    __slots__ = ()
+
+    def visit_grouping(self, node: Grouping) -> IExpr:
+        return node.expression
+
+    def visit_unary(self, node: Unary) -> IExpr:
+        right = node.right
+        if isinstance(right, Literal):
+            return evaluate(unary, node.operator, right.value) or node
+
+        if isinstance(right, Unary) and right.operator is node.operator:
+            inner = right.right
+            if node.operator is UnaryOp.NEG and is_number(inner):
+                return inner
+            if node.operator is UnaryOp.NOT and (is_boolean(inner) or is_not(inner)):
+                return inner
+        return node
+
+    def visit_binary(self, node: Binary) -> IExpr:
+        left, op, right = node.left, node.operator, node.right
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            return evaluate(binary, op, left.value, right.value) or node
+
+        if op is BinaryOp.MUL:
+            if is_literal(right, 1) and is_number(left):
+                return left
+            if is_literal(left, 1) and is_number(right):
+                return right
+        elif op is BinaryOp.DIV and is_literal(right, 1) and is_number(left):
+            return left
+        elif op is BinaryOp.SUB and is_literal(right, 0) and is_number(left):
+            return left
+        return node
+
+    def visit_logical(self, node: Logical) -> IExpr:
+        left = node.left
+        if not isinstance(left, Literal):
+            return node
+        # `and` stops at a falsy left operand and `or` at a truthy one, and the result is that operand.
+        if is_truthy(left.value) == (node.operator is LogicalOp.OR):
+            return left
+        return node.right
+
+    def visit_if_stmt(self, node: IfStmt) -> IfStmt:
+        expr = condition(node.condition)
+        return node if expr is node.condition else replace(node, condition=expr)
+
+    def visit_while_stmt(self, node: WhileStmt) -> WhileStmt:
+        expr = condition(node.condition)
+        return node if expr is node.condition else replace(node, condition=expr)
+
+    def visit_for_stmt(self, node: ForStmt) -> ForStmt:
+        if node.condition is None:
+            return node
+        expr = condition(node.condition)
+        return node if expr is node.condition else replace(node, condition=expr)
+
+
+FOLDER = ConstantFolder()
+
+
+def fold_constants(program: Program) -> Program:
+    """`program` with its constant expressions evaluated and its trivial operations removed."""
+    return FOLDER.transform(program)
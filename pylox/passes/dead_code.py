@@ -0,0 +1,125 @@
+"""
+Dead-branch elimination.
+
+Statements whose conditions are literals are resolved at compile time: `if (True) a; else b;` becomes
+`a`, `if (False) a;` and `while (False) a;` disappear, and of `for (init; False; step) a;` only the
+initializer is left. Running after `pylox.passes.constant_fold` catches
+conditions such as `1 < 2` too.
+
+Blocks that are left empty, or that hold statements declaring nothing, are merged into the enclosing
+list of statements or replace the statement they were the body of. A block that holds a `var` keeps its
+own scope, so declarations never leak into the enclosing one.
+"""
+from dataclasses import replace
+from typing import Iterable, List, Optional, Tuple
+
+from pylox.ast.expression import IExpr, Literal
+from pylox.ast.statement import IStmt, VarDecl, Block, IfStmt, WhileStmt, ForStmt, Program
+from pylox.ast.visitor import Transformer, walk
+from pylox.interpreter.operators import is_truthy
+
+
+def size(node: Optional[IExpr | IStmt]) -> int:
+    """Number of nodes in the tree under `node`."""
+    return 0 if node is None else len(list(walk(node)))
+
+
+def declares(stmt: IStmt) -> bool:
+    """Whether running `stmt` defines a variable in the scope it runs in."""
+    if isinstance(stmt, VarDecl):
+        return True
+    if isinstance(stmt, IfStmt):
+        return declares(stmt.then_branch) or (stmt.else_branch is not None and declares(stmt.else_branch))
+    if isinstance(stmt, WhileStmt):
+        return declares(stmt.body)
+    return False
+
+
+class DeadCodeEliminator(Transformer):
+    __slots__ = ("removed",)
+
+    removed: int
+
+    def __init__(self) -> None:
+        self.removed = 0
+
+    def flatten(self, statements: Iterable[IStmt]) -> Optional[List[IStmt]]:
+        """`statements` with the blocks that declare nothing merged in, or `None` if there are none."""
+        flat: List[IStmt] = []
+        changed = False
+        for stmt in statements:
+            if isinstance(stmt, Block) and not any(declares(s) for s in stmt.statements):
+                flat.extend(stmt.statements)
+                self.removed += 1
+                changed = True
+            else:
+                flat.append(stmt)
+        return flat if changed else None
+
+    def body(self, stmt: Optional[IStmt]) -> IStmt:
+        """`stmt` as the body of a statement: a block of one statement that declares nothing is unwrapped."""
+        if stmt is None:  # A body removed altogether.
+            self.removed -= 1
+            return Block([])
+        if isinstance(stmt, Block) and len(stmt.statements) == 1 and not declares(stmt.statements[0]):
+            self.removed += 1
+            return stmt.statements[0]
+        return stmt
+
+    def visit_program(self, node: Program) -> Program:
+        flat = self.flatten(node.statements)
+        return node if flat is None else Program(flat)  # type: ignore[arg-type]
+
+    def visit_block(self, node: Block) -> Block:
+        flat = self.flatten(node.statements)
+        return node if flat is None else Block(flat)
+
+    def visit_if_stmt(self, node: IfStmt) -> Optional[IStmt]:
+        condition = node.condition
+        if isinstance(condition, Literal):
+            taken: Optional[IStmt] = node.then_branch
+            dropped = node.else_branch
+            if not is_truthy(condition.value):
+                taken, dropped = dropped, taken
+            self.removed += 1 + size(condition) + size(dropped)
+            return taken
+
+        then_branch = self.body(node.then_branch)
+        else_branch = node.else_branch
+        if isinstance(else_branch, Block) and not else_branch.statements:
+            self.removed += 1
+            else_branch = None
+        elif else_branch is not None:
+            else_branch = self.body(else_branch)
+
+        if then_branch is node.then_branch and else_branch is node.else_branch:
+            return node
+        return IfStmt(condition, then_branch, else_branch)
+
+    def visit_while_stmt(self, node: WhileStmt) -> Optional[IStmt]:
+        condition = node.condition
+        if isinstance(condition, Literal) and not is_truthy(condition.value):
+            self.removed += size(node)
+            return None
+
+        body = self.body(node.body)
+        return node if body is node.body else WhileStmt(condition, body)
+
+    def visit_for_stmt(self, node: ForStmt) -> Optional[IStmt]:
+        condition = node.condition
+        if isinstance(condition, Literal) and not is_truthy(condition.value):
+            # The initializer still runs, in a scope of its own if it declares a variable.
+            init = node.init
+            if init is not None and declares(init):
+                init = Block([init])
+            self.removed += size(node) - size(init)
+            return init
+
+        body = self.body(node.body)
+        return node if body is node.body else replace(node, body=body)
+
+
+def eliminate_dead_code(program: Program) -> Tuple[Program, int]:
+    """`program` without the branches that can never run, and the number of nodes removed."""
+    eliminator = DeadCodeEliminator()
+    return eliminator.transform(program), eliminator.removed
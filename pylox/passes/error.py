@@ -0,0 +1,17 @@
+from enum import Enum
+from typing import Optional
+
+
+class ErrorKinds(Enum):
+    UNDEFINED_VARIABLE = "Undefined variable"
+    TOO_MANY_VARIABLES = "Too many variables in one block"
+    TOO_DEEPLY_NESTED = "Variable declared too many blocks out"
+
+
+class ResolveError(Exception):
+    def __init__(self, kind: ErrorKinds, name: Optional[str] = None):
+        self.kind = kind
+        self.name = name
+
+    def __str__(self) -> str:
+        return f"{self.kind.value} '{self.name}'" if self.name is not None else self.kind.value
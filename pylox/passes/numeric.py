@@ -0,0 +1,166 @@
+"""
+Numeric specialization.
+
+Arithmetic and ordering operators convert both operands to floats before applying the operator. Where
+the operands are known to be numbers already, the interpreter can apply the operator directly, so this
+pass marks those `Binary` nodes as `numeric`.
+
+Numbers here are floats, and ints small enough to convert to floats exactly, on which the operators give
+the same results as on the converted operands. An expression is known to be a number if it is such a
+literal or the result of arithmetic or negation; bools and strings are not numbers. A local variable is
+known to be a number if every value written to it is, which is settled for all variables together, so
+that `i = i + 1` keeps `i` a number. Globals may be written by any program run in the same interpreter
+and are never known.
+
+The pass needs the addresses of `pylox.passes.resolver`, so it runs after it.
+"""
+from dataclasses import replace
+from typing import FrozenSet, List, Optional, Set
+
+from pylox.ast.expression import IExpr, Literal, Identifier, Grouping, Unary, UnaryOp, Binary, BinaryOp, Logical
+from pylox.ast.statement import IStmt, Assignment, VarDecl, Block, ForStmt, Program
+from pylox.ast.visitor import Transformer
+from pylox.passes.constant_fold import ARITHMETIC
+
+ORDERING = frozenset({BinaryOp.GT, BinaryOp.GE, BinaryOp.LS, BinaryOp.LE})
+
+# Ints beyond this may not have an exact float.
+MAX_EXACT = 1 << 53
+
+# What an expression is known to be a number on: the local variables that must be numbers, or `None`
+# if it is not known to be one at all.
+Condition = Optional[FrozenSet[int]]
+_ALWAYS: Condition = frozenset()
+
+
+def is_number(value: object) -> bool:
+    return type(value) is float or type(value) is int and -MAX_EXACT <= value <= MAX_EXACT
+
+
+def both(a: Condition, b: Condition) -> Condition:
+    return None if a is None or b is None else a | b
+
+
+class Inference(Transformer):
+    """Collects what the values written to each local variable of a resolved program are numbers on."""
+
+    __slots__ = ("scopes", "writes", "conditions")
+
+    shared = False
+
+    # The variable in each slot of each enclosing frame, numbered in declaration order.
+    scopes: List[List[int]]
+    # Conditions of the values written to each variable.
+    writes: List[List[Condition]]
+    # Conditions of the expressions visited so far, by the id of the node that replaced them, which is
+    # different for every occurrence of a shared subtree.
+    conditions: dict[int, Condition]
+
+    def __init__(self) -> None:
+        self.scopes = []
+        self.writes = []
+        self.conditions = {}
+
+    def condition(self, expr: Optional[IExpr]) -> Condition:
+        return None if expr is None else self.conditions.get(id(expr))
+
+    def variable(self, hops: int, slot: int) -> int:
+        return self.scopes[-1 - hops][slot]
+
+    def enter(self, node: IExpr | IStmt) -> None:
+        if isinstance(node, (Block, ForStmt)) and node.slots > 0:
+            self.scopes.append([-1] * node.slots)
+
+    def leave(self, node: Block | ForStmt) -> Block | ForStmt:
+        if node.slots > 0:
+            self.scopes.pop()
+        return node
+
+    def visit_block(self, node: Block) -> Block | ForStmt:
+        return self.leave(node)
+
+    def visit_for_stmt(self, node: ForStmt) -> Block | ForStmt:
+        return self.leave(node)
+
+    def visit_literal(self, node: Literal) -> IExpr:
+        if is_number(node.value):
+            self.conditions[id(node)] = _ALWAYS
+        return node
+
+    def visit_identifier(self, node: Identifier) -> IExpr:
+        if node.hops >= 0:
+            self.conditions[id(node)] = frozenset({self.variable(node.hops, node.slot)})
+        return node
+
+    def visit_grouping(self, node: Grouping) -> IExpr:
+        self.conditions[id(node)] = self.condition(node.expression)
+        return node
+
+    def visit_unary(self, node: Unary) -> IExpr:
+        if node.operator is UnaryOp.NEG:
+            self.conditions[id(node)] = _ALWAYS
+        return node
+
+    def visit_binary(self, node: Binary) -> IExpr:
+        if node.operator in ARITHMETIC:
+            self.conditions[id(node)] = _ALWAYS
+        return node
+
+    def visit_logical(self, node: Logical) -> IExpr:
+        # The result is one of the operands.
+        self.conditions[id(node)] = both(self.condition(node.left), self.condition(node.right))
+        return node
+
+    def visit_var_decl(self, node: VarDecl) -> IStmt:
+        if node.slot >= 0:
+            self.scopes[-1][node.slot] = len(self.writes)
+            self.writes.append([self.condition(node.init)])
+        return node
+
+    def visit_assignment(self, node: Assignment) -> IStmt:
+        if node.hops >= 0:
+            self.writes[self.variable(node.hops, node.slot)].append(self.condition(node.value))
+        return node
+
+
+def solve(writes: List[List[Condition]]) -> Set[int]:
+    """The variables that are numbers: those only ever written numbers, given the others that are."""
+    numbers = set(range(len(writes)))
+    changed = True
+    while changed:
+        changed = False
+        for variable, conditions in enumerate(writes):
+            if variable in numbers and not all(c is not None and c <= numbers for c in conditions):
+                numbers.discard(variable)
+                changed = True
+    return numbers
+
+
+class Specializer(Inference):
+    """Marks the numeric `Binary` nodes, given the variables `Inference` found to be numbers."""
+
+    __slots__ = ("numbers",)
+
+    numbers: Set[int]
+
+    def __init__(self, numbers: Set[int]) -> None:
+        super().__init__()
+        self.numbers = numbers
+
+    def is_number(self, expr: IExpr) -> bool:
+        condition = self.condition(expr)
+        return condition is not None and condition <= self.numbers
+
+    def visit_binary(self, node: Binary) -> IExpr:
+        numeric = ((node.operator in ARITHMETIC or node.operator in ORDERING)
+                   and self.is_number(node.left) and self.is_number(node.right))
+        if numeric != node.numeric:
+            node = replace(node, numeric=numeric)
+        return super().visit_binary(node)
+
+
+def specialize(program: Program) -> Program:
+    """`program`, resolved, with the operators whose operands are known to be numbers marked."""
+    inference = Inference()
+    inference.transform(program)
+    return Specializer(solve(inference.writes)).transform(program)
@@ -0,0 +1,147 @@
+"""
+Static resolution of local variables.
+
+Every block that declares variables gets a frame at run time, with one slot per declaration, and so does
+every `for` whose initializer declares its loop variable. The resolver numbers the declarations of each
+block, records the count on the `Block` or `ForStmt`, and gives each
+`Identifier` and `Assignment` that refers to a local the address of its variable: how many frames out
+it lives, and its slot there. Blocks that declare nothing get no frame and are not counted as hops.
+
+Scopes follow the runtime: a variable is visible from the end of its declaration to the end of its
+block, so `var a = a;` reads an outer `a`, and a second `var a` in the same block takes a new slot that
+shadows the first from then on. Names that are not local are globals, which stay late-bound and are
+looked up by name. If the globals that exist before the program runs are given, a name that is neither
+one of them nor declared at the top level before its use is reported as a `ResolveError`. A program
+that is already resolved can be checked against other globals with `check_globals`.
+"""
+from dataclasses import replace
+from typing import Iterable, List, Optional, Set
+
+from pylox.ast.arena import MAX_HOPS, MAX_SLOT
+from pylox.ast.expression import IExpr, Identifier
+from pylox.ast.statement import IStmt, Assignment, VarDecl, Block, ForStmt, Program
+from pylox.ast.visitor import Transformer
+from pylox.passes.dead_code import declares
+from pylox.passes.error import ErrorKinds, ResolveError
+
+
+class Scope:
+    __slots__ = ("names", "count")
+
+    def __init__(self) -> None:
+        self.names: dict[str, int] = {}
+        self.count = 0
+
+
+class Resolver(Transformer):
+    __slots__ = ("scopes", "globals")
+
+    shared = False
+
+    # One entry per enclosing block or `for`, `None` for those without a frame.
+    scopes: List[Optional[Scope]]
+    # Globals declared so far, or `None` if they are not checked.
+    globals: Optional[Set[str]]
+
+    def __init__(self, known: Optional[Iterable[str]] = None) -> None:
+        self.scopes = []
+        self.globals = None if known is None else set(known)
+
+    def lookup(self, name: str) -> tuple[int, int]:
+        """Hops and slot of the variable `name` refers to here, with -1 hops for globals."""
+        hops = 0
+        for scope in reversed(self.scopes):
+            if scope is None:
+                continue
+            slot = scope.names.get(name)
+            if slot is not None:
+                if hops > MAX_HOPS:
+                    raise ResolveError(ErrorKinds.TOO_DEEPLY_NESTED, name)
+                return hops, slot
+            hops += 1
+
+        if self.globals is not None and name not in self.globals:
+            raise ResolveError(ErrorKinds.UNDEFINED_VARIABLE, name)
+        return -1, -1
+
+    def enter(self, node: IExpr | IStmt) -> None:
+        if isinstance(node, Block):
+            self.scopes.append(Scope() if any(declares(stmt) for stmt in node.statements) else None)
+        elif isinstance(node, ForStmt):
+            init = node.init
+            self.scopes.append(Scope() if init is not None and declares(init) or declares(node.body) else None)
+
+    def visit_block(self, node: Block) -> Block:
+        scope = self.scopes.pop()
+        return replace(node, slots=0 if scope is None else scope.count)
+
+    def visit_for_stmt(self, node: ForStmt) -> ForStmt:
+        scope = self.scopes.pop()
+        return replace(node, slots=0 if scope is None else scope.count)
+
+    def visit_var_decl(self, node: VarDecl) -> VarDecl:
+        # The initializer has been resolved already, so it cannot see the variable it declares.
+        scope = self.scopes[-1] if self.scopes else None
+        if scope is None:
+            if self.globals is not None:
+                self.globals.add(node.name)
+            return node if node.slot == -1 else replace(node, slot=-1)
+
+        if scope.count > MAX_SLOT:
+            raise ResolveError(ErrorKinds.TOO_MANY_VARIABLES, node.name)
+        slot = scope.names[node.name] = scope.count
+        scope.count += 1
+        return replace(node, slot=slot)
+
+    def visit_identifier(self, node: Identifier) -> Identifier:
+        hops, slot = self.lookup(node.name)
+        return node if (hops, slot) == (node.hops, node.slot) else replace(node, hops=hops, slot=slot)
+
+    def visit_assignment(self, node: Assignment) -> Assignment:
+        hops, slot = self.lookup(node.name)
+        return node if (hops, slot) == (node.hops, node.slot) else replace(node, hops=hops, slot=slot)
+
+
+def resolve(program: Program, known: Optional[Iterable[str]] = None) -> Program:
+    """`program` with the addresses of its local variables filled in.
+
+    `known` are the globals defined before the program runs; if given, uses of other undeclared names
+    raise `ResolveError`.
+    """
+    return Resolver(known).transform(program)
+
+
+class GlobalsChecker(Transformer):
+    """Reports the first global a resolved program uses before it is declared or known to exist."""
+
+    __slots__ = ("globals",)
+
+    globals: Set[str]
+
+    def __init__(self, known: Iterable[str]) -> None:
+        self.globals = set(known)
+
+    def check(self, name: str, hops: int) -> None:
+        if hops < 0 and name not in self.globals:
+            raise ResolveError(ErrorKinds.UNDEFINED_VARIABLE, name)
+
+    def visit_var_decl(self, node: VarDecl) -> VarDecl:
+        if node.slot < 0:
+            self.globals.add(node.name)
+        return node
+
+    def visit_identifier(self, node: Identifier) -> Identifier:
+        self.check(node.name, node.hops)
+        return node
+
+    def visit_assignment(self, node: Assignment) -> Assignment:
+        self.check(node.name, node.hops)
+        return node
+
+
+def check_globals(program: Program, known: Iterable[str]) -> Program:
+    """`program`, resolved, if it only uses the globals `known` and the ones it declares before their use.
+
+    Raises the `ResolveError` that `resolve(program, known)` would have.
+    """
+    return GlobalsChecker(known).transform(program)
@@ -1,5 +1,19 @@
-from pylox.ast.printer import format_ast
+import dataclasses
+import io
+from pathlib import Path
+
+import pytest
+
+from pylox.ast import serialize
+from pylox.ast.arena import Arena, KIND_IDS, LazyNodes
+from pylox.ast.expression import IExpr, Literal, Grouping, Binary, BinaryOp, Identifier, Unary, UnaryOp
+from pylox.ast.hashcons import InternTable, hashcons
+from pylox.ast.visitor import Visitor, method_name
+from pylox.ast.printer import format_ast, write_ast, PRINTER
+from pylox.ast.statement import Program, ExprStmt, VarDecl, WhileStmt, Block, IfStmt
 from pylox.lexer.lexer import tokenize
+from pylox.lexer.symbols import SymbolTable
+from pylox.parser.parser import parse
 
 
 def test_printer() -> None:
@@ -25,3 +39,162 @@ def test_printer() -> None:
     result = format_ast(tokens).unwrap_or_raise()
 
     assert result == expected
+
+
+PROGRAM = """
+var x = 1; var s = "s"; var t = True;
+while (x < 10 and !t) { x = x * (2 + -x); if (x == 1.0) x = None; else { f(x, g(s)(1), h()); } }
+for (var i = 0; i < 10; i = i + 1) print(i);
+"""
+
+
+def test_nodes_are_slotted_and_frozen() -> None:
+    program = parse(tokenize(PROGRAM).unwrap()).unwrap()
+    decl = program.statements[0]
+    assert isinstance(decl, VarDecl)
+    assert not hasattr(decl, "__dict__") and not hasattr(decl.init, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        decl.name = "y"  # type: ignore[misc]
+
+
+def test_arena_round_trip() -> None:
+    program = parse(tokenize(PROGRAM, symbols=SymbolTable()).unwrap()).unwrap()
+    arena = Arena.from_node(program)
+    assert arena.program() == program
+
+    decl = arena.program().statements[0]
+    assert isinstance(decl, VarDecl) and decl.symbol == 0
+    # 1, 1.0 and True stay distinct constants.
+    assert [type(v) for v in arena.constants if v == 1] == [int, bool, float]
+
+    # Every node heads its own subtree.
+    while_index = arena.kinds.index(KIND_IDS[WhileStmt])
+    assert arena.node(while_index) == program.statements[3]
+    assert arena.node(arena.ends[0] - 1) == Identifier("i")  # the last leaf, from `print(i)`
+
+
+def test_arena_deep_tree() -> None:
+    expr: IExpr = Literal(1)
+    for _ in range(100_000):
+        expr = Grouping(expr)
+    arena = Arena.from_node(Program([ExprStmt(expr)]))
+    assert len(arena) == 100_003 and arena.ends[2] == 100_003
+    assert isinstance(arena.node(100_000), Grouping)
+
+    with pytest.raises(TypeError):
+        Arena.from_node(expr).program()
+
+
+def test_serialize_round_trip(tmp_path: Path) -> None:
+    program = parse(tokenize(PROGRAM + 'x = 123456789012345678901234567890 + "ünïcode" + 0.5;').unwrap()).unwrap()
+    assert serialize.loads(serialize.dumps(program)) == program
+
+    path = tmp_path / "program.loxa"
+    serialize.dump(program, path)
+    assert serialize.load(path) == program
+
+    buffer = io.BytesIO()
+    serialize.dump(program, buffer)
+    buffer.seek(0)
+    assert serialize.load(buffer) == program
+
+
+def test_serialize_lazy_blocks() -> None:
+    program = serialize.loads(serialize.dumps(parse(tokenize(PROGRAM).unwrap()).unwrap()))
+    loop = program.statements[3]
+    assert isinstance(loop, WhileStmt) and isinstance(loop.body, Block)
+
+    body = loop.body.statements
+    assert isinstance(body, LazyNodes) and not body.loaded and len(body) == 2
+    assert isinstance(body[1], IfStmt) and body.loaded
+
+    # The nested block is rebuilt only when it is reached.
+    else_branch = body[1].else_branch
+    assert isinstance(else_branch, Block) and isinstance(else_branch.statements, LazyNodes)
+    assert not else_branch.statements.loaded
+
+
+def test_serialize_errors() -> None:
+    data = serialize.dumps(Program([ExprStmt(Literal(1))]))
+    for corrupt in [b"", b"LOXB" + data[4:], data[:4] + b"\xff\xff" + data[6:], data[:-1]]:
+        with pytest.raises(ValueError):
+            serialize.loads(corrupt)
+    with pytest.raises(ValueError):
+        serialize.dumps(Program([ExprStmt(Literal(object()))]))
+
+
+def test_hashcons_shares_equal_subtrees() -> None:
+    program = parse(tokenize(PROGRAM * 2).unwrap()).unwrap()
+    table = InternTable()
+    interned = table.intern(program)
+    assert interned == program
+
+    # The second copy of the program is made of the nodes of the first.
+    half = len(interned.statements) // 2
+    assert all(a is b for a, b in zip(interned.statements[:half], interned.statements[half:]))
+    assert table.intern(program) is interned
+
+    # Values of different types, or floats of different signs, stay apart.
+    literals = [table.intern(Literal(v)) for v in (1, 1.0, True, 0.0, -0.0)]
+    assert len({id(literal) for literal in literals}) == 5
+    assert table.intern(Identifier("x", 0)) is not table.intern(Identifier("x", 1))
+
+
+def test_hashcons_is_weak_and_iterative() -> None:
+    table = InternTable()
+    expr: IExpr = Identifier("x", 0)
+    for _ in range(100_000):
+        expr = Unary(UnaryOp.NEG, Binary(expr, BinaryOp.ADD, Literal(1)))
+    interned = table.intern(expr)
+    assert len(table) == 200_002
+    assert isinstance(interned, Unary) and isinstance(interned.right, Binary)
+    assert interned.right.right is table.intern(Literal(1))
+
+    del expr, interned
+    assert len(table) == 0
+
+    # Lazily loaded blocks are interned too.
+    loaded = serialize.loads(serialize.dumps(parse(tokenize(PROGRAM).unwrap()).unwrap()))
+    assert hashcons(loaded, table) == loaded
+
+
+def test_visitor_dispatch() -> None:
+    class Counter(Visitor[int]):
+        def visit_literal(self, node: Literal) -> int:
+            return 1
+
+        def visit_binary(self, node: Binary) -> int:
+            return 1 + self.visit(node.left) + self.visit(node.right)
+
+    assert method_name(WhileStmt) == "visit_while_stmt"
+    assert set(Counter.dispatch) == {Literal, Binary}
+    assert Counter().visit(Binary(Literal(1), BinaryOp.ADD, Binary(Literal(2), BinaryOp.MUL, Literal(3)))) == 5
+    with pytest.raises(TypeError):
+        Counter().visit(Grouping(Literal(1)))
+
+    # The printer formats single nodes with the rules of `write_ast` and reports nodes it does not know as errors.
+    assert PRINTER.visit(Grouping(Literal(1))).unwrap() == "(group 1)"
+    assert PRINTER.visit(Identifier("x", 0)).unwrap() == "x"
+    assert PRINTER.visit(object()).is_err()  # type: ignore[arg-type]
+
+
+def test_write_ast() -> None:
+    program = parse(tokenize(PROGRAM + "if (x) {} else {} f();").unwrap()).unwrap()
+    expected = "\n".join(PRINTER.visit(stmt).unwrap() for stmt in program.statements)
+    assert format_ast(program).unwrap() == expected
+    assert expected.splitlines()[4].startswith("(for (var i 0) (< i 10) (= i (+ i 1)) (call ")
+
+    out = io.StringIO()
+    write_ast(program, out)
+    assert out.getvalue() == expected + "\n"
+
+    # Deep trees are written without recursing.
+    expr: IExpr = Literal(1)
+    for _ in range(100_000):
+        expr = Unary(UnaryOp.NOT, expr)
+    out = io.StringIO()
+    write_ast(Program([ExprStmt(expr)]), out)
+    assert out.getvalue() == "(! " * 100_000 + "1" + ")" * 100_000 + "\n"
+
+    with pytest.raises(ValueError):
+        write_ast(Program([object()]), io.StringIO())  # type: ignore[list-item]
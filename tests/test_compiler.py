@@ -0,0 +1,112 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from pylox import compiler
+from pylox.ast import serialize
+from pylox.cache import disk
+from pylox.cache.disk import DiskCache
+from pylox.cache.memory import MemoryCache, CacheInfo
+from pylox.lexer.lexer import tokenize
+from pylox.parser.error import ParseError
+from pylox.parser.parser import parse
+
+SCRIPT = 'var x = 1;\nwhile (x < 10) { x = x * (2 + x); }\nif (!x) x = 1; else x;\n'
+
+
+def no_front_end(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("the front end ran on a cache hit")
+
+    monkeypatch.setattr(compiler, "tokenize", fail)
+    monkeypatch.setattr(compiler, "parse", fail)
+
+
+def test_compile_source() -> None:
+    assert compiler.compile_source(SCRIPT).unwrap() == parse(tokenize(SCRIPT).unwrap()).unwrap()
+    assert isinstance(compiler.compile_source('x = ;').unwrap_err(), ParseError)
+
+
+def test_compile_source_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = DiskCache(tmp_path)
+    program = compiler.compile_source(SCRIPT, cache, memory=None).unwrap()
+
+    no_front_end(monkeypatch)
+    assert compiler.compile_source(SCRIPT, cache, memory=None).unwrap() == program
+
+
+def test_compile_file_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    script, cache = tmp_path / "script.lox", DiskCache(tmp_path / "cache")
+    script.write_text(SCRIPT)
+    program = compiler.compile_file(script, cache).unwrap()
+    assert program == compiler.compile_file(script).unwrap()
+
+    with monkeypatch.context() as m:
+        no_front_end(m)
+        m.setattr(DiskCache, "key", staticmethod(lambda source: pytest.fail("hashed an unchanged script")))
+        assert compiler.compile_file(script, cache).unwrap() == program
+
+    # A touched but unchanged script is hashed and found again.
+    os.utime(script, ns=(0, 0))
+    with monkeypatch.context() as m:
+        no_front_end(m)
+        assert compiler.compile_file(script, cache).unwrap() == program
+
+    script.write_text(SCRIPT + 'x = 2;\n')
+    assert len(compiler.compile_file(script, cache).unwrap().statements) == len(program.statements) + 1
+
+
+def test_cache_invalidation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = DiskCache(tmp_path)
+    key = cache.key(SCRIPT.encode())
+    compiler.compile_source(SCRIPT, cache, memory=None)
+    assert cache.load(key) is not None
+
+    monkeypatch.setattr(disk, "__version__", "0.0.0-other")
+    assert cache.key(SCRIPT.encode()) != key
+
+    (tmp_path / (key.hex() + ".ast")).write_bytes(serialize.MAGIC + b"garbage")
+    assert cache.load(key) is None
+    assert compiler.compile_source(SCRIPT, DiskCache(tmp_path / "missing")).is_ok()
+
+
+def test_memory_cache() -> None:
+    cache = MemoryCache(maxsize=2)
+    a, b, c = (compiler.compile_source(text, memory=None).unwrap() for text in ('a;', 'b;', 'c;'))
+    cache.put('a;', a)
+    cache.put('b;', b)
+    assert cache.get('a;') is a
+    cache.put('c;', c)  # evicts `b;`, the least recently used
+
+    assert 'b;' not in cache and cache.get('b;') is None
+    assert cache.get('c;') is c
+    assert cache.info() == CacheInfo(hits=2, misses=1, evictions=1, size=2, maxsize=2)
+
+    cache.clear()
+    assert cache.info() == CacheInfo(hits=0, misses=0, evictions=0, size=0, maxsize=2)
+    with pytest.raises(ValueError):
+        MemoryCache(maxsize=0)
+
+
+def test_compile_source_memory(monkeypatch: pytest.MonkeyPatch) -> None:
+    memory = MemoryCache()
+    program = compiler.compile_source(SCRIPT, memory=memory).unwrap()
+    assert compiler.compile_source('x = ;', memory=memory).is_err()
+
+    no_front_end(monkeypatch)
+    assert compiler.compile_source(SCRIPT, memory=memory).unwrap() is program
+    assert memory.info() == CacheInfo(hits=1, misses=2, evictions=0, size=1, maxsize=memory.maxsize)
+
+
+def test_optimize_levels(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    memory, cache = MemoryCache(), DiskCache(tmp_path)
+    plain = compiler.compile_source(SCRIPT, cache, memory).unwrap()
+    folded = compiler.compile_source(SCRIPT, cache, memory, optimize=1).unwrap()
+    assert folded != plain and folded == compiler.optimize(plain, 1)
+    assert SCRIPT in memory and (SCRIPT, 1) in memory
+    assert cache.key(SCRIPT.encode(), 1) != cache.key(SCRIPT.encode())
+
+    no_front_end(monkeypatch)
+    assert compiler.compile_source(SCRIPT, cache, memory=None, optimize=1).unwrap() == folded
+    assert compiler.compile_source(SCRIPT, memory=memory, optimize=1).unwrap() is folded
@@ -1,5 +1,17 @@
-from pylox.lexer.error import ErrorKinds
-from pylox.lexer.lexer import tokenize
+import io
+import mmap
+import random
+from pathlib import Path
+
+import pytest
+
+from pylox.lexer.buffer import TokenBuffer
+from pylox.lexer.bytes_lexer import tokenize_bytes
+from pylox.lexer.error import ErrorKinds, LexicalError
+from pylox.lexer.incremental import Edit, relex
+from pylox.lexer.lexer import tokenize, tokenize_iter
+from pylox.lexer.lines import LineIndex
+from pylox.lexer.symbols import SymbolTable
 from pylox.lexer.tokens import TokenType, Token
 
 
@@ -77,3 +89,203 @@ def test_parse_punctuation() -> None:
     token = result.unwrap()[0]
     assert token.type == TokenType.EQUAL_EQUAL
     assert token.value == '=='
+
+
+PARITY_SOURCES = [
+    'var x = 123.45; "hello world";',
+    'if (a <= b) { a = a + 1; } else { b = b - 1.; }',
+    'while (!done and i != 10 or False) i = i * 2 / 3;',
+    'print(foo_bar1, _x, "multi\nline\nstring", None, True);\n\n  x >= y == z > 1.5 < 2',
+    'var café = 1; @weird #tokens;',
+    '',
+    '   \n\t  ',
+]
+
+
+def test_regex_engine_parity() -> None:
+    for input_ in PARITY_SOURCES:
+        assert tokenize(input_, engine="regex") == tokenize(input_)
+
+
+def test_regex_engine_error_parity() -> None:
+    for input_ in ['123.45.67; "x"', '1;\n"unterminated\nstring', '1..2']:
+        expected = tokenize(input_).unwrap_err()
+        error = tokenize(input_, engine="regex").unwrap_err()
+        assert error.kind == expected.kind
+        assert error.source is not None and expected.source is not None
+        assert (error.source.current, error.source.line) == (expected.source.current, expected.source.line)
+        assert error.position == expected.position
+
+
+def test_tokenize_iter_chunk_boundaries() -> None:
+    input_ = 'var x = 12.5;\nif (x <= 100) { "a\nlong string"; y = x >= 1 != True; }  \n'
+    expected = tokenize(input_).unwrap()
+
+    for chunk_size in (1, 2, 3, 7, 64):
+        assert list(tokenize_iter(io.StringIO(input_), chunk_size=chunk_size)) == expected
+
+
+def test_tokenize_iter_errors() -> None:
+    with pytest.raises(LexicalError) as err:
+        list(tokenize_iter(io.StringIO('1.2.3'), chunk_size=2))
+    assert err.value.kind == ErrorKinds.MALFORMED_NUMBER
+
+    with pytest.raises(LexicalError) as err:
+        list(tokenize_iter(io.StringIO('"unterminated'), chunk_size=2))
+    assert err.value.kind == ErrorKinds.UNTERMINATED_STRING_LITERAL
+
+    with pytest.raises(LexicalError) as err:
+        list(tokenize_iter(io.StringIO('var abc;\nvar long_name = 1.2.3;'), chunk_size=4))
+    assert err.value.position == (2, 20)
+
+
+def test_tokenize_iter_path_and_mmap(tmp_path: Path) -> None:
+    input_ = 'var café = "naïve";\nwhile (café < 10) café = café + 1;'
+    path = tmp_path / "input.lox"
+    path.write_text(input_, encoding="utf-8")
+    expected = tokenize(input_).unwrap()
+
+    assert list(tokenize_iter(path, chunk_size=5)) == expected
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        assert list(tokenize_iter(mm, chunk_size=3)) == expected
+
+
+def test_tokenize_iter_crlf(tmp_path: Path) -> None:
+    input_ = 'var a = 1;\r\nvar b = "x\r\ny";\r\n'
+    path = tmp_path / "input.lox"
+    path.write_bytes(input_.encode("utf-8"))
+    expected = tokenize(input_).unwrap()
+
+    from_path = list(tokenize_iter(path, chunk_size=4))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        from_mmap = list(tokenize_iter(mm, chunk_size=4))
+    assert from_path == from_mmap == expected
+    assert [t.span for t in from_path] == [t.span for t in from_mmap] == [t.span for t in expected]
+    assert from_path[5].span == (12, 15)  # the second `var`
+
+
+def test_token_buffer_round_trip() -> None:
+    input_ = 'var x = 1.5;\nif (x >= 2) { "a\nb"; x = x + 10; } else None;'
+    tokens = tokenize(input_).unwrap()
+    buffer = TokenBuffer.from_tokens(tokens)
+
+    assert len(buffer) == len(tokens)
+    assert list(buffer) == tokens
+    assert buffer[3] == tokens[3]
+    assert buffer[-1] == tokens[-1]
+    assert buffer.type_at(5) == tokens[5].type
+    assert buffer.value_at(3) == 1.5
+    # Only identifiers, strings and numbers need a slot in the side table.
+    assert buffer.literals == ['x', 1.5, 'x', 2, 'a\nb', 'x', 'x', 10]
+
+
+def test_relex_rejects_byte_spans() -> None:
+    tokens = tokenize_bytes(b'var a = 1;').unwrap()
+    error = relex(tokens, 'var a = 12;', Edit(9, 0, '2')).unwrap_err()
+    assert isinstance(error, LexicalError) and error.kind is ErrorKinds.BYTE_SPANS
+    with pytest.raises(TypeError):
+        tokens.splice(0, 0, [], 0, 0)
+
+
+def test_relex_matches_full_tokenize() -> None:
+    rng = random.Random(4)
+    text = 'var x = 12.5;\nwhile (x <= 100) {\n  "a\nb"; x = x * 2 + foo(y, 3);\n}\nif (x != 1) y = x;'
+    tokens = tokenize(text).unwrap()
+    buffer = TokenBuffer.from_tokens(tokens)
+    fragments = ['', ' ', '\n', '=', '<', '1', '.5', 'abc', '"', '"q\n"', ';', 'var z = 1;\n', '//', '/*', '*/']
+
+    for _ in range(500):
+        offset = rng.randrange(len(text) + 1)
+        edit = Edit(offset, rng.randrange(min(4, len(text) - offset) + 1), rng.choice(fragments))
+        new_text = edit.apply(text)
+        expected = tokenize(new_text, engine="regex")
+
+        if expected.is_err():
+            assert relex(tokens, new_text, edit).is_err()
+            continue
+
+        tokens = relex(tokens, new_text, edit).unwrap()
+        buffer = relex(buffer, new_text, edit).unwrap()
+        assert tokens == expected.unwrap()
+        assert buffer == tokens
+        assert buffer.literals == TokenBuffer.from_tokens(tokens).literals
+        text = new_text
+
+
+def test_line_index() -> None:
+    lines = LineIndex('ab\n\ncd\n')
+    assert len(lines) == 4
+    assert [lines.position(i) for i in range(8)] == [
+        (1, 1), (1, 2), (1, 3), (2, 1), (3, 1), (3, 2), (3, 3), (4, 1),
+    ]
+
+
+def test_error_position() -> None:
+    error = tokenize('var x = 1;\n  y = 1.2.3;').unwrap_err()
+    assert error.position == (2, 10)
+    assert str(error) == "Invalid number literal @ 2:10"
+
+
+def test_tokenize_bytes() -> None:
+    input_ = 'var x = 12.5;\nwhile (x <= 100) {\n  "a\nb"; x = foo(y, 3); andy and False;\n}'
+    expected = tokenize(input_).unwrap()
+
+    for data in (input_.encode(), memoryview(input_.encode())):
+        buffer = tokenize_bytes(data).unwrap()
+        assert buffer.literals == []  # nothing is decoded until asked for
+        assert list(buffer) == expected
+        assert buffer.literals == ['x', 12.5, 'x', 100, 'a\nb', 'x', 'foo', 'y', 3, 'andy']
+
+
+def test_tokenize_bytes_utf8_spans() -> None:
+    buffer = tokenize_bytes('"café" naïve'.encode()).unwrap()
+    assert [(t.value, t.span) for t in buffer] == [('café', (0, 6)), ('naïve', (8, 14))]
+
+
+def test_tokenize_bytes_errors() -> None:
+    error = tokenize_bytes(b'var x = 1;\n  y = 1.2.3;').unwrap_err()
+    assert (error.kind, error.position) == (ErrorKinds.MALFORMED_NUMBER, (2, 10))
+
+    error = tokenize_bytes(b'1;\n"unterminated\nstring').unwrap_err()
+    assert (error.kind, error.position) == (ErrorKinds.UNTERMINATED_STRING_LITERAL, (3, 7))
+
+
+def test_comments() -> None:
+    input_ = 'a // line comment\nb /* block\ncomment */ c/**/d / e'
+    expected = [
+        Token(type=TokenType.IDENTIFIER, value='a', lineno=1, span=(0, 1)),
+        Token(type=TokenType.IDENTIFIER, value='b', lineno=2, span=(18, 19)),
+        Token(type=TokenType.IDENTIFIER, value='c', lineno=3, span=(40, 41)),
+        Token(type=TokenType.IDENTIFIER, value='d', lineno=3, span=(45, 46)),
+        Token(type=TokenType.SLASH, value='/', lineno=3, span=(47, 48)),
+        Token(type=TokenType.IDENTIFIER, value='e', lineno=3, span=(49, 50)),
+    ]
+    assert tokenize(input_).unwrap() == expected
+    assert tokenize(input_, engine="regex").unwrap() == expected
+    assert list(tokenize_bytes(input_.encode()).unwrap()) == expected
+    assert list(tokenize_iter(io.StringIO(input_), chunk_size=3)) == expected
+
+
+def test_unterminated_comment() -> None:
+    input_ = 'x;\n/* never\nclosed'
+    for error in (
+            tokenize(input_).unwrap_err(),
+            tokenize(input_, engine="regex").unwrap_err(),
+            tokenize_bytes(input_.encode()).unwrap_err(),
+    ):
+        assert (error.kind, error.position) == (ErrorKinds.UNTERMINATED_COMMENT, (3, 7))
+
+
+def test_symbol_interning() -> None:
+    input_ = 'var count = "a"; count = count + "a"; print(count);'
+
+    for engine in ("scan", "regex"):
+        symbols = SymbolTable()
+        tokens = tokenize(input_, engine=engine, symbols=symbols).unwrap()
+        names = [t for t in tokens if t.type == TokenType.IDENTIFIER and t.value == 'count']
+
+        assert symbols.names == ['count', 'a', 'print']
+        assert {t.symbol for t in names} == {0}
+        assert all(t.value is names[0].value for t in names)
+        assert tokens[0].symbol == -1  # keywords are not interned
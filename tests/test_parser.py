@@ -1,21 +1,38 @@
-from unittest.mock import MagicMock
+import dataclasses
+import random
 
 import pytest
 from rusty_utils import Ok, Result
 
-from pylox.ast.expression import Literal, Grouping, Unary, Binary, BinaryOp, IExpr, UnaryOp
+from pylox.ast.expression import Literal, Grouping, Unary, Binary, BinaryOp, IExpr, UnaryOp, Identifier, FuncCall
+from pylox.ast.statement import Assignment, VarDecl, IStmt, ExprStmt, Block, IfStmt, WhileStmt, ForStmt
+from pylox.lexer.buffer import TokenBuffer
+from pylox.lexer.bytes_lexer import tokenize_bytes
 from pylox.lexer.lexer import tokenize
+from pylox.lexer.lines import LineIndex
+from pylox.lexer.symbols import SymbolTable
 from pylox.lexer.tokens import TokenType
-from pylox.parser.error import ParseError
+from pylox.parser.error import ParseError, ErrorKinds
+from pylox.parser import pratt
 from pylox.parser.expression import expression, synchronize
+from pylox.parser.parser import parse, parse_recovering
 from pylox.parser.source import Source
 
 
-def make_expression(source: str) -> Result[IExpr, ParseError]:
-    return expression(Source(tokenize(source).unwrap_or_raise()))
+EXPRESSION_PARSERS = {
+    "descent": expression,
+    "pratt": pratt.expression,
+}
 
+engines = pytest.mark.parametrize("engine", EXPRESSION_PARSERS)
 
-def test_primary() -> None:
+
+def make_expression(source: str, engine: str = "descent") -> Result[IExpr, ParseError]:
+    return EXPRESSION_PARSERS[engine](Source(tokenize(source).unwrap_or_raise()))
+
+
+@engines
+def test_primary(engine: str) -> None:
     source = '42 "hello" True False None'.split()
     expected = [
         Literal(42),
@@ -26,28 +43,31 @@ def test_primary() -> None:
     ]
 
     for (src, exp) in zip(source, expected):
-        assert make_expression(src) == Ok(exp)
+        assert make_expression(src, engine) == Ok(exp)
 
 
-def test_grouping() -> None:
+@engines
+def test_grouping(engine: str) -> None:
     source = '(42 + 2)'
     expected = Grouping(Binary(Literal(42), BinaryOp.ADD, Literal(2)))
 
-    assert make_expression(source) == Ok(expected)
+    assert make_expression(source, engine) == Ok(expected)
 
 
-def test_unary_operations() -> None:
-    source = '!true -42'
+@engines
+def test_unary_operations(engine: str) -> None:
+    source = '!True -42'
     expected = [
         Unary(UnaryOp.NOT, Literal(True)),
         Unary(UnaryOp.NEG, Literal(42)),
     ]
 
     for src, exp in zip(source.split(), expected):
-        assert make_expression(src) == Ok(exp)
+        assert make_expression(src, engine) == Ok(exp)
 
 
-def test_binary_operations() -> None:
+@engines
+def test_binary_operations(engine: str) -> None:
     source = '42 + 2 * 3 - 1'
     expected = Binary(
         Binary(
@@ -63,10 +83,11 @@ def test_binary_operations() -> None:
         Literal(1)
     )
 
-    assert make_expression(source) == Ok(expected)
+    assert make_expression(source, engine) == Ok(expected)
 
 
-def test_comparison_operations() -> None:
+@engines
+def test_comparison_operations(engine: str) -> None:
     source = '42 > 2 <= 3'
     expected = Binary(
         Binary(
@@ -78,10 +99,11 @@ def test_comparison_operations() -> None:
         Literal(3)
     )
 
-    assert make_expression(source) == Ok(expected)
+    assert make_expression(source, engine) == Ok(expected)
 
 
-def test_equality_operations() -> None:
+@engines
+def test_equality_operations(engine: str) -> None:
     source = '42 == 42 != 3'
     expected = Binary(
         Binary(
@@ -93,15 +115,17 @@ def test_equality_operations() -> None:
         Literal(3)
     )
 
-    assert make_expression(source) == Ok(expected)
+    assert make_expression(source, engine) == Ok(expected)
 
 
-def test_invalid_expression() -> None:
+@engines
+def test_invalid_expression(engine: str) -> None:
     with pytest.raises(ParseError):
-        make_expression("42 + *").unwrap_or_raise()
+        make_expression("42 + *", engine).unwrap_or_raise()
 
 
-def test_nested_grouping() -> None:
+@engines
+def test_nested_grouping(engine: str) -> None:
     source = '((42 + 2) * 3)'
     expected = Grouping(
         Binary(
@@ -113,19 +137,204 @@ def test_nested_grouping() -> None:
         )
     )
 
-    assert make_expression(source) == Ok(expected)
+    assert make_expression(source, engine) == Ok(expected)
 
 
-# FIXME: Synchronization logic is not implemented yet
 def test_synchronize() -> None:
     # Testing the synchronization logic after an error
-    source = '42 + * ; var x = 10;'
+    source = Source(tokenize('42 + * ; var x = 10; x = 1 while (x) { x = x + } x;').unwrap())
+    source.current = 2  # at `*`
+
+    synchronize(source)
+    assert source.peek_type() == TokenType.VAR  # skipped past the `;`
+
+    source.current = 11  # at `=` in `x = 1`
+    synchronize(source)
+    assert source.peek_type() == TokenType.WHILE  # stopped at the next statement keyword
+
+    source.current = 21  # at `}`
+    synchronize(source)
+    assert source.current == 21  # left for the block to close
+
+
+def test_parse_recovering() -> None:
+    text = 'var x = ;\nx = 1;\n{ var y = 2; y = * 3; y = y + 1; }\nif (x x = 2;\nx = x - 1;\n{ x = x + }\n}\nf(1,'
+    program, errors = parse_recovering(tokenize(text).unwrap(), LineIndex(text))
+
+    assert [(error.kind, str(error).split('(')[-1].split(')')[0]) for error in errors] == [
+        (ErrorKinds.EXPECTED_TOKEN, '1:9'),
+        (ErrorKinds.EXPECTED_TOKEN, '3:18'),
+        (ErrorKinds.EXPECTED_TOKEN, '4:7'),
+        (ErrorKinds.EXPECTED_TOKEN, '6:11'),
+        (ErrorKinds.EXPECTED_TOKEN, '7:1'),
+        (ErrorKinds.EXPECTED_TOKEN, '8:5'),
+    ]
+    assert program.statements == [
+        Assignment('x', Literal(1)),
+        Block([VarDecl('y', Literal(2)), Assignment('y', Binary(Identifier('y'), BinaryOp.ADD, Literal(1)))]),
+        Assignment('x', Binary(Identifier('x'), BinaryOp.SUB, Literal(1))),
+        Block([]),
+    ]
+
+    tokens = tokenize(PROGRAMS[0]).unwrap()
+    assert parse_recovering(tokens) == (parse(tokens).unwrap(), [])
+
+
+def test_parse_token_buffer() -> None:
+    tokens = tokenize('var x = 1; while (x < 10) { x = x * (2 + x); } if (!x) x = 1; else x;').unwrap()
+    assert parse(TokenBuffer.from_tokens(tokens)) == parse(tokens)
+
+
+@pytest.mark.parametrize("engine", ["fast", "iterative", "descent", "pratt"])
+def test_parse_token_buffer_columns(engine: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    # The parsers read the columns of a buffer, and only build `Token`s for error messages.
+    symbols = SymbolTable()
+    tokens = tokenize('var x = "s"; { x = -x + f(1.5, !x); } while (x) x;', symbols=symbols).unwrap()
+    buffer = TokenBuffer.from_tokens(tokens)
+    expected = parse(tokens, engine=engine).unwrap()
+
+    def no_tokens(self: TokenBuffer, index: int) -> None:
+        raise AssertionError(f"token {index} was built")
+    monkeypatch.setattr(TokenBuffer, "__getitem__", no_tokens)
+    program = parse(buffer, engine=engine).unwrap()
+    assert program == expected
+    decl = program.statements[0]
+    assert isinstance(decl, VarDecl) and decl.symbol == symbols.ids['x']
+
+
+def test_parse_error_position() -> None:
+    text = 'var x = 1;\nx = (1 + ;'
+    error = parse(tokenize(text).unwrap(), LineIndex(text)).unwrap_err()
+    assert "(2:10)" in str(error)
+
+
+def test_parse_symbols() -> None:
+    symbols = SymbolTable()
+    program = parse(tokenize('var x = 1; x = x + y;', symbols=symbols).unwrap()).unwrap()
+
+    decl, assignment = program.statements
+    assert isinstance(decl, VarDecl) and isinstance(assignment, Assignment)
+    assert decl.symbol == assignment.symbol == symbols.ids['x']
+    assert assignment.value == Binary(Identifier('x'), BinaryOp.ADD, Identifier('y'))
+    assert isinstance(assignment.value, Binary) and isinstance(assignment.value.right, Identifier)
+    assert assignment.value.right.symbol == symbols.ids['y']
+
+
+PROGRAMS = [
+    'var x = 1; while (x < 10) { x = x * (2 + x); } if (!x) x = 1; else x;',
+    'var a = -b - -c * !d / e; print(f(a, g(h)(i), (j)), 1 + 2 >= 3 == True or a and b != None);',
+    'for (var i = 0; i < 10; i = i + 1) { print(i); } for (;;) x(); { var s = "s"; }',
+    'for (i; i < 3; i = i + 1) x; for (i = 0; i < 3;) { i = i + 1; }',
+]
+
+
+ERRORS = ['x = (1 + 2;', 'f(1, 2;', 'x = 1 + ;', 'x = ;', 'var 1;', 'if x', '{ x;', '1 = 2;', 'x',
+          'for (var i = 0 i', 'while (x) { var y = ; }']
+
+
+@pytest.mark.parametrize("engine", ["fast", "iterative", "descent", "pratt"])
+def test_for_initializers(engine: str) -> None:
+    loops = parse(tokenize("for (i; i < 3; i = i + 1) x; for (i = 0; i < 3;) x;").unwrap(), engine=engine)
+    first, second = loops.unwrap().statements
+    assert isinstance(first, ForStmt) and first.init == ExprStmt(Identifier("i"))
+    assert isinstance(second, ForStmt) and second.init == Assignment("i", Literal(0))
+    assert second.increment is None and second.body == ExprStmt(Identifier("x"))
+
+
+@pytest.mark.parametrize("engine", ["fast", "iterative", "pratt"])
+def test_program_parity(engine: str) -> None:
+    for program in PROGRAMS:
+        tokens = tokenize(program).unwrap()
+        assert parse(tokens, engine=engine) == parse(tokens, engine="descent")
+        assert parse(TokenBuffer.from_tokens(tokens), engine=engine) == parse(tokens, engine="descent")
+
+
+@pytest.mark.parametrize("engine", ["fast", "iterative", "pratt"])
+def test_error_parity(engine: str) -> None:
+    for program in ERRORS:
+        tokens = tokenize(program).unwrap()
+        lines = LineIndex(program)
+        error = parse(tokens, lines, engine=engine).unwrap_err()
+        expected = parse(tokens, lines, engine="descent").unwrap_err()
+        assert str(error) == str(expected)
+
+
+FRAGMENTS = ['x', '1', '"s"', 'True', '-', '!', '+', '*', '==', '<', 'and', 'or', '(', ')', ',', ';', '=',
+             '{', '}', 'if', 'else', 'while', 'for', 'var', 'f(', ')(']
+
+
+def test_iterative_fuzz_parity() -> None:
+    rng = random.Random(11)
+    for _ in range(2000):
+        tokens = tokenize(' '.join(rng.choices(FRAGMENTS, k=rng.randrange(1, 16)))).unwrap()
+        result, expected = parse(tokens, engine="iterative"), parse(tokens, engine="fast")
+        if expected.is_ok():
+            assert result == expected
+        else:
+            assert str(result.unwrap_err()) == str(expected.unwrap_err())
+
+
+DEPTH = 100_000
+
+
+def assert_same_tree(left: object, right: object) -> None:
+    """`==` without recursion, which deep trees would overflow."""
+    names: dict[type, list[str]] = {}
+    stack = [(left, right)]
+    while stack:
+        a, b = stack.pop()
+        assert type(a) is type(b)
+        if isinstance(a, list):
+            assert isinstance(b, list) and len(a) == len(b)
+            stack.extend(zip(a, b))
+        elif dataclasses.is_dataclass(a):
+            if type(a) not in names:
+                names[type(a)] = [f.name for f in dataclasses.fields(a) if f.compare]
+            stack.extend((getattr(a, name), getattr(b, name)) for name in names[type(a)])
+        else:
+            assert a == b
+
+
+def parse_deep(text: str) -> list[IStmt]:
+    statements: list[IStmt] = parse(tokenize_bytes(text.encode()).unwrap(), engine="iterative").unwrap().statements
+    return statements
+
+
+def test_iterative_deep_expressions() -> None:
+    expr: IExpr = Literal(1)
+    for _ in range(DEPTH):
+        expr = Grouping(expr)
+    assert_same_tree(parse_deep('x = ' + '(' * DEPTH + '1' + ')' * DEPTH + ';'), [Assignment('x', expr)])
+
+    expr = Literal(1)
+    for _ in range(DEPTH):
+        expr = Unary(UnaryOp.NEG, expr)
+    assert_same_tree(parse_deep('- ' * DEPTH + '1;'), [ExprStmt(expr)])
+
+    expr = Identifier('x')
+    for _ in range(DEPTH):
+        expr = FuncCall(Identifier('f'), [Identifier('x'), expr])
+    assert_same_tree(parse_deep('f(x, ' * DEPTH + 'x' + ')' * DEPTH + ';'), [ExprStmt(expr)])
 
-    src_mock = MagicMock(Source)
-    src_mock.match.return_value = False
-    src_mock.has_next.side_effect = [True, True, True, False]  # Simulate end after some tokens
-    src_mock.prev.return_value.type = TokenType.SEMICOLON
 
-    synchronize(src_mock)
+def test_iterative_deep_statements() -> None:
+    stmt: IStmt = Block([])
+    for _ in range(DEPTH):
+        stmt = Block([stmt])
+    assert_same_tree(parse_deep('{' * (DEPTH + 1) + '}' * (DEPTH + 1)), [stmt])
+
+    stmt = ExprStmt(Identifier('x'))
+    for _ in range(DEPTH):
+        stmt = IfStmt(Identifier('x'), ExprStmt(Identifier('y')), stmt)
+    assert_same_tree(parse_deep('if (x) y; else ' * DEPTH + 'x;'), [stmt])
 
-    assert src_mock.advance.call_count == 4  # Ensuring advance was called to skip tokens
+    stmt = ExprStmt(Identifier('x'))
+    for _ in range(DEPTH):
+        stmt = WhileStmt(Identifier('x'), stmt)
+    assert_same_tree(parse_deep('while (x) ' * DEPTH + 'x;'), [stmt])
+
+
+def test_iterative_deep_error() -> None:
+    text = '(' * DEPTH + '1;'
+    error = parse(tokenize(text).unwrap(), LineIndex(text), engine="iterative").unwrap_err()
+    assert error.kind == ErrorKinds.EXPECTED_TOKEN and f"(1:{DEPTH + 2})" in str(error)
@@ -0,0 +1,287 @@
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from pylox.ast import serialize
+from pylox.ast.expression import IExpr, Literal, Grouping, Identifier, Binary, BinaryOp, Unary, UnaryOp
+from pylox.ast.hashcons import InternTable
+from pylox.ast.printer import format_ast
+from pylox.ast.statement import Program, ExprStmt, Assignment, VarDecl, Block, ForStmt
+from pylox.ast.visitor import walk
+from pylox.cache.disk import DiskCache
+from pylox.compiler import compile_source, compile_file
+from pylox.interpreter.bulitin import Builtin
+from pylox.interpreter.interpreter import Interpreter, run, interpret
+from pylox.lexer.lexer import tokenize
+from pylox.parser.parser import parse
+from pylox.passes.constant_fold import fold_constants
+from pylox.passes.dead_code import eliminate_dead_code
+from pylox.passes.error import ErrorKinds, ResolveError
+from pylox.passes.numeric import specialize
+from pylox.passes.resolver import resolve
+
+
+def folded(source: str) -> str:
+    return format_ast(compile_source(source, memory=None, optimize=1).unwrap()).unwrap()
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("x = 2 * 3 + 1;", "(= x 7.0)"),
+    ("x = (1 == 1.0) == True;", "(= x True)"),
+    ("x = \"2\" * 3;", "(= x 6.0)"),
+    ("x = -(2);", "(= x -2.0)"),
+    ("x = !None;", "(= x True)"),
+    ("x = (y);", "(= x y)"),
+    ("x = False or y;", "(= x y)"),
+    ("x = None and y;", "(= x None)"),
+    ("x = 1 or y;", "(= x 1)"),
+    # Operations that fail at run time are kept.
+    ("x = 1 / 0;", "(= x (/ 1 0))"),
+    ("x = -\"a\";", "(= x (- a))"),
+    ("x = 1 < f;", "(= x (< 1 f))"),
+    # Identities only hold for numbers and booleans.
+    ("x = (a + b) * 1;", "(= x (+ a b))"),
+    ("x = 1 * (a / b) / 1 - 0;", "(= x (/ a b))"),
+    ("x = a * 1;", "(= x (* a 1))"),
+    ("x = (a + b) + 0;", "(= x (+ (+ a b) 0))"),
+    ("x = (a + b) - -0.0;", "(= x (- (+ a b) -0.0))"),
+    ("x = --(a + b);", "(= x (+ a b))"),
+    ("x = --a;", "(= x (- (- a)))"),
+    ("x = !!(a < b);", "(= x (< a b))"),
+    ("x = !!a;", "(= x (! (! a)))"),
+    ("x = !!!a;", "(= x (! a))"),
+    ("if (!!a) x = 1;", "(if a (= x 1))"),
+    ("while (!!!!(a)) x = 1;", "(while a (= x 1))"),
+])
+def test_constant_folding(source: str, expected: str) -> None:
+    assert folded(source) == expected
+
+
+def test_folding_keeps_results(capsys: pytest.CaptureFixture[str]) -> None:
+    source = (
+        'var a = 3; var s = "4";'
+        'print(2 * 3 - (a + 1) * 1); print(!!a); print(s * 1); print(--(a * 2)); print(1 == 1.0);'
+        'print(False or a); print(0 and a); print(-(-0.0 + 0)); print((a + 0) == a);'
+    )
+    run(source, optimize=0)
+    plain = capsys.readouterr().out
+    run(source, optimize=1)
+    assert capsys.readouterr().out == plain
+
+
+def test_folding_deep_tree() -> None:
+    expr: IExpr = Identifier("x", 0)
+    for i in range(100_000):
+        expr = Grouping(Binary(expr, BinaryOp.MUL, Literal(1))) if i % 2 else Unary(UnaryOp.NEG, expr)
+    program = fold_constants(Program([ExprStmt(expr)]))
+    # `--x` stays, as `x` may be a string, but every further negation pair and `* 1` goes.
+    assert program == Program([ExprStmt(Unary(UnaryOp.NEG, Unary(UnaryOp.NEG, Identifier("x", 0))))])
+
+
+def eliminated(source: str) -> Tuple[str, int]:
+    program, removed = eliminate_dead_code(compile_source(source, memory=None, optimize=1).unwrap())
+    return format_ast(program).unwrap(), removed
+
+
+@pytest.mark.parametrize("source, expected, removed", [
+    ("if (True) x = 1; else x = 2;", "(= x 1)", 4),
+    ("if (False) x = 1; else { x = 2; }", "(= x 2)", 5),
+    ("if (1 < 0) x = 1; y = 2;", "(= y 2)", 4),
+    ("while (False) { x = 1; } y;", "y", 5),
+    ("while (x) if (None) y = 1;", "(while x (block ))", 3),
+    ("{ x = 1; { } y = 2; }", "(= x 1)\n(= y 2)", 2),
+    ("if (x) { y = 1; } else { }", "(if x (= y 1))", 2),
+    # Blocks that declare keep their scope.
+    ("if (True) { var x = 1; x = 2; }", "(block (var x 1) (= x 2))", 2),
+    ("while (x) { { var y = 1; } }", "(while x (block (var y 1)))", 1),
+    ("for (var i = 0; False; i = i + 1) x = i;", "(block (var i 0))", 7),
+    ("for (; False; x = 1) y = 2; z;", "z", 6),
+    ("while (x) { y = 1; z = 2; }", "(while x (block (= y 1) (= z 2)))", 0),
+])
+def test_dead_code(source: str, expected: str, removed: int) -> None:
+    assert eliminated(source) == (expected, removed)
+
+
+def test_dead_code_keeps_results(capsys: pytest.CaptureFixture[str]) -> None:
+    source = (
+        'var a = 1; if (False) a = 2; else { var a = 3; print(a); } print(a);'
+        'if (1 == 1) { a = a + 1; } while (a < 0 and False) a = 0; print(a);'
+        'for (var i = 0; i < 3; i = i + 1) { if (True) { print(i); } }'
+    )
+    run(source, optimize=0)
+    plain = capsys.readouterr().out
+    run(source, optimize=2)
+    assert capsys.readouterr().out == plain
+
+
+def addresses(program: Program) -> List[Tuple[str, str, int, int]]:
+    return [(type(node).__name__, node.name, node.hops, node.slot)
+            for node in walk(program)
+            if isinstance(node, (Identifier, Assignment))]
+
+
+def test_resolver_addresses() -> None:
+    program = resolve(parse(tokenize(
+        "var g = 1;"
+        "{ var a = a; { var b = a; a = b; { print(g); b = 2; } } var a = a; a; }"
+    ).unwrap()).unwrap())
+    assert addresses(program) == [
+        ("Identifier", "a", -1, -1),  # its own initializer sees the global
+        ("Identifier", "a", 1, 0),
+        ("Assignment", "a", 1, 0),
+        ("Identifier", "b", 0, 0),
+        ("Identifier", "print", -1, -1),
+        ("Identifier", "g", -1, -1),
+        ("Assignment", "b", 0, 0),  # the innermost block declares nothing and has no frame
+        ("Identifier", "a", 0, 0),  # the second `a` shadows the first from its declaration on
+        ("Identifier", "a", 0, 1),
+    ]
+    outer = program.statements[1]
+    assert isinstance(outer, Block) and outer.slots == 2
+    assert [node.slot for node in walk(program) if isinstance(node, VarDecl)] == [-1, 0, 0, 1]
+    assert [node.slots for node in walk(program) if isinstance(node, Block)] == [2, 1, 0]
+
+    # Addresses survive serialization.
+    assert addresses(serialize.loads(serialize.dumps(program))) == addresses(program)
+
+
+def test_resolver_for_scope() -> None:
+    program = resolve(parse(tokenize(
+        "for (var i = 0; i < 3; i = i + 1) { var j = i; print(j); } for (; i; i = 0) { }"
+    ).unwrap()).unwrap())
+    loop, other = program.statements
+    assert isinstance(loop, ForStmt) and loop.slots == 1 and isinstance(loop.body, Block) and loop.body.slots == 1
+    assert isinstance(other, ForStmt) and other.slots == 0
+    assert addresses(program) == [
+        ("Identifier", "i", 0, 0),
+        ("Assignment", "i", 0, 0),
+        ("Identifier", "i", 0, 0),
+        ("Identifier", "i", 1, 0),  # from the body, one frame in
+        ("Identifier", "print", -1, -1),
+        ("Identifier", "j", 0, 0),
+        ("Identifier", "i", -1, -1),  # the loop variable is gone after its loop
+        ("Assignment", "i", -1, -1),
+    ]
+
+
+def test_resolver_unshares_interned_trees() -> None:
+    # Both `x;` are one node once interned, but refer to different variables. Addresses are not compared
+    # by `==`, so they are checked directly.
+    source = "var x = 0; { var y = 2; x; { var x = 1; x; } }"
+    plain = resolve(parse(tokenize(source).unwrap()).unwrap())
+    interned = resolve(InternTable().intern(parse(tokenize(source).unwrap()).unwrap()))
+    assert addresses(interned) == addresses(plain) == [
+        ("Identifier", "x", -1, -1),
+        ("Identifier", "x", 0, 0),
+    ]
+    identifiers = [node for node in walk(interned) if isinstance(node, Identifier)]
+    assert identifiers[0] is not identifiers[1]
+
+
+def test_resolver_errors() -> None:
+    assert compile_source("print(x);", memory=None).is_ok()
+    for source in ["print(x);", "{ x = 1; } var x;", "var y = y;"]:
+        error = compile_source(source, memory=None, known=Builtin).unwrap_err()
+        assert isinstance(error, ResolveError) and error.kind is ErrorKinds.UNDEFINED_VARIABLE
+    assert compile_source("var x; { x = 1; print(x); }", memory=None, known=Builtin).is_ok()
+
+
+def test_known_globals_are_checked_on_cache_hits(tmp_path: Path) -> None:
+    # The tree of a text compiled without `known`, through the default cache, is still checked against it.
+    source = "print(never_declared_anywhere);"
+    assert compile_source(source).is_ok()
+    assert compile_source(source).is_ok()
+    error = compile_source(source, known=Builtin).unwrap_err()
+    assert isinstance(error, ResolveError) and error.name == "never_declared_anywhere"
+    assert compile_source(source, known=[*Builtin, "never_declared_anywhere"]).is_ok()
+
+    # And the other way around, through a disk cache.
+    cache = DiskCache(tmp_path)
+    source = "{ var a = 1; print(a + b); }"
+    assert compile_source(source, cache, memory=None, known=Builtin).is_err()
+    assert compile_source(source, cache, memory=None).is_ok()
+    assert compile_source(source, cache, memory=None, known=Builtin).is_err()
+    assert compile_source(source, cache, memory=None, known=[*Builtin, "b"]).is_ok()
+
+    script = tmp_path / "script.lox"
+    script.write_text(source, encoding="utf-8")
+    assert compile_file(script, cache).is_ok()
+    assert compile_file(script, cache, known=Builtin).is_err()
+
+
+def test_resolved_programs_run_the_same(capsys: pytest.CaptureFixture[str]) -> None:
+    source = (
+        'var n = 0;'
+        '{ var a = 1; { var a = a + 1; print(a); n = n + a; } print(a); var a = 10; print(a); }'
+        'for (var i = 0; i < 3; i = i + 1) { var j = i * 2; { j = j + 1; print(j); } }'
+        'while (n < 5) { var k = n; n = k + 1; } print(n);'
+    )
+    interpret(parse(tokenize(source).unwrap()).unwrap())
+    unresolved = capsys.readouterr().out
+    run(source)
+    assert capsys.readouterr().out == unresolved
+
+
+def test_frames_are_recycled(capsys: pytest.CaptureFixture[str]) -> None:
+    interpreter = Interpreter()
+    program = compile_source(
+        "var n = 0; while (n < 100) { var a = n; { var b = a + 1; n = b; } } print(n);", memory=None
+    ).unwrap()
+    for stmt in program.statements:
+        interpreter.visit(stmt).unwrap()
+    assert capsys.readouterr().out == "100.0\n"
+    # One frame for each block, reused on every iteration and cleared.
+    assert interpreter.frame is None
+    free = interpreter.frames.free[1]
+    assert len(free) == 2 and all(frame.values == [None] and frame.outer is None for frame in free)
+
+
+def numeric(source: str) -> List[Tuple[str, bool]]:
+    program = specialize(resolve(parse(tokenize(source).unwrap()).unwrap()))
+    return [(format_ast(node).unwrap(), node.numeric) for node in walk(program) if isinstance(node, Binary)]
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("{ var i = 0; i = i + 1; print(i < 10.5); }", [True, True]),
+    ("{ var a = 1; var b = a; a = b * 2; print(-a / (b or 1)); }", [True, True]),
+    ("for (var i = 0; i < 3; i = i + 1) { var j = i; print(j >= i - 1); }", [True, True, True, True]),
+    # Globals, strings, bools, uninitialized variables and ints without an exact float are not numbers.
+    ("var g = 1; { print(g + 1); }", [False]),
+    ('{ var s = "2"; print(s * 1); }', [False]),
+    ("{ var b = True; print(b + 1 > 0); }", [True, False]),
+    ("{ var x; x = 1; print(x * 2); }", [False]),
+    ("{ var n = 9007199254740993; print(n - 1 < 9007199254740992); }", [True, False]),
+    # A variable written anything else makes the ones written from it unknown too.
+    ("{ var a = 1; var b = a; var c = b + 1; a = g; print(b - c); }", [False, False]),
+    ('{ var a = 1 or "x"; print(a - 1); }', [False]),
+    ("{ var a = 1; print(a == 1 or a != 2); }", [False, False]),
+])
+def test_numeric_specialization(source: str, expected: List[bool]) -> None:
+    assert [flag for _, flag in numeric(source)] == expected
+
+
+def test_numeric_specialization_of_interned_trees() -> None:
+    # Both `print(a + 1);` are one node once interned, but only the first adds to a number.
+    source = '{ var a = 1; print(a + 1); { var a = "s"; print(a + 1); } }'
+    program = specialize(InternTable().intern(resolve(parse(tokenize(source).unwrap()).unwrap())))
+    assert [node.numeric for node in walk(program) if isinstance(node, Binary)] == [True, False]
+
+
+def test_numeric_keeps_results(capsys: pytest.CaptureFixture[str]) -> None:
+    source = (
+        '{ var a = 1; var b = 2; print(a + b); print(a - b); print(a * b); print(a / b); print(a < b);'
+        '  print(b >= 2); var c = -a; c = c * 3; print(c); print(c / 0.5 <= -6); print(9007199254740992 + a); }'
+        'for (var i = 0; i < 3; i = i + 1) { var t = i * 0.1; print(t + 0.2 > 0.3); }'
+    )
+    run(source, optimize=2)
+    plain = capsys.readouterr().out
+    run(source, optimize=3)
+    assert capsys.readouterr().out == plain
+
+    program = compile_source(source, memory=None, optimize=3).unwrap()
+    assert any(node.numeric for node in walk(program) if isinstance(node, Binary))
+    # Marks survive serialization.
+    def flags(program: Program) -> List[bool]:
+        return [node.numeric for node in walk(program) if isinstance(node, Binary)]
+    assert flags(serialize.loads(serialize.dumps(program))) == flags(program)